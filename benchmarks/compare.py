@@ -0,0 +1,42 @@
+# Compares two result files written by benchmarks.load --out, e.g. before and after a change:
+#   python -m benchmarks.compare before.json after.json
+import argparse
+
+from benchmarks import report
+
+COLUMNS = ('rps', 'p50_ms', 'p95_ms', 'p99_ms')
+
+
+def delta(before: float, after: float) -> str:
+  if before == 0:
+    return '{:>9.2f} {:>8}'.format(after, '-')
+  return '{:>9.2f} {:>+7.1f}%'.format(after, (after - before) / before * 100)
+
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument('before')
+  parser.add_argument('after')
+  args = parser.parse_args()
+
+  before = report.load(args.before)
+  after = report.load(args.after)
+
+  print('before {} ({})'.format(before['revision'], before['time']))
+  print('after  {} ({})'.format(after['revision'], after['time']))
+  if before['meta'] != after['meta']:
+    print('warning: runs used different settings. before={} after={}'.format(before['meta'], after['meta']))
+  print()
+
+  print('{:<12} '.format('scenario') + ' '.join('{:>18}'.format(column) for column in COLUMNS) + ' {:>8}'.format('errors'))
+  for name, row in after['results'].items():
+    old = before['results'].get(name)
+    if old is None:
+      print('{:<12} (not in {})'.format(name, args.before))
+      continue
+    print('{:<12} '.format(name) + ' '.join(delta(old[column], row[column]) for column in COLUMNS) +
+          ' {:>8}'.format('{}->{}'.format(old['errors'], row['errors'])))
+
+
+if __name__ == '__main__':
+  main()
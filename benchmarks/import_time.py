@@ -0,0 +1,64 @@
+# Summarises `python -X importtime -c "import main"`: total import time, the slowest top level imports and
+# self time per package. Exits with 1 when the total is over the budget, so it can gate CI.
+# Run from the repository root. Importing main does not touch Postgres or Redis:
+#   python -m benchmarks.import_time --budget-ms 1500
+import argparse
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+from core.startup import IMPORT_BUDGET
+
+LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def parse(stderr: str) -> list[tuple[str, int, int, int]]:
+  # (module, depth, self us, cumulative us) in the order python printed them
+  rows = []
+  for line in stderr.splitlines():
+    match = LINE.match(line)
+    if match:
+      own, cumulative, indent, module = match.groups()
+      rows.append((module, (len(indent) - 1) // 2, int(own), int(cumulative)))
+  return rows
+
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--module', default='main')
+  parser.add_argument('--top', type=int, default=15)
+  parser.add_argument('--budget-ms', type=float, default=IMPORT_BUDGET * 1000)
+  args = parser.parse_args()
+
+  result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import {}'.format(args.module)],
+                          capture_output=True, text=True, env=os.environ)
+  if result.returncode != 0:
+    print(result.stderr[-4000:], file=sys.stderr)
+    sys.exit(result.returncode)
+
+  rows = parse(result.stderr)
+  total = sum(own for _, _, own, _ in rows)
+
+  print('total import time {:.0f} ms over {} modules (budget {:.0f} ms)'.format(total / 1000, len(rows), args.budget_ms))
+
+  print('\nslowest direct imports, cumulative')
+  direct = sorted((row for row in rows if row[1] == 1), key=lambda row: row[3], reverse=True)
+  for module, _, _, cumulative in direct[:args.top]:
+    print('  {:>8.1f} ms  {}'.format(cumulative / 1000, module))
+
+  print('\nself time by package')
+  packages = defaultdict(int)
+  for module, _, own, _ in rows:
+    packages[module.split('.')[0]] += own
+  for package, own in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+    print('  {:>8.1f} ms  {}'.format(own / 1000, package))
+
+  if total / 1000 > args.budget_ms:
+    print('\nover budget by {:.0f} ms'.format(total / 1000 - args.budget_ms))
+    sys.exit(1)
+
+
+if __name__ == '__main__':
+  main()
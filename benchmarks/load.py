@@ -0,0 +1,215 @@
+# Drives the hottest endpoints with concurrent clients and reports latency percentiles and throughput per scenario.
+# Seed first with benchmarks.seed, then either point at a running server or let this script start one:
+#   python -m benchmarks.load --manifest bench_manifest.json --launch --duration 30 --concurrency 16 --out before.json
+# With --launch the NEIS and Google stubs are started locally and the server gets a copy of the config
+# (BLINK_CONFIG or config_dev.yml) whose API urls point at them. Compare two runs with benchmarks.compare.
+import argparse
+import copy
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+import yaml
+
+from benchmarks import report, stubs
+from core.jwt import jwt_service
+
+SCENARIOS = {}
+
+
+def scenario(name: str):
+  def register(func):
+    SCENARIOS[name] = func
+    return func
+  return register
+
+
+# every scenario returns (method, path, json body) for one request of a randomly picked user
+
+@scenario('board_list')
+def board_list(manifest: dict, user: dict, rng: random.Random):
+  return 'GET', '/api/social/post/list/{}'.format(rng.choice(manifest['boards'])), None
+
+
+@scenario('hot_list')
+def hot_list(manifest: dict, user: dict, rng: random.Random):
+  return 'GET', '/api/social/post/hot/{}'.format(rng.choice(manifest['boards'])), None
+
+
+@scenario('post_fetch')
+def post_fetch(manifest: dict, user: dict, rng: random.Random):
+  return 'GET', '/api/social/post/{}'.format(rng.choice(manifest['posts'])), None
+
+
+@scenario('vote')
+def vote(manifest: dict, user: dict, rng: random.Random):
+  return 'POST', '/api/social/post/vote', {'postId': rng.choice(manifest['posts']), 'vote': rng.random() < 0.8}
+
+
+@scenario('comments')
+def comments(manifest: dict, user: dict, rng: random.Random):
+  return 'GET', '/api/social/comment/{}'.format(rng.choice(manifest['posts'])), None
+
+
+@scenario('comment_add')
+def comment_add(manifest: dict, user: dict, rng: random.Random):
+  return 'POST', '/api/social/comment', {'postId': rng.choice(manifest['posts']), 'content': 'bench {}'.format(rng.random())}
+
+
+@scenario('meal')
+def meal(manifest: dict, user: dict, rng: random.Random):
+  return 'GET', '/api/school/neis/cached/meal?neis-code={}'.format(user['neisCode']), None
+
+
+@scenario('timetable')
+def timetable(manifest: dict, user: dict, rng: random.Random):
+  return 'GET', '/api/school/neis/cached/timetable', None
+
+
+def run_scenario(name: str, args, manifest: dict, tokens: list[tuple[dict, str]]) -> dict:
+  build = SCENARIOS[name]
+  samples = []
+  errors = 0
+  lock = threading.Lock()
+  measure_from = time.perf_counter() + args.warmup
+  deadline = measure_from + args.duration
+
+  def client(index: int):
+    nonlocal errors
+    rng = random.Random('{}-{}'.format(name, index))
+    local_samples = []
+    local_errors = 0
+
+    with requests.Session() as session:
+      while True:
+        user, token = rng.choice(tokens)
+        method, path, body = build(manifest, user, rng)
+
+        begin = time.perf_counter()
+        if begin >= deadline:
+          break
+        try:
+          response = session.request(method, args.base_url + path, json=body, timeout=30,
+                                     headers={'Authorization': 'Bearer {}'.format(token)})
+          failed = response.status_code >= 400
+        except requests.RequestException:
+          failed = True
+        end = time.perf_counter()
+
+        if begin < measure_from:
+          continue
+        local_samples.append(end - begin)
+        local_errors += failed
+
+    with lock:
+      samples.extend(local_samples)
+      errors += local_errors
+
+  threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(args.concurrency)]
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+
+  return report.summarize(samples, errors, args.duration)
+
+
+def merge(base: dict, override: dict) -> dict:
+  merged = copy.deepcopy(base)
+  for key, value in override.items():
+    if isinstance(value, dict) and isinstance(merged.get(key), dict):
+      merged[key] = merge(merged[key], value)
+    else:
+      merged[key] = value
+  return merged
+
+
+def launch(args):
+  stub_server = stubs.start(latency=args.stub_latency)
+
+  with open(os.environ.get('BLINK_CONFIG', 'config_dev.yml')) as f:
+    base = yaml.load(f, Loader=yaml.FullLoader)
+  config_file = tempfile.NamedTemporaryFile('w', suffix='.yml', prefix='blink-bench-', delete=False)
+  with config_file:
+    yaml.dump(merge(base, stubs.config_overrides(stub_server)), config_file, allow_unicode=True)
+
+  server = subprocess.Popen(
+    [sys.executable, '-m', 'uvicorn', 'main:app', '--host', '127.0.0.1', '--port', str(args.port),
+     '--workers', str(args.workers), '--log-level', 'warning', '--no-access-log'],
+    env={**os.environ, 'BLINK_CONFIG': config_file.name}
+  )
+  args.base_url = 'http://127.0.0.1:{}'.format(args.port)
+
+  deadline = time.monotonic() + 60
+  while time.monotonic() < deadline:
+    if server.poll() is not None:
+      raise RuntimeError('server exited with code {}'.format(server.returncode))
+    try:
+      requests.get(args.base_url + '/api/openapi.json', timeout=1)
+      break
+    except requests.RequestException:
+      time.sleep(0.5)
+  else:
+    server.terminate()
+    raise RuntimeError('server did not come up within 60 seconds')
+
+  def stop():
+    server.terminate()
+    server.wait(10)
+    stub_server.shutdown()
+    os.unlink(config_file.name)
+
+  return stop
+
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--manifest', default='bench_manifest.json')
+  parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+  parser.add_argument('--launch', action='store_true', help='start the stubs and a server instead of using --base-url')
+  parser.add_argument('--port', type=int, default=18000)
+  parser.add_argument('--workers', type=int, default=1)
+  parser.add_argument('--stub-latency', type=float, default=0.05, help='seconds added to every NEIS/Google response')
+  parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+  parser.add_argument('--concurrency', type=int, default=16)
+  parser.add_argument('--duration', type=float, default=30, help='measured seconds per scenario')
+  parser.add_argument('--warmup', type=float, default=3, help='unmeasured seconds before each scenario')
+  parser.add_argument('--users', type=int, default=500, help='distinct users to spread requests over')
+  parser.add_argument('--out', help='write results as JSON for benchmarks.compare')
+  args = parser.parse_args()
+
+  manifest = report.load(args.manifest)
+  names = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+  for name in names:
+    if name not in SCENARIOS:
+      parser.error('unknown scenario {}. choose from {}'.format(name, ', '.join(SCENARIOS)))
+
+  tokens = [(user, jwt_service.create_token(user['userId'], user['roles'])) for user in manifest['users'][:args.users]]
+
+  stop = launch(args) if args.launch else None
+  results = {}
+  try:
+    for name in names:
+      results[name] = run_scenario(name, args, manifest, tokens)
+      print('{:<12} done. rps={:.1f} p99={:.2f}ms'.format(name, results[name]['rps'], results[name]['p99_ms']))
+  finally:
+    if stop is not None:
+      stop()
+
+  print()
+  print(report.table(results))
+
+  if args.out:
+    meta = {key: getattr(args, key) for key in ('concurrency', 'duration', 'warmup', 'workers', 'stub_latency', 'users')}
+    meta['scale'] = manifest.get('scale')
+    report.save(args.out, results, meta)
+    print('results written to {}'.format(args.out))
+
+
+if __name__ == '__main__':
+  main()
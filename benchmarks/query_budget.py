@@ -0,0 +1,85 @@
+# Pins the SQL query budget of the endpoints that had N+1 patterns. Every check runs the service call behind
+# the endpoint on a seeded database and fails when it runs more statements than its budget, so it can gate CI:
+#   BLINK_CONFIG=config_bench.yml python -m benchmarks.query_budget --manifest bench_manifest.json
+import argparse
+import json
+import sys
+from uuid import UUID
+
+from core.query_stats import max_queries
+from core.social import board_registry, comment_service, personalized_social_service, post_service
+from database.database import SessionLocal
+
+# statements per call. a budget counts statements, so it does not grow with the number of rows returned
+BUDGETS = {
+  # comments with their schools in one joined query
+  'comment_list': 1,
+  # the identity snapshot, then the starred and school boards in one query
+  'personalized_boards': 2,
+  # one page of posts, then the reader's votes on the whole page. the ACL comes from the board registry
+  'post_list': 2,
+}
+
+
+def check_comment_list(manifest: dict, index: int):
+  with SessionLocal() as db:
+    comment_service.get_organized_comments(UUID(manifest['posts'][index]), db)
+
+
+def check_personalized_boards(manifest: dict, index: int):
+  sub = UUID(manifest['users'][index]['userId'])
+  # measure the query path, not the cache
+  personalized_social_service.invalidate_personalized_board(sub)
+  with SessionLocal() as db:
+    personalized_social_service.get_user_personalized_board(sub, db)
+
+
+def check_post_list(manifest: dict, index: int):
+  user = manifest['users'][index]
+  sub = UUID(user['userId'])
+  board_id = UUID(manifest['boards'][index % len(manifest['boards'])])
+  # measure the query path, not the cache
+  post_service.invalidate_votes(sub)
+  with SessionLocal() as db:
+    posts = post_service.get_posts(user['roles'], board_id, None, db)
+    post_service.get_votes_for_posts(sub, [post.post_id for post in posts], db)
+
+
+CHECKS = {
+  'comment_list': check_comment_list,
+  'personalized_boards': check_personalized_boards,
+  'post_list': check_post_list,
+}
+
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--manifest', default='bench_manifest.json')
+  parser.add_argument('--samples', type=int, default=20, help='posts or users each check is run for')
+  args = parser.parse_args()
+
+  with open(args.manifest) as f:
+    manifest = json.load(f)
+
+  # workers load the board registry at startup, so the checks run against a warm one
+  with SessionLocal() as db:
+    board_registry.load_board_registry(db)
+
+  failed = 0
+  for name, check in CHECKS.items():
+    budget = BUDGETS[name]
+    try:
+      # one call per block, so the budget holds for every sample and not only on average
+      for index in range(min(args.samples, len(manifest['posts']), len(manifest['users']))):
+        with max_queries(budget) as statements:
+          check(manifest, index)
+      print('ok    {:<22} budget {}, last run {}'.format(name, budget, len(statements)))
+    except AssertionError as e:
+      failed += 1
+      print('FAIL  {:<22} {}'.format(name, e))
+
+  sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,58 @@
+import json
+import subprocess
+from datetime import datetime, timezone
+
+
+def percentile(samples: list[float], p: float) -> float:
+  # nearest rank on a sorted list
+  if not samples:
+    return 0.0
+  return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+
+def summarize(samples: list[float], errors: int, elapsed: float) -> dict:
+  samples = sorted(samples)
+  count = len(samples)
+  return {
+    'requests': count,
+    'errors': errors,
+    'rps': count / elapsed if elapsed > 0 else 0.0,
+    'mean_ms': sum(samples) / count * 1000 if count else 0.0,
+    'p50_ms': percentile(samples, 0.50) * 1000,
+    'p95_ms': percentile(samples, 0.95) * 1000,
+    'p99_ms': percentile(samples, 0.99) * 1000,
+    'max_ms': samples[-1] * 1000 if count else 0.0,
+  }
+
+
+def git_revision() -> str:
+  try:
+    revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True)
+    dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], capture_output=True, text=True)
+  except (OSError, subprocess.CalledProcessError):
+    return 'unknown'
+  return revision.stdout.strip() + ('-dirty' if dirty.stdout.strip() else '')
+
+
+def save(path: str, results: dict, meta: dict):
+  with open(path, 'w') as f:
+    json.dump({
+      'revision': git_revision(),
+      'time': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+      'meta': meta,
+      'results': results,
+    }, f, indent=2)
+
+
+def load(path: str) -> dict:
+  with open(path) as f:
+    return json.load(f)
+
+
+def table(results: dict) -> str:
+  lines = ['{:<12} {:>8} {:>6} {:>9} {:>9} {:>9} {:>9} {:>9}'.format(
+    'scenario', 'requests', 'errors', 'rps', 'p50 ms', 'p95 ms', 'p99 ms', 'max ms')]
+  for name, row in results.items():
+    lines.append('{:<12} {:>8} {:>6} {:>9.1f} {:>9.2f} {:>9.2f} {:>9.2f} {:>9.2f}'.format(
+      name, row['requests'], row['errors'], row['rps'], row['p50_ms'], row['p95_ms'], row['p99_ms'], row['max_ms']))
+  return '\n'.join(lines)
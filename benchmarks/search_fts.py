@@ -0,0 +1,118 @@
+# Seeds a synthetic corpus into social.post and compares indexed search against an ILIKE scan.
+# Run from the repository root against a disposable database:
+#   python -m benchmarks.search_fts --board <board_id> --school <school_id> --author <user_id> --posts 1000000
+import argparse
+import random
+import statistics
+import time
+
+from psycopg2.extras import execute_values
+from sqlalchemy import select, func
+
+from core.social import search_service
+from database.database import SessionLocal, engine
+from models.database_models.relational.social.post import Post
+
+SYLLABLES = '가나다라마바사아자차카타파하학교급식시험수업방과후동아리축제선생님친구점심저녁기숙사체육대회'
+LATIN = ['math', 'english', 'physics', 'chemistry', 'covid', 'ai', 'ios', 'android', 'mt', 'ot']
+SEED_BATCH = 5000
+
+
+def random_word(rng: random.Random) -> str:
+  if rng.random() < 0.1:
+    return rng.choice(LATIN)
+  return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 5)))
+
+
+def random_text(rng: random.Random, words: int) -> str:
+  return ' '.join(random_word(rng) for _ in range(words))
+
+
+def seed(args, rng: random.Random):
+  raw = engine.raw_connection()
+  try:
+    cursor = raw.cursor()
+    for offset in range(0, args.posts, SEED_BATCH):
+      rows = []
+      for _ in range(min(SEED_BATCH, args.posts - offset)):
+        title = random_text(rng, rng.randint(2, 8))
+        content = random_text(rng, rng.randint(20, 120))
+        rows.append((args.author, args.school, args.board, title, content,
+                     ' '.join(search_service.tokenize(title)), ' '.join(search_service.tokenize(content))))
+      execute_values(
+        cursor,
+        'INSERT INTO social.post (author_id, school_id, board_id, title, content, search_vector) VALUES %s',
+        rows,
+        template="(%s, %s, %s, %s, %s, setweight(to_tsvector('simple', %s), 'A') || "
+                 "setweight(to_tsvector('simple', %s), 'B'))"
+      )
+      raw.commit()
+      print('seeded {}/{}'.format(offset + len(rows), args.posts))
+    cursor.execute('ANALYZE social.post')
+    raw.commit()
+  finally:
+    raw.close()
+
+
+def percentiles(samples: list[float]) -> str:
+  samples = sorted(samples)
+  pick = lambda p: samples[min(len(samples) - 1, int(len(samples) * p))] * 1000
+  return 'p50={:.1f}ms p95={:.1f}ms p99={:.1f}ms max={:.1f}ms'.format(
+    statistics.median(samples) * 1000, pick(0.95), pick(0.99), samples[-1] * 1000)
+
+
+def measure(name: str, queries: list[str], run):
+  samples = []
+  for q in queries:
+    begin = time.perf_counter()
+    run(q)
+    samples.append(time.perf_counter() - begin)
+  print('{:<8} {}'.format(name, percentiles(samples)))
+
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--board', required=True)
+  parser.add_argument('--school', required=True)
+  parser.add_argument('--author', required=True)
+  parser.add_argument('--posts', type=int, default=1000000)
+  parser.add_argument('--queries', type=int, default=200)
+  parser.add_argument('--skip-seed', action='store_true')
+  parser.add_argument('--skip-scan', action='store_true')
+  args = parser.parse_args()
+
+  rng = random.Random(20240101)
+  if not args.skip_seed:
+    seed(args, rng)
+
+  queries = [random_word(rng) for _ in range(args.queries)]
+  with SessionLocal() as db:
+    total = db.execute(select(func.count()).select_from(Post)).scalar()
+    print('corpus={} queries={}'.format(total, len(queries)))
+
+    def fts(q):
+      query = search_service._query_of(q)
+      db.execute(
+        select(Post.post_id)
+        .where(Post.search_vector.op('@@')(query), Post.board_id == args.board)
+        .order_by(func.ts_rank_cd(Post.search_vector, query).desc(), Post.write_time.desc())
+        .limit(20)
+      ).all()
+
+    def scan(q):
+      pattern = '%{}%'.format(q)
+      db.execute(
+        select(Post.post_id)
+        .where((Post.title.ilike(pattern)) | (Post.content.ilike(pattern)), Post.board_id == args.board)
+        .order_by(Post.write_time.desc())
+        .limit(20)
+      ).all()
+
+    measure('fts', queries, fts)
+    if not args.skip_scan:
+      # the sequential scan is slow on a 1M corpus, so it only runs a tenth of the queries
+      measure('ilike', queries[:max(1, len(queries) // 10)], scan)
+
+
+if __name__ == '__main__':
+  main()
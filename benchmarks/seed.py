@@ -0,0 +1,192 @@
+# Seeds synthetic schools, users, boards, posts, comments and votes, and writes a manifest of ids for the load generator.
+# Run from the repository root against a disposable database that already has the application schema:
+#   BLINK_CONFIG=config_bench.yml python -m benchmarks.seed --users 2000 --posts 50000 --manifest bench_manifest.json
+import argparse
+import json
+import random
+import uuid
+from datetime import datetime, timedelta
+
+from psycopg2.extras import execute_values, register_uuid
+
+from benchmarks.search_fts import random_text
+from core.social import board_registry, ranking_service, search_service
+from database.database import SessionLocal, engine
+from models.database_models.relational.social.board_acl import BoardACLAction
+
+SEED_BATCH = 5000
+# how many ids of each kind end up in the manifest. the load generator samples from these
+MANIFEST_SAMPLE = 5000
+
+
+def batched(rows, size=SEED_BATCH):
+  for offset in range(0, len(rows), size):
+    yield rows[offset:offset + size]
+
+
+def insert(cursor, sql: str, rows: list[tuple], template: str = None):
+  for batch in batched(rows):
+    execute_values(cursor, sql, batch, template=template, page_size=len(batch))
+
+
+def seed_schools(cursor, args, rng: random.Random) -> list[tuple[uuid.UUID, str]]:
+  schools = []
+  rows = []
+  for i in range(args.schools):
+    school_id = uuid.UUID(int=rng.getrandbits(128), version=4)
+    neis_code = 'B10{:07d}'.format(rng.randrange(10 ** 7))
+    schools.append((school_id, neis_code))
+    # every fifth school is a middle school so both timetable APIs are exercised
+    rows.append((school_id, '벤치{}고등학교'.format(i), 4 if i % 5 == 4 else 0, neis_code,
+                 '서울특별시 벤치구 {}'.format(i), 2, 'https://example.com/{}'.format(i)))
+
+  insert(cursor,
+         'INSERT INTO school.schools (school_id, school_name, school_type, neis_code, address, sex, homepage) VALUES %s',
+         rows)
+  return schools
+
+
+def seed_users(cursor, args, rng: random.Random, schools) -> list[dict]:
+  users = []
+  rows = []
+  now = datetime.now()
+  for i in range(args.users):
+    user_id = uuid.UUID(int=rng.getrandbits(128), version=4)
+    school_id, neis_code = rng.choice(schools)
+    roles = ['core:user', 'core:student', 'sv:{}'.format(neis_code)]
+    users.append({'userId': str(user_id), 'schoolId': str(school_id), 'neisCode': neis_code, 'roles': roles})
+    rows.append((user_id, 'bench{}'.format(i), 'bench{}-{}@example.com'.format(i, user_id.hex[:8]), True,
+                 now - timedelta(days=rng.randrange(365)), roles, rng.randint(1, 3), rng.randint(1, 12),
+                 rng.randint(1, 30)))
+
+  insert(cursor,
+         'INSERT INTO users.identity '
+         '(user_id, username, email, email_verified, join_date, roles, grade, classroom, student_number) VALUES %s',
+         rows)
+  return users
+
+
+def seed_boards(cursor, args, rng: random.Random) -> list[uuid.UUID]:
+  boards = [uuid.UUID(int=rng.getrandbits(128), version=4) for _ in range(args.boards)]
+  insert(cursor, 'INSERT INTO social.board (board_id, name, tag) VALUES %s',
+         [(board_id, 'bench-board-{}'.format(i), ['bench']) for i, board_id in enumerate(boards)])
+
+  # students read and write, like the production boards. delete, update and manage stay with superusers
+  acls = []
+  for board_id in boards:
+    acls.append((board_id, BoardACLAction.READ.value, 'core:user', 1))
+    acls.append((board_id, BoardACLAction.WRITE.value, 'core:student', 1))
+    for action in (BoardACLAction.DELETE, BoardACLAction.UPDATE, BoardACLAction.MANAGE):
+      acls.append((board_id, action.value, 'root:superuser', 1))
+  insert(cursor, 'INSERT INTO social.board_acl (board_id, action_code, qualification, priority) VALUES %s', acls)
+  return boards
+
+
+def seed_social(cursor, args, rng: random.Random, users, boards) -> list[str]:
+  posts = []
+  post_rows = []
+  comment_rows = []
+  vote_rows = []
+  now = datetime.now()
+
+  for _ in range(args.posts):
+    post_id = uuid.UUID(int=rng.getrandbits(128), version=4)
+    author = rng.choice(users)
+    write_time = now - timedelta(seconds=rng.randrange(args.days * 86400))
+    title = random_text(rng, rng.randint(2, 8))
+    content = random_text(rng, rng.randint(20, 120))
+
+    comments = rng.randint(0, args.comments * 2)
+    for _ in range(comments):
+      commenter = rng.choice(users)
+      comment = random_text(rng, rng.randint(3, 30))
+      comment_rows.append((uuid.UUID(int=rng.getrandbits(128), version=4), commenter['userId'], commenter['schoolId'],
+                           post_id, write_time + timedelta(seconds=rng.randrange(86400)), comment,
+                           ' '.join(search_service.tokenize(comment))))
+
+    upvote = downvote = 0
+    for voter in rng.sample(users, min(len(users), rng.randint(0, args.votes * 2))):
+      vote = rng.random() < 0.8
+      upvote += vote
+      downvote += not vote
+      vote_rows.append((voter['userId'], post_id, vote))
+
+    posts.append(str(post_id))
+    post_rows.append((post_id, author['userId'], author['schoolId'], rng.choice(boards), write_time, title, content,
+                      upvote, downvote, rng.randint(0, 500), comments, write_time,
+                      ' '.join(search_service.tokenize(title)), ' '.join(search_service.tokenize(content))))
+
+  insert(cursor,
+         'INSERT INTO social.post (post_id, author_id, school_id, board_id, write_time, title, content, upvote, '
+         'downvote, views, comment_count, last_activity, search_vector) VALUES %s',
+         post_rows,
+         template="(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, "
+                  "setweight(to_tsvector('simple', %s), 'A') || setweight(to_tsvector('simple', %s), 'B'))")
+  print('seeded posts={}'.format(len(post_rows)))
+
+  insert(cursor,
+         'INSERT INTO social.comment (comment_id, author_id, school_id, post_id, write_time, content, search_vector) '
+         'VALUES %s',
+         comment_rows,
+         template="(%s, %s, %s, %s, %s, %s, to_tsvector('simple', %s))")
+  print('seeded comments={}'.format(len(comment_rows)))
+
+  insert(cursor, 'INSERT INTO social.votes (user_id, post_id, vote) VALUES %s', vote_rows)
+  print('seeded votes={}'.format(len(vote_rows)))
+
+  return posts
+
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--schools', type=int, default=20)
+  parser.add_argument('--users', type=int, default=2000)
+  parser.add_argument('--boards', type=int, default=10)
+  parser.add_argument('--posts', type=int, default=50000)
+  parser.add_argument('--comments', type=int, default=5, help='average comments per post')
+  parser.add_argument('--votes', type=int, default=10, help='average votes per post')
+  parser.add_argument('--days', type=int, default=30, help='posts are spread over this many days')
+  parser.add_argument('--seed', type=int, default=20240101)
+  parser.add_argument('--manifest', default='bench_manifest.json')
+  args = parser.parse_args()
+
+  rng = random.Random(args.seed)
+  register_uuid()
+
+  raw = engine.raw_connection()
+  try:
+    cursor = raw.cursor()
+    schools = seed_schools(cursor, args, rng)
+    users = seed_users(cursor, args, rng, schools)
+    boards = seed_boards(cursor, args, rng)
+    print('seeded schools={} users={} boards={}'.format(len(schools), len(users), len(boards)))
+    raw.commit()
+
+    posts = seed_social(cursor, args, rng, users, boards)
+    raw.commit()
+
+    for table in ('school.schools', 'users.identity', 'social.post', 'social.comment', 'social.votes'):
+      cursor.execute('ANALYZE {}'.format(table))
+    raw.commit()
+  finally:
+    raw.close()
+
+  # running servers pick up the new boards on their next version check, and hot listings need ranks
+  with SessionLocal() as db:
+    board_registry.notify_board_changed(db)
+    for board_id in boards:
+      ranking_service.rebuild_board_rank(board_id, db)
+
+  with open(args.manifest, 'w') as f:
+    json.dump({
+      'seed': args.seed,
+      'scale': {key: getattr(args, key) for key in ('schools', 'users', 'boards', 'posts', 'comments', 'votes')},
+      'boards': [str(board_id) for board_id in boards],
+      'users': rng.sample(users, min(len(users), MANIFEST_SAMPLE)),
+      'posts': rng.sample(posts, min(len(posts), MANIFEST_SAMPLE)),
+    }, f, ensure_ascii=False, indent=2)
+  print('manifest written to {}'.format(args.manifest))
+
+
+if __name__ == '__main__':
+  main()
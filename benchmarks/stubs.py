@@ -0,0 +1,158 @@
+# Local stand-ins for the NEIS open API and the Google userinfo endpoint, so benchmarks never leave the machine.
+# Responses have the same shape as the real APIs for the fields the services read.
+#   python -m benchmarks.stubs --port 18080 --latency 0.05
+import argparse
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+NEIS_PATHS = {
+  'school_info': '/neis/schoolInfo',
+  'meal_info': '/neis/mealServiceDietInfo',
+  'high_school_timetable_info': '/neis/hisTimetable',
+  'middle_school_timetable_info': '/neis/misTimetable',
+}
+USERINFO_PATH = '/google/userinfo'
+
+
+def neis_envelope(field: str, rows: list[dict]) -> dict:
+  return {
+    field: [
+      {'head': [{'list_total_count': len(rows)}, {'RESULT': {'CODE': 'INFO-000', 'MESSAGE': '정상 처리되었습니다.'}}]},
+      {'row': rows}
+    ]
+  }
+
+
+def school_info(params: dict) -> dict:
+  name = params.get('SCHUL_NM', '벤치고등학교')
+  return neis_envelope('schoolInfo', [
+    {
+      'SCHUL_NM': '{}{}'.format(name, i),
+      'SCHUL_KND_SC_NM': '고등학교',
+      'HS_SC_NM': '일반고',
+      'ATPT_OFCDC_SC_CODE': 'B10',
+      'SD_SCHUL_CODE': '{:07d}'.format(i),
+      'ORG_RDNMA': '서울특별시 벤치구 {}'.format(i),
+      'COEDU_SC_NM': '남여공학',
+    }
+    for i in range(5)
+  ])
+
+
+def meal_info(params: dict) -> dict:
+  return neis_envelope('mealServiceDietInfo', [
+    {
+      'ATPT_OFCDC_SC_CODE': params.get('ATPT_OFCDC_SC_CODE', ''),
+      'SD_SCHUL_CODE': params.get('SD_SCHUL_CODE', ''),
+      'MMEAL_SC_CODE': str(code),
+      'DDISH_NM': '<br/>'.join(['쌀밥', '된장국 (5.6.13)', '제육볶음 (5.6.10.13)', '배추김치 (9)']),
+      'NTR_INFO': '<br/>'.join(['탄수화물(g) : 120.1', '단백질(g) : 35.2', '지방(g) : 20.3']),
+      'CAL_INFO': '812.4 Kcal',
+    }
+    for code in (1, 2, 3)
+  ])
+
+
+def timetable(field: str, params: dict) -> dict:
+  begin = datetime.strptime(params.get('TI_FROM_YMD', datetime.today().strftime('%Y%m%d')), '%Y%m%d')
+  return neis_envelope(field, [
+    {
+      'AY': str(begin.year),
+      'SEM': '1',
+      'GRADE': params.get('GRADE', '1'),
+      'CLASS_NM': params.get('CLASS_NM', '1'),
+      'ALL_TI_YMD': (begin + timedelta(days=day)).strftime('%Y%m%d'),
+      'PERIO': str(period),
+      'ITRT_CNTNT': '과목{}'.format((day * 7 + period) % 11),
+      'CLRM_NM': '{}-{}'.format(params.get('GRADE', '1'), params.get('CLASS_NM', '1')),
+    }
+    for day in range(5)
+    for period in range(1, 8)
+  ])
+
+
+def userinfo(params: dict) -> dict:
+  token = params.get('access_token', 'bench')
+  return {
+    'sub': 'bench-{}'.format(token),
+    'name': 'bench user',
+    'email': 'bench-{}@example.com'.format(token),
+    'email_verified': True,
+    'picture': 'https://example.com/{}.png'.format(token),
+  }
+
+
+ROUTES = {
+  NEIS_PATHS['school_info']: school_info,
+  NEIS_PATHS['meal_info']: meal_info,
+  NEIS_PATHS['high_school_timetable_info']: lambda params: timetable('hisTimetable', params),
+  NEIS_PATHS['middle_school_timetable_info']: lambda params: timetable('misTimetable', params),
+  USERINFO_PATH: userinfo,
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+  # set on the subclass built by start(). simulated network latency in seconds
+  latency = 0.0
+  protocol_version = 'HTTP/1.1'
+
+  def do_GET(self):
+    url = urlsplit(self.path)
+    route = ROUTES.get(url.path)
+    if route is None:
+      self.send_error(404)
+      return
+
+    if self.latency:
+      time.sleep(self.latency)
+
+    params = {key: values[0] for key, values in parse_qs(url.query).items()}
+    body = json.dumps(route(params), ensure_ascii=False).encode()
+    self.send_response(200)
+    self.send_header('Content-Type', 'application/json; charset=utf-8')
+    self.send_header('Content-Length', str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+
+  def log_message(self, format, *args):
+    pass
+
+
+def start(host: str = '127.0.0.1', port: int = 0, latency: float = 0.0) -> ThreadingHTTPServer:
+  handler = type('StubHandler', (StubHandler,), {'latency': latency})
+  server = ThreadingHTTPServer((host, port), handler)
+  server.daemon_threads = True
+  threading.Thread(target=server.serve_forever, name='benchmark-stubs', daemon=True).start()
+  return server
+
+
+def config_overrides(server: ThreadingHTTPServer) -> dict:
+  # merged into the app config so the services call the stubs instead of NEIS and Google
+  base = 'http://{}:{}'.format(*server.server_address[:2])
+  return {
+    'api': {'neis': {name: base + path for name, path in NEIS_PATHS.items()}},
+    'auth': {'google': {'userinfo_url': base + USERINFO_PATH}},
+  }
+
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--host', default='127.0.0.1')
+  parser.add_argument('--port', type=int, default=18080)
+  parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+  args = parser.parse_args()
+
+  server = start(args.host, args.port, args.latency)
+  print(json.dumps(config_overrides(server), indent=2))
+  try:
+    threading.Event().wait()
+  except KeyboardInterrupt:
+    server.shutdown()
+
+
+if __name__ == '__main__':
+  main()
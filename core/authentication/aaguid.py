@@ -1,25 +1,39 @@
+import hashlib
 import json
 import logging
+from uuid import UUID
 
 from pydantic.dataclasses import dataclass
 
-from database.database import redis_aaguid_db
+from database.database import async_redis_aaguid_db, redis_aaguid_db
 
 log = logging.getLogger(__name__)
 
+AAGUID_FILE = "resources/combined_aaguid.json"
+# hash of the loaded file, next to the aaguids. lookups only accept uuids, so it is never served as one
+VERSION_KEY = "aaguid:version"
+
 
 def load_aaguid():
-  log.debug("Flushing aaguid list from redis")
-  redis_aaguid_db.flushall()
+  with open(AAGUID_FILE, "rb") as f:
+    raw = f.read()
 
-  log.debug("Loading aaguid list to redis")
-  with open("resources/combined_aaguid.json", "r") as f:
-    aaguid_json: dict = json.load(f)
+  # every worker runs this on start. skip the reload when another worker already loaded the same file
+  version = hashlib.sha256(raw).hexdigest()
+  if redis_aaguid_db.get(VERSION_KEY) == version:
+    log.debug("aaguid list is up to date. version=\"{}\"".format(version[:12]))
+    return
 
-  keys = aaguid_json.keys()
+  log.debug("Loading aaguid list to redis")
+  aaguid_json: dict = json.loads(raw)
 
-  for key in keys:
-    redis_aaguid_db.set(key, json.dumps(aaguid_json[key]))
+  # flushdb, not flushall: the other redis databases hold challenges, ranks and caches
+  pipe = redis_aaguid_db.pipeline(transaction=True)
+  pipe.flushdb()
+  pipe.mset({key: json.dumps(value) for key, value in aaguid_json.items()})
+  pipe.set(VERSION_KEY, version)
+  pipe.execute()
+  log.debug("aaguid list loaded. count=\"{}\", version=\"{}\"".format(len(aaguid_json), version[:12]))
 
 
 @dataclass
@@ -29,14 +43,39 @@ class Authenticator:
   icon_dark: str
 
 
-def get_authenticator(aaguid: str) -> Authenticator:
-  aaguid_json = redis_aaguid_db.get(aaguid)
-  if aaguid_json is None:
-    return None
-
+def _authenticator(aaguid_json: str) -> Authenticator:
   aaguid_dict = json.loads(aaguid_json)
   return Authenticator(
     name=aaguid_dict['name'],
     icon_light=aaguid_dict['icon_light'],
     icon_dark=aaguid_dict['icon_dark'],
   )
+
+
+def _is_aaguid(aaguid: str) -> bool:
+  # the aaguid comes from the request path, anything but a uuid would read other keys of this db
+  try:
+    UUID(aaguid)
+  except ValueError:
+    return False
+  return True
+
+
+def get_authenticator(aaguid: str) -> Authenticator:
+  if not _is_aaguid(aaguid):
+    return None
+
+  aaguid_json = redis_aaguid_db.get(aaguid)
+  if aaguid_json is None:
+    return None
+  return _authenticator(aaguid_json)
+
+
+async def get_authenticator_async(aaguid: str) -> Authenticator:
+  if not _is_aaguid(aaguid):
+    return None
+
+  aaguid_json = await async_redis_aaguid_db.get(aaguid)
+  if aaguid_json is None:
+    return None
+  return _authenticator(aaguid_json)
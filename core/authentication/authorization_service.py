@@ -1,10 +1,15 @@
 import logging
+from dataclasses import dataclass
+from typing import Optional
+from uuid import UUID
 
-from fastapi import HTTPException
+from fastapi import HTTPException, Request, Security
 from fastapi.security import APIKeyHeader
 from jwt import InvalidTokenError
 
+from core import metrics
 from core.jwt import jwt_service
+from core.user.user_info_service import role_to_school
 
 log = logging.getLogger(__name__)
 
@@ -43,3 +48,48 @@ def authorize_jwt(token: str) -> dict:
 
   log.debug("Authorized JWT token. sub=\"{}\"".format(jwt_body.get("sub")))
   return jwt_body
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+  sub: UUID
+  # frozenset so the many "role in aud" checks are O(1). services that take aud accept it as is
+  aud: frozenset[str]
+  student_verified: bool
+  neis_code: Optional[str]
+  superuser: bool
+
+
+def principal_of(jwt_body: dict) -> Principal:
+  sub = jwt_service.get_sub(jwt_body)
+  if sub is None:
+    log.debug("Auth failed: JWT has no subject")
+    raise HTTPException(status_code=401, detail="JWT is invalid or unauthorized")
+
+  roles = jwt_service.get_aud(jwt_body)
+  student_verified, neis_code = role_to_school(roles)
+  aud = frozenset(roles)
+
+  return Principal(
+    sub=sub,
+    aud=aud,
+    student_verified=student_verified,
+    neis_code=neis_code,
+    superuser='root:superuser' in aud
+  )
+
+
+def get_principal(
+  request: Request,
+  token: str = Security(authorization_header)
+) -> Principal:
+  # decoded once per request, also when dependencies and middleware ask for it separately
+  principal = getattr(request.state, 'principal', None)
+  if principal is not None:
+    metrics.cache_hit('jwt')
+    return principal
+
+  metrics.cache_miss('jwt')
+  principal = principal_of(authorize_jwt(token))
+  request.state.principal = principal
+  return principal
@@ -4,30 +4,48 @@ import logging
 import os
 import uuid
 from datetime import datetime
-from typing import Type
+from typing import Optional, Type
 from uuid import UUID as PyUUID
 
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
-from webauthn import generate_registration_options, generate_authentication_options, options_to_json, \
-  verify_registration_response, verify_authentication_response
-from webauthn.helpers.structs import UserVerificationRequirement
 
 from core.authentication.aaguid import get_authenticator
 from core.config import config
 from core.jwt import jwt_service
-from database.database import redis_db
+from database.database import async_redis_db, redis_db
 from models.database_models.relational.identity import Identity
 from models.database_models.relational.passkey_auth import PasskeyAuth
 from models.request_models.passkey_request import RegisterPasskeyRequest, SignInPasskeyRequest
 
 log = logging.getLogger(__name__)
 
+# webauthn (and the cryptography and cbor stack under it) is imported by the first passkey request
+# instead of on every worker start
+
+# abandoned ceremonies expire with their challenge instead of staying in redis
+CHALLENGE_TTL = config['security']['webauthn'].get('challenge_ttl', 300)
+
+
+def _encode_challenge(challenge: bytes) -> str:
+  return base64.encodebytes(challenge).decode('ascii')
+
+
+def _take_challenge(key: str) -> Optional[bytes]:
+  # GETDEL, so a challenge is answered once even when two requests race for it
+  challenge_b64 = redis_db.getdel(key)
+  if challenge_b64 is None:
+    return None
+  return base64.decodebytes(challenge_b64.encode('ascii'))
+
+
+async def begin_authentication() -> (str, dict):
+  from webauthn import generate_authentication_options, options_to_json
+  from webauthn.helpers.structs import UserVerificationRequirement
 
-def begin_authentication() -> (str, dict):
   challenge = os.urandom(32)
   authentication_id = str(uuid.uuid4())
-  if redis_db.exists(authentication_id):
+  if not await async_redis_db.set(authentication_id, _encode_challenge(challenge), nx=True, ex=CHALLENGE_TTL):
     log.warning("Authentication ID duplicated")
     raise HTTPException(status_code=400, detail="Registration ID already exists")
 
@@ -39,7 +57,6 @@ def begin_authentication() -> (str, dict):
   )
 
   log.debug("Generated passkey auth option. redis_pk=\"{}\"".format(authentication_id))
-  redis_db.set(authentication_id, base64.encodebytes(challenge).decode('ascii'))
 
   return (
     authentication_id,
@@ -48,9 +65,11 @@ def begin_authentication() -> (str, dict):
 
 
 def begin_registration(identity: Type[Identity]) -> (str, dict):
+  from webauthn import generate_registration_options, options_to_json
+
   challenge = os.urandom(32)
   registration_id = str(uuid.uuid4())
-  if redis_db.exists(registration_id):
+  if not redis_db.set(registration_id, _encode_challenge(challenge), nx=True, ex=CHALLENGE_TTL):
     log.warning("Registration ID duplicated. user_uid=\"{}\"".format(identity.user_id))
     raise HTTPException(status_code=400, detail="Registration ID already exists")
 
@@ -65,7 +84,6 @@ def begin_registration(identity: Type[Identity]) -> (str, dict):
   )
 
   log.debug("Generated passkey register option. redis_pk=\"{}\"".format(registration_id))
-  redis_db.set(registration_id, base64.encodebytes(challenge).decode('ascii'))
 
   return (
     registration_id,
@@ -74,21 +92,19 @@ def begin_registration(identity: Type[Identity]) -> (str, dict):
 
 
 def add_passkey(user_id: int, request: RegisterPasskeyRequest, register_option: str, db: Session):
+  from webauthn import verify_registration_response
+
   identity = db.query(Identity).filter(Identity.user_id == user_id).first()
 
   if identity is None:
     log.debug("Identity not found. user_uid=\"{}\"".format(user_id))
     raise HTTPException(status_code=404, detail="Identity not found")
 
-  challenge_b64 = redis_db.get(register_option)
-  redis_db.delete(register_option)
-
-  if challenge_b64 is None:
+  challenge = _take_challenge(register_option)
+  if challenge is None:
     log.debug("Register option not found. user_uid=\"{}\"".format(identity.user_id))
     raise HTTPException(status_code=400, detail="Register option not found")
 
-  challenge = base64.decodebytes(challenge_b64.encode('ascii'))
-
   log.debug("Verifying registration. user_uid=\"{}\"".format(identity.user_id))
   registration = verify_registration_response(
     credential=request.attestation,
@@ -122,6 +138,8 @@ def add_passkey(user_id: int, request: RegisterPasskeyRequest, register_option:
 
 
 def auth_passkey(body: SignInPasskeyRequest, PSK_AUTH_SEK: str, db: Session) -> str:
+  from webauthn import verify_authentication_response
+
   response = body.attestation.get("response", {})
   if response is None:
     log.debug("Response not found in request body")
@@ -142,14 +160,10 @@ def auth_passkey(body: SignInPasskeyRequest, PSK_AUTH_SEK: str, db: Session) ->
     raise HTTPException(status_code=400, detail="Identity not found")
   log.debug("Found passkey principle. user_uid=\"{}\"".format(identity.user_id))
 
-  challenge_b64 = redis_db.get(PSK_AUTH_SEK)
-  redis_db.delete(PSK_AUTH_SEK)
-
-  if challenge_b64 is None:
+  challenge = _take_challenge(PSK_AUTH_SEK)
+  if challenge is None:
     log.debug("Authentication option not found")
     raise HTTPException(status_code=400, detail="Authentication option not found")
-
-  challenge = base64.decodebytes(challenge_b64.encode('ascii'))
   log.debug("Challenge was loaded from redis. redis_pk=\"{}\"".format(PSK_AUTH_SEK))
 
   log.debug("Verifying authentication")
@@ -0,0 +1,31 @@
+import logging
+from typing import Optional
+
+from redis import RedisError
+
+from database.database import redis_db
+
+log = logging.getLogger(__name__)
+
+
+# per-worker caches keep their entries under a version read from redis. a writer bumps the version and every
+# worker stops serving what it cached before, without knowing which entries those were.
+# the version outlives the entries cached under the previous one, so an expired key cannot bring them back
+
+def current(key: str) -> Optional[str]:
+  # None when redis cannot be read. callers bypass their cache then
+  try:
+    return redis_db.get(key) or '0'
+  except RedisError as e:
+    log.warning('Failed to read cache version. bypass the cache. key=\"{}\", error=\"{}\"'.format(key, e))
+    return None
+
+
+def bump(key: str, ttl: float):
+  try:
+    pipe = redis_db.pipeline(transaction=True)
+    pipe.incr(key)
+    pipe.expire(key, int(ttl * 2) + 1)
+    pipe.execute()
+  except RedisError as e:
+    log.warning('Failed to bump cache version. key=\"{}\", error=\"{}\"'.format(key, e))
@@ -1,7 +1,10 @@
+import os
+
 import yaml
 
 config = dict()
 
-with open("config_dev.yml", "r") as f:
+# BLINK_CONFIG lets benchmarks and other tooling point the app at a different config file
+with open(os.environ.get('BLINK_CONFIG', 'config_dev.yml'), "r") as f:
   config.update(yaml.load(f, Loader=yaml.FullLoader))
   ENV = config['env']
@@ -2,12 +2,13 @@ import base64
 from secrets import token_bytes
 from typing import Optional
 
-from Cryptodome.Cipher import AES
-
 key = token_bytes(32)
 
 
 def encrypt(plain_text: str) -> str:
+  # imported on first use, only the google sign in flow encrypts
+  from Cryptodome.Cipher import AES
+
   cipher = AES.new(key, AES.MODE_EAX)
   nonce = cipher.nonce
   ciphertext, tag = cipher.encrypt_and_digest(bytes(plain_text, 'utf-8'))
@@ -20,6 +21,8 @@ def encrypt(plain_text: str) -> str:
 
 
 def decrypt(encrypted: str) -> Optional[str]:
+  from Cryptodome.Cipher import AES
+
   [s_nonce, s_ciphertext, s_tag] = encrypted.split('!')
 
   nonce = base64.b64decode(s_nonce)
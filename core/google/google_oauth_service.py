@@ -1,30 +1,23 @@
 import logging
 from datetime import datetime
 
-import requests
 from fastapi import HTTPException
-from google_auth_oauthlib.flow import Flow
 
+from core import tracing
 from core.config import config
 from core.jwt import jwt_service
+from core.resources import resources
 from models.database_models.relational.identity import Identity
 from models.user import GoogleUser
 
 log = logging.getLogger(__name__)
 
-flow = Flow.from_client_secrets_file(
-  client_secrets_file=config['auth']['google']['client_secret_file'],
-  scopes=[
-    'https://www.googleapis.com/auth/userinfo.email',
-    'https://www.googleapis.com/auth/userinfo.profile',
-    'openid'
-  ]
-)
-flow.redirect_uri = config['auth']['google']['redirect_uri']
+session = tracing.TracedSession()
+USERINFO_URL = config['auth']['google'].get('userinfo_url', 'https://www.googleapis.com/oauth2/v3/userinfo')
 
 
 def start_authentication():
-  authorization_url, state = flow.authorization_url(
+  authorization_url, state = resources.oauth_flow().authorization_url(
     access_type='offline',
     include_granted_scopes='true'
   )
@@ -33,11 +26,12 @@ def start_authentication():
 
 
 def get_access_token(code: str) -> str:
-  return flow.fetch_token(code=code)['access_token']
+  with tracing.span('google oauth token', client=True):
+    return resources.oauth_flow().fetch_token(code=code)['access_token']
 
 
 def get_google_user(access_token: str) -> GoogleUser:
-  response = requests.get("https://www.googleapis.com/oauth2/v3/userinfo", params={"access_token": access_token})
+  response = session.get(USERINFO_URL, params={"access_token": access_token})
   if response.status_code != 200:
     log.error(
       "Failed to get user profile from Google. status_code={status_code}".format(status_code=response.status_code))
@@ -45,7 +39,7 @@ def get_google_user(access_token: str) -> GoogleUser:
 
   profile = response.json()
 
-  log.debug("Got user profile from Google. profile=\"{profile}\"".format(profile=profile))
+  log.debug("Got user profile from Google. id=\"{id}\"".format(id=profile.get('sub')))
   google_user = GoogleUser(
     username=profile['name'],
     email=profile['email'],
@@ -58,7 +52,7 @@ def get_google_user(access_token: str) -> GoogleUser:
 
 
 def get_google_sub(access_token: str) -> str:
-  response = requests.get("https://www.googleapis.com/oauth2/v3/userinfo", params={"access_token": access_token})
+  response = session.get(USERINFO_URL, params={"access_token": access_token})
   if response.status_code != 200:
     log.error(
       "Failed to get user profile from Google. status_code={status_code}".format(status_code=response.status_code))
@@ -1,41 +1,142 @@
+import hashlib
 import logging
+from typing import Optional
 
-from google.cloud import recaptchaenterprise_v1
-from google.cloud.recaptchaenterprise_v1 import Assessment, Event, CreateAssessmentRequest
+from fastapi import HTTPException
 
+from core import tracing
 from core.config import config
+from core.resources import resources
+from database.database import async_redis_db, redis_db
 
 parent = "projects/blink-hs"
 location = "us-central1"
 
 log = logging.getLogger(__name__)
 
+RECAPTCHA_CONFIG = config['security']['recaptcha']
+MIN_SCORE = 0.6
+DEADLINE = RECAPTCHA_CONFIG.get('deadline', 3)
+# tokens expire two minutes after they are issued, the claim on an assessed token and its verdict outlive them
+CLAIM_TTL = RECAPTCHA_CONFIG.get('claim_ttl', 300)
+# the action the token was first assessed for
+CLAIM_KEY = 'recaptcha:{}'
+# passed or failed, answered to a retry of the same token and action
+VERDICT_KEY = 'recaptcha:{}:{}'
+
+
+# tokens are single use, google reports a token assessed twice as invalid. the first request claims the token
+# and assesses it. a later one, a retry or a replay on another worker, gets the cached verdict when it is for
+# the same action, and is rejected for any other action or while the first assessment is still running
+
+def _claim(token_hash: str, action: str) -> Optional[bool]:
+  # None when this request owns the token and has to assess it, otherwise the answer
+  if redis_db.set(CLAIM_KEY.format(token_hash), action, nx=True, ex=CLAIM_TTL):
+    return None
+  claimed_action, verdict = redis_db.mget(CLAIM_KEY.format(token_hash), VERDICT_KEY.format(token_hash, action))
+  return _repeated(token_hash, action, claimed_action, verdict)
+
+
+async def _claim_async(token_hash: str, action: str) -> Optional[bool]:
+  if await async_redis_db.set(CLAIM_KEY.format(token_hash), action, nx=True, ex=CLAIM_TTL):
+    return None
+  claimed_action, verdict = await async_redis_db.mget(CLAIM_KEY.format(token_hash),
+                                                      VERDICT_KEY.format(token_hash, action))
+  return _repeated(token_hash, action, claimed_action, verdict)
+
+
+def _repeated(token_hash: str, action: str, claimed_action: Optional[str], verdict: Optional[str]) -> bool:
+  if claimed_action != action:
+    log.debug("reCAPTCHA token was assessed for another action. token=\"{}\", action=\"{}\", claimed=\"{}\"".format(
+      token_hash[:12], action, claimed_action))
+    return False
+  if verdict is None:
+    log.debug("reCAPTCHA token is still being assessed. token=\"{}\", action=\"{}\"".format(token_hash[:12], action))
+    return False
+
+  log.debug("reCAPTCHA verdict was cached. token=\"{}\", action=\"{}\", verdict=\"{}\"".format(
+    token_hash[:12], action, verdict))
+  return verdict == 'passed'
 
-def verify_recaptcha(token: str, client_ip: str, action: str) -> bool:
-  client = recaptchaenterprise_v1.RecaptchaEnterpriseServiceClient()
 
-  log.debug("Assessing reCAPTCHA. token=\"{}\", client_ip=\"{}\", action=\"{}\"".format(token, client_ip, action))
+def _build_request(token: str, client_ip: str, action: str):
+  # the gRPC client library is heavy to import and only the few write paths need it
+  from google.cloud.recaptchaenterprise_v1 import Assessment, Event, CreateAssessmentRequest
+
   assessment = Assessment(
     event=Event(
       token=token,
-      site_key=config['security']['recaptcha']['site_key'],
+      site_key=RECAPTCHA_CONFIG['site_key'],
       user_ip_address=client_ip,
       expected_action=action
     )
   )
 
-  request = CreateAssessmentRequest(
+  return CreateAssessmentRequest(
     assessment=assessment,
     parent=parent,
   )
 
-  response = client.create_assessment(request)
-  log.debug("reCAPTCHA assessment completed. token=\"{token}\"".format(token=token))
 
-  if response.token_properties.valid and response.risk_analysis.score >= 0.6:
-    log.debug("reCAPTCHA passed. token=\"{}\"".format(token))
+def _unavailable(token_hash: str, action: str, error: Exception) -> HTTPException:
+  log.warning("reCAPTCHA assessment failed. token=\"{}\", action=\"{}\", error=\"{}\"".format(
+    token_hash[:12], action, type(error).__name__))
+  return HTTPException(status_code=503, detail="reCAPTCHA is unavailable")
+
+
+def _verdict(token_hash: str, response) -> bool:
+  if response.token_properties.valid and response.risk_analysis.score >= MIN_SCORE:
+    log.debug("reCAPTCHA passed. token=\"{}\"".format(token_hash[:12]))
     return True
-  else:
-    log.debug("reCAPTCHA was not passed(score). token=\"{token}\", score=\"{score}\"".format(token=token,
-                                                                                             score=response.risk_analysis.score))
-    return False
+
+  log.debug("reCAPTCHA was not passed(score). token=\"{}\", score=\"{}\"".format(token_hash[:12],
+                                                                                 response.risk_analysis.score))
+  return False
+
+
+def verify_recaptcha(token: str, client_ip: str, action: str) -> bool:
+  from google.api_core.exceptions import GoogleAPICallError, RetryError
+
+  # the token itself is a credential, only its digest is stored and logged
+  token_hash = hashlib.sha256(token.encode()).hexdigest()
+  answer = _claim(token_hash, action)
+  if answer is not None:
+    return answer
+
+  log.debug("Assessing reCAPTCHA. token=\"{}\", client_ip=\"{}\", action=\"{}\"".format(token_hash[:12], client_ip,
+                                                                                        action))
+  request = _build_request(token, client_ip, action)
+  try:
+    with tracing.span('recaptcha create_assessment', {'recaptcha.action': action}, client=True):
+      response = resources.recaptcha().create_assessment(request, timeout=DEADLINE)
+  except (GoogleAPICallError, RetryError) as e:
+    # google may not have seen the token, so the claim is released and the client can try again
+    redis_db.delete(CLAIM_KEY.format(token_hash))
+    raise _unavailable(token_hash, action, e)
+
+  passed = _verdict(token_hash, response)
+  redis_db.set(VERDICT_KEY.format(token_hash, action), 'passed' if passed else 'failed', ex=CLAIM_TTL)
+  return passed
+
+
+async def verify_recaptcha_async(token: str, client_ip: str, action: str) -> bool:
+  from google.api_core.exceptions import GoogleAPICallError, RetryError
+
+  token_hash = hashlib.sha256(token.encode()).hexdigest()
+  answer = await _claim_async(token_hash, action)
+  if answer is not None:
+    return answer
+
+  log.debug("Assessing reCAPTCHA. token=\"{}\", client_ip=\"{}\", action=\"{}\"".format(token_hash[:12], client_ip,
+                                                                                        action))
+  request = _build_request(token, client_ip, action)
+  try:
+    with tracing.span('recaptcha create_assessment', {'recaptcha.action': action}, client=True):
+      response = await resources.recaptcha_async().create_assessment(request, timeout=DEADLINE)
+  except (GoogleAPICallError, RetryError) as e:
+    await async_redis_db.delete(CLAIM_KEY.format(token_hash))
+    raise _unavailable(token_hash, action, e)
+
+  passed = _verdict(token_hash, response)
+  await async_redis_db.set(VERDICT_KEY.format(token_hash, action), 'passed' if passed else 'failed', ex=CLAIM_TTL)
+  return passed
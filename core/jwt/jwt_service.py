@@ -9,6 +9,7 @@ from jwt import InvalidTokenError
 from core.config import config
 
 KST = timezone(timedelta(hours=9))
+UUID_PATTERN = re.compile('^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$')
 
 
 def create_token(user_id: int, role: list[str]) -> str:
@@ -77,7 +78,7 @@ def get_sub(token: dict) -> Optional[UUID]:
   sub = token.get('sub')
   if sub is None:
     return None
-  if not re.match('^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$', sub):
+  if not UUID_PATTERN.match(sub):
     raise ValueError('Invalid sub as UUID')
   return UUID(sub)
 
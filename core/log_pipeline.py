@@ -0,0 +1,115 @@
+import atexit
+import copy
+import json
+import logging
+import queue
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueListener
+
+_traceback_formatter = logging.Formatter()
+
+# notified of every dropped record. the metrics module counts them without the handlers depending on it
+_drop_listeners = []
+
+RESERVED_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JSONFormatter(logging.Formatter):
+  # one object per line. extra={} fields passed to a log call are kept as top level keys
+  def format(self, record: logging.LogRecord) -> str:
+    entry = {
+      'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+      'level': record.levelname,
+      'logger': record.name,
+      'message': record.getMessage(),
+      'thread': record.threadName,
+    }
+
+    for key, value in record.__dict__.items():
+      if key not in RESERVED_ATTRS and not key.startswith('_'):
+        entry[key] = value
+
+    if record.exc_info:
+      entry['exception'] = self.formatException(record.exc_info)
+    elif record.exc_text:
+      entry['exception'] = record.exc_text
+    if record.stack_info:
+      entry['stack'] = self.formatStack(record.stack_info)
+
+    return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class QueueListenerHandler(logging.Handler):
+  # request threads only put records on a bounded queue. a single listener thread formats them
+  # and does the console and file i/o. when the queue is full records are dropped instead of blocking
+  # the caller, and the number of dropped records is reported once the queue drains.
+  # not a QueueHandler on purpose: from python 3.12 dictConfig builds QueueHandler subclasses itself
+  # and would read the handlers key as its own queue and listener settings
+  def __init__(self, handlers, maxsize: int = 10000):
+    super().__init__()
+    self.queue = queue.Queue(maxsize=maxsize)
+
+    self._dropped = 0
+    self._reported = 0
+    self._dropped_lock = threading.Lock()
+
+    self.listener = QueueListener(self.queue, *_resolve(handlers), respect_handler_level=True)
+    self.listener.start()
+    atexit.register(self.listener.stop)
+
+  def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+    # resolve args and the traceback on the calling thread (they may not be safe to keep around),
+    # but leave the formatting to the handlers behind the listener
+    record = copy.copy(record)
+    record.msg = record.getMessage()
+    record.args = None
+    if record.exc_info:
+      record.exc_text = _traceback_formatter.formatException(record.exc_info)
+      record.exc_info = None
+    return record
+
+  def emit(self, record: logging.LogRecord):
+    try:
+      self.enqueue(self.prepare(record))
+    except Exception:
+      self.handleError(record)
+
+  @property
+  def dropped(self) -> int:
+    return self._dropped
+
+  def enqueue(self, record: logging.LogRecord):
+    try:
+      self.queue.put_nowait(record)
+    except queue.Full:
+      with self._dropped_lock:
+        self._dropped += 1
+      for listener in _drop_listeners:
+        listener(1)
+      return
+
+    if self._reported != self._dropped:
+      self._report_dropped()
+
+  def _report_dropped(self):
+    with self._dropped_lock:
+      count = self._dropped - self._reported
+      self._reported = self._dropped
+
+    record = logging.LogRecord(__name__, logging.WARNING, __file__, 0,
+                               'Log queue was full. dropped=\"%d\", total=\"%d\"', (count, self._dropped), None)
+    try:
+      self.queue.put_nowait(record)
+    except queue.Full:
+      pass
+
+
+def _resolve(handlers) -> list[logging.Handler]:
+  # dictConfig hands over cfg://handlers.<name> references. indexing resolves them to the configured handlers
+  return [handlers[i] for i in range(len(handlers))]
+
+
+def on_dropped(listener):
+  # listener(count) runs on the thread whose record was dropped, keep it cheap
+  _drop_listeners.append(listener)
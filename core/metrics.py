@@ -0,0 +1,166 @@
+import logging
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from prometheus_client import Counter, Histogram, Gauge
+
+from core.config import config
+from core.log_pipeline import on_dropped
+
+log = logging.getLogger(__name__)
+
+# Server-Timing exposes internals, so it is off in production unless turned on explicitly
+SERVER_TIMING = config.get('metrics', {}).get('server_timing', config['env'] != 'production')
+QUERY_WARN = config.get('metrics', {}).get('query_warn', 20)
+
+HTTP_REQUESTS = Counter(
+  'blink_http_requests_total',
+  'HTTP requests by route template and status code',
+  ['method', 'route', 'status']
+)
+HTTP_LATENCY = Histogram(
+  'blink_http_request_duration_seconds',
+  'HTTP request latency by route template',
+  ['method', 'route'],
+  buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+HTTP_IN_FLIGHT = Gauge(
+  'blink_http_requests_in_flight',
+  'HTTP requests currently being handled',
+  multiprocess_mode='livesum'
+)
+
+DB_QUERY_LATENCY = Histogram(
+  'blink_db_query_duration_seconds',
+  'Latency of single SQL statements',
+  buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+  'blink_db_queries_per_request',
+  'Number of SQL statements executed by one HTTP request',
+  ['route'],
+  buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+)
+DB_TIME_PER_REQUEST = Histogram(
+  'blink_db_time_per_request_seconds',
+  'Total SQL time spent by one HTTP request',
+  ['route'],
+  buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+)
+
+REDIS_LATENCY = Histogram(
+  'blink_redis_command_duration_seconds',
+  'Latency of redis commands. pipelines are recorded as one PIPELINE command',
+  ['db', 'command'],
+  buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5)
+)
+NEIS_LATENCY = Histogram(
+  'blink_neis_request_duration_seconds',
+  'Latency of NEIS open API calls',
+  ['api'],
+  buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30)
+)
+
+CACHE_REQUESTS = Counter(
+  'blink_cache_requests_total',
+  'Cache lookups by cache and result (hit or miss)',
+  ['cache', 'result']
+)
+
+# both are updated where the change happens, not through set_function: callbacks are never written to the
+# multiprocess files and would scrape as 0 under PROMETHEUS_MULTIPROC_DIR
+DB_POOL_CHECKED_OUT = Gauge(
+  'blink_db_pool_checked_out',
+  'SQL connections checked out of the pool',
+  multiprocess_mode='livesum'
+)
+
+LOG_DROPPED = Counter(
+  'blink_log_records_dropped_total',
+  'Log records dropped because the log queue was full'
+)
+on_dropped(LOG_DROPPED.inc)
+
+
+class RequestStats:
+  __slots__ = ('queries', 'db_time')
+
+  def __init__(self):
+    self.queries = 0
+    self.db_time = 0.0
+
+
+# set by the middleware for the duration of a request. threadpool workers running sync handlers and
+# dependencies get a copy of the context that points at the same object
+request_stats: ContextVar[Optional[RequestStats]] = ContextVar('request_stats', default=None)
+
+
+def record_query(duration: float):
+  DB_QUERY_LATENCY.observe(duration)
+  stats = request_stats.get()
+  if stats is not None:
+    stats.queries += 1
+    stats.db_time += duration
+
+
+def cache_hit(cache: str):
+  CACHE_REQUESTS.labels(cache, 'hit').inc()
+
+
+def cache_miss(cache: str):
+  CACHE_REQUESTS.labels(cache, 'miss').inc()
+
+
+class MetricsMiddleware:
+  # plain ASGI middleware. BaseHTTPMiddleware would add a task and a stream copy per request
+  def __init__(self, app):
+    self.app = app
+
+  async def __call__(self, scope, receive, send):
+    if scope['type'] != 'http':
+      await self.app(scope, receive, send)
+      return
+
+    status = 500
+    stats = RequestStats()
+    token = request_stats.set(stats)
+
+    async def send_wrapper(message):
+      nonlocal status
+      if message['type'] == 'http.response.start':
+        status = message['status']
+        if SERVER_TIMING:
+          message = _with_server_timing(message, stats, time.perf_counter() - begin)
+      await send(message)
+
+    HTTP_IN_FLIGHT.inc()
+    begin = time.perf_counter()
+    try:
+      await self.app(scope, receive, send_wrapper)
+    finally:
+      elapsed = time.perf_counter() - begin
+      HTTP_IN_FLIGHT.dec()
+      request_stats.reset(token)
+
+      # label by route template, never by raw path, to keep cardinality bounded
+      route = scope.get('route')
+      route = route.path if route is not None else 'unmatched'
+      method = scope['method']
+
+      HTTP_REQUESTS.labels(method, route, str(status)).inc()
+      HTTP_LATENCY.labels(method, route).observe(elapsed)
+      DB_QUERIES_PER_REQUEST.labels(route).observe(stats.queries)
+      DB_TIME_PER_REQUEST.labels(route).observe(stats.db_time)
+
+      if stats.queries > QUERY_WARN:
+        log.warning('Request ran too many queries. method=\"{}\", route=\"{}\", queries=\"{}\", db_ms=\"{:.1f}\"'.format(
+          method, route, stats.queries, stats.db_time * 1000
+        ))
+
+
+def _with_server_timing(message, stats: RequestStats, elapsed: float):
+  value = 'db;dur={:.1f};desc="{} queries", app;dur={:.1f}'.format(stats.db_time * 1000, stats.queries, elapsed * 1000)
+  headers = list(message.get('headers', []))
+  headers.append((b'server-timing', value.encode('latin-1')))
+  return {**message, 'headers': headers}
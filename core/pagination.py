@@ -0,0 +1,56 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import Executable, ClauseElement
+
+MAX_PAGE_SIZE = 100
+
+
+class Explain(Executable, ClauseElement):
+  inherit_cache = False
+
+  def __init__(self, statement):
+    self.statement = statement
+
+
+@compiles(Explain, 'postgresql')
+def compile_explain(element: Explain, compiler, **kw):
+  return 'EXPLAIN (FORMAT JSON) ' + compiler.process(element.statement, **kw)
+
+
+def estimate_count(statement, db: Session) -> int:
+  # planner estimate instead of count(*). good enough for "about N results" and never scans the table.
+  plan = db.execute(Explain(statement)).scalar()
+  return int(plan[0]['Plan']['Plan Rows'])
+
+
+def encode_cursor(time: datetime, uid: UUID) -> str:
+  raw = json.dumps([time.isoformat(), str(uid)], separators=(',', ':'))
+  return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[tuple[datetime, UUID]]:
+  if cursor is None or cursor == '':
+    return None
+
+  try:
+    raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+    time, uid = json.loads(raw)
+    return datetime.fromisoformat(time), UUID(uid)
+  except Exception:
+    raise ValueError('Invalid cursor')
+
+
+def page_size(limit: Optional[str], default: int = 50) -> int:
+  if limit is None or limit == '':
+    return default
+
+  size = int(limit)
+  if size < 1 or size > MAX_PAGE_SIZE:
+    raise ValueError('Page size out of range')
+  return size
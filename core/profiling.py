@@ -0,0 +1,295 @@
+import asyncio
+import cProfile
+import functools
+import io
+import logging
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional
+
+from fastapi import HTTPException
+from fastapi.routing import APIRoute
+
+from core.authentication.authorization_service import authorize_jwt, principal_of
+from core.config import config
+from core.user.user_info_service import check_role
+
+log = logging.getLogger(__name__)
+
+# opt-in. when disabled the admin endpoints answer 404 and the middleware only passes requests through
+PROFILING_CONFIG = config.get('profiling', {})
+ENABLED = PROFILING_CONFIG.get('enabled', False)
+PROFILER_ROLE = 'root:profiler'
+
+SAMPLE_INTERVAL = PROFILING_CONFIG.get('interval', 0.005)
+MIN_INTERVAL = 0.001
+MAX_INTERVAL = 0.1
+MAX_DURATION = PROFILING_CONFIG.get('max_duration', 30)
+# share of wall time the sampler may spend walking stacks. above it the interval is doubled
+MAX_OVERHEAD = PROFILING_CONFIG.get('max_overhead', 0.02)
+MAX_DEPTH = 128
+
+REQUEST_HEADER = b'x-blink-profile'
+REQUEST_PROFILES_KEPT = PROFILING_CONFIG.get('keep', 20)
+
+_ROOT = os.getcwd() + os.sep
+
+
+class ProfilerBusy(Exception):
+  pass
+
+
+@dataclass
+class SampleResult:
+  stacks: Counter
+  samples: int
+  elapsed: float
+  interval: float
+  overhead: float
+
+
+_sampling = threading.Lock()
+
+
+def _frame_name(code) -> str:
+  filename = code.co_filename
+  if filename.startswith(_ROOT):
+    filename = filename[len(_ROOT):]
+  else:
+    # keep the package path of third party modules, drop the interpreter prefix
+    marker = filename.rfind('site-packages' + os.sep)
+    if marker >= 0:
+      filename = filename[marker + len('site-packages') + 1:]
+  return '{} ({}:{})'.format(code.co_qualname, filename, code.co_firstlineno)
+
+
+def sample(duration: float, interval: float = SAMPLE_INTERVAL) -> SampleResult:
+  # samples the stacks of every thread in this worker except the sampler itself. runs on the calling
+  # thread, so call it from the threadpool and not from the event loop
+  duration = min(max(duration, 0.1), MAX_DURATION)
+  interval = min(max(interval, MIN_INTERVAL), MAX_INTERVAL)
+
+  if not _sampling.acquire(blocking=False):
+    raise ProfilerBusy()
+
+  try:
+    me = threading.get_ident()
+    stacks = Counter()
+    samples = 0
+    spent = 0.0
+    names = {}
+
+    begin = time.perf_counter()
+    deadline = begin + duration
+    while True:
+      tick = time.perf_counter()
+      if tick >= deadline:
+        break
+
+      for ident, frame in sys._current_frames().items():
+        if ident == me:
+          continue
+        stack = []
+        while frame is not None and len(stack) < MAX_DEPTH:
+          stack.append(_frame_name(frame.f_code))
+          frame = frame.f_back
+        if ident not in names:
+          names = {thread.ident: thread.name for thread in threading.enumerate()}
+        stack.append(names.get(ident, str(ident)))
+        stacks[tuple(reversed(stack))] += 1
+      samples += 1
+
+      now = time.perf_counter()
+      spent += now - tick
+      if spent > MAX_OVERHEAD * (now - begin) and interval < MAX_INTERVAL:
+        interval = min(interval * 2, MAX_INTERVAL)
+        log.debug('Sampling profiler is over its overhead budget. interval=\"{}\"'.format(interval))
+      time.sleep(interval)
+
+    elapsed = time.perf_counter() - begin
+    return SampleResult(stacks=stacks, samples=samples, elapsed=elapsed, interval=interval, overhead=spent / elapsed)
+  finally:
+    _sampling.release()
+
+
+def to_collapsed(result: SampleResult) -> str:
+  # the input format of flamegraph.pl and speedscope: "root;child;leaf count"
+  return '\n'.join('{} {}'.format(';'.join(stack), count) for stack, count in result.stacks.most_common()) + '\n'
+
+
+def to_speedscope(result: SampleResult) -> dict:
+  frames = []
+  frame_index = {}
+  profiles = {}
+
+  for stack, count in result.stacks.items():
+    thread, calls = stack[0], stack[1:]
+    indices = []
+    for name in calls:
+      if name not in frame_index:
+        frame_index[name] = len(frames)
+        frames.append({'name': name})
+      indices.append(frame_index[name])
+    profile = profiles.setdefault(thread, {'samples': [], 'weights': []})
+    profile['samples'].append(indices)
+    profile['weights'].append(count)
+
+  return {
+    '$schema': 'https://www.speedscope.app/file-format-schema.json',
+    'name': 'blink-backstage pid {}'.format(os.getpid()),
+    'exporter': 'blink-backstage',
+    'shared': {'frames': frames},
+    'profiles': [
+      {
+        'type': 'sampled',
+        'name': thread,
+        'unit': 'none',
+        'startValue': 0,
+        'endValue': sum(profile['weights']),
+        'samples': profile['samples'],
+        'weights': profile['weights'],
+      }
+      for thread, profile in profiles.items()
+    ],
+  }
+
+
+@dataclass
+class RequestProfile:
+  profile_id: str
+  method: str
+  path: str
+  started: float
+  elapsed: float = 0.0
+  profiles: list = field(default_factory=list)
+
+  def stats(self) -> Optional[pstats.Stats]:
+    if not self.profiles:
+      return None
+    stats = pstats.Stats(self.profiles[0])
+    for profile in self.profiles[1:]:
+      stats.add(profile)
+    return stats
+
+
+# the profile of the request being captured. threadpool workers see it through the copied context
+_capture: ContextVar[Optional[RequestProfile]] = ContextVar('profile_capture', default=None)
+_capturing = threading.Lock()
+_request_profiles: deque[RequestProfile] = deque(maxlen=REQUEST_PROFILES_KEPT)
+
+
+def request_profiles() -> list[RequestProfile]:
+  return list(_request_profiles)
+
+
+def get_request_profile(profile_id: str) -> Optional[RequestProfile]:
+  for profile in _request_profiles:
+    if profile.profile_id == profile_id:
+      return profile
+  return None
+
+
+def render_stats(profile: RequestProfile, sort: str, limit: int) -> str:
+  stats = profile.stats()
+  if stats is None:
+    return ''
+  out = io.StringIO()
+  stats.stream = out
+  stats.sort_stats(sort).print_stats(limit)
+  return out.getvalue()
+
+
+def dump_stats(profile: RequestProfile) -> bytes:
+  stats = profile.stats()
+  return marshal.dumps(stats.stats if stats is not None else {})
+
+
+def _profiled(call):
+  # before python 3.12 cProfile only sees the thread it was enabled on, so sync endpoints running in the
+  # threadpool are profiled separately and merged with the event loop side afterwards
+  @functools.wraps(call)
+  def wrapper(*args, **kwargs):
+    capture = _capture.get()
+    if capture is None:
+      return call(*args, **kwargs)
+
+    profile = cProfile.Profile()
+    try:
+      return profile.runcall(call, *args, **kwargs)
+    finally:
+      capture.profiles.append(profile)
+
+  return wrapper
+
+
+def instrument_routes(app):
+  # from 3.12 cProfile runs on sys.monitoring: the middleware's profiler already sees every thread, and a
+  # second one enabled in the threadpool would fail with "Another profiling tool is already active"
+  if not ENABLED or sys.version_info >= (3, 12):
+    return
+
+  for route in app.routes:
+    if isinstance(route, APIRoute) and not asyncio.iscoroutinefunction(route.dependant.call):
+      route.dependant.call = _profiled(route.dependant.call)
+
+
+def _authorized(headers: dict) -> bool:
+  try:
+    principal = principal_of(authorize_jwt(headers.get(b'authorization', b'').decode('latin-1') or None))
+  except HTTPException:
+    return False
+  return check_role(principal.aud, PROFILER_ROLE)
+
+
+class ProfilingMiddleware:
+  # requests carrying the x-blink-profile header from a root:profiler principal run under cProfile.
+  # the profile id is returned in the same header and the stats are kept for the admin endpoints
+  def __init__(self, app):
+    self.app = app
+
+  async def __call__(self, scope, receive, send):
+    if not ENABLED or scope['type'] != 'http':
+      await self.app(scope, receive, send)
+      return
+
+    headers = dict(scope['headers'])
+    if REQUEST_HEADER not in headers or not _authorized(headers):
+      await self.app(scope, receive, send)
+      return
+
+    # one capture at a time. cProfile on the event loop also sees concurrent requests, keep them few
+    if not _capturing.acquire(blocking=False):
+      log.debug('Request profile skipped, another capture is running. path=\"{}\"'.format(scope['path']))
+      await self.app(scope, receive, send)
+      return
+
+    capture = RequestProfile(uuid.uuid4().hex[:12], scope['method'], scope['path'], time.time())
+
+    async def send_wrapper(message):
+      if message['type'] == 'http.response.start':
+        message = {**message, 'headers': [*message.get('headers', []), (REQUEST_HEADER, capture.profile_id.encode())]}
+      await send(message)
+
+    token = _capture.set(capture)
+    profile = cProfile.Profile()
+    begin = time.perf_counter()
+    profile.enable()
+    try:
+      await self.app(scope, receive, send_wrapper)
+    finally:
+      profile.disable()
+      capture.elapsed = time.perf_counter() - begin
+      capture.profiles.append(profile)
+      _capture.reset(token)
+      _capturing.release()
+      _request_profiles.append(capture)
+      log.info('Request profiled. profile_id=\"{}\", path=\"{}\", elapsed_ms=\"{:.1f}\"'.format(
+        capture.profile_id, capture.path, capture.elapsed * 1000))
@@ -0,0 +1,72 @@
+import hashlib
+import logging
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from core import metrics
+from core.config import config
+
+log = logging.getLogger(__name__)
+
+SLOW_QUERY_SECONDS = config['database']['relational'].get('slow_query_ms', 200) / 1000
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PARAMETER = re.compile(r'%\(\w+\)s|%s|\?')
+_VALUE_LIST = re.compile(r'\((?:\s*\?\s*,)+\s*\?\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+# statements seen by the innermost max_queries() block of the current context
+_budget: ContextVar[Optional[list[str]]] = ContextVar('query_budget', default=None)
+
+
+def fingerprint(statement: str) -> str:
+  # replace literals and bind parameters with ? and collapse IN lists, so every execution of the
+  # same query shape maps to the same text
+  normalized = _STRING_LITERAL.sub('?', statement)
+  normalized = _NUMBER_LITERAL.sub('?', normalized)
+  normalized = _PARAMETER.sub('?', normalized)
+  normalized = _VALUE_LIST.sub('(...)', normalized)
+  return _WHITESPACE.sub(' ', normalized).strip()
+
+
+def fingerprint_id(fingerprinted: str) -> str:
+  return hashlib.sha1(fingerprinted.encode()).hexdigest()[:12]
+
+
+def record_statement(statement: str, duration: float):
+  metrics.record_query(duration)
+
+  statements = _budget.get()
+  if statements is not None:
+    statements.append(fingerprint(statement))
+
+  if duration >= SLOW_QUERY_SECONDS:
+    shape = fingerprint(statement)
+    log.warning(
+      'Slow query. duration_ms=\"{:.1f}\", fingerprint=\"{}\", statement=\"{}\"'.format(
+        duration * 1000, fingerprint_id(shape), shape
+      )
+    )
+
+
+@contextmanager
+def max_queries(limit: int):
+  # collects the statements run inside the block and fails when there are more than limit of them. only
+  # the calling context is counted, including threadpool work started from it, not other threads on the engine.
+  # benchmarks.query_budget pins the budgets of the hot endpoints with it:
+  #   with max_queries(1):
+  #     comment_service.get_organized_comments(post_id, db)
+  statements = []
+  token = _budget.set(statements)
+  try:
+    yield statements
+  finally:
+    _budget.reset(token)
+
+  if len(statements) > limit:
+    raise AssertionError(
+      'Expected at most {} queries, {} were executed:\n{}'.format(limit, len(statements), '\n'.join(statements))
+    )
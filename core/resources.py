@@ -0,0 +1,173 @@
+import itertools
+import logging
+import threading
+import time
+
+from redis import Redis, RedisError
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from core.config import config
+from database.database import MAX_OVERFLOW, POOL_SIZE, async_redis_aaguid_db, async_redis_db, engine, meal_cache_db, \
+  redis_aaguid_db, redis_db
+
+log = logging.getLogger(__name__)
+
+RESOURCES_CONFIG = config.get('resources', {})
+# connections opened on start so the first requests do not pay for the handshakes
+WARM_CONNECTIONS = RESOURCES_CONFIG.get('warm_connections', 4)
+WARM_GOOGLE = RESOURCES_CONFIG.get('warm_google', True)
+HEALTH_TIMEOUT = RESOURCES_CONFIG.get('health_timeout', 2)
+# a gRPC channel multiplexes calls over one HTTP/2 connection, a few of them spread the threadpool's calls
+RECAPTCHA_CHANNELS = config['security']['recaptcha'].get('channels', 2)
+
+
+class Resources:
+  # owns the pooled clients of a worker: the SQL engine, the redis clients and the google clients.
+  # the lifespan hook warms them before the worker reports ready and closes them on shutdown
+  def __init__(self):
+    self.ready = False
+    self.redis: dict[str, Redis] = {
+      'redis': redis_db,
+      'aaguid': redis_aaguid_db,
+      'meal': meal_cache_db,
+    }
+    self.async_redis = {
+      'redis': async_redis_db,
+      'aaguid': async_redis_aaguid_db,
+    }
+
+    self._lock = threading.Lock()
+    self._recaptcha = []
+    self._recaptcha_next = itertools.count()
+    self._recaptcha_async = None
+    self._oauth_flow = None
+
+  def recaptcha(self):
+    # long lived clients handed out round robin. they are thread safe, building one per call costs a TLS handshake
+    if not self._recaptcha:
+      with self._lock:
+        if not self._recaptcha:
+          from google.cloud import recaptchaenterprise_v1
+          self._recaptcha = [recaptchaenterprise_v1.RecaptchaEnterpriseServiceClient()
+                             for _ in range(max(RECAPTCHA_CHANNELS, 1))]
+    return self._recaptcha[next(self._recaptcha_next) % len(self._recaptcha)]
+
+  def recaptcha_async(self):
+    # grpc.aio channels belong to the event loop they were made on, so this is only built from async code
+    if self._recaptcha_async is None:
+      from google.cloud import recaptchaenterprise_v1
+      self._recaptcha_async = recaptchaenterprise_v1.RecaptchaEnterpriseServiceAsyncClient()
+    return self._recaptcha_async
+
+  def oauth_flow(self):
+    if self._oauth_flow is None:
+      with self._lock:
+        if self._oauth_flow is None:
+          from google_auth_oauthlib.flow import Flow
+
+          flow = Flow.from_client_secrets_file(
+            client_secrets_file=config['auth']['google']['client_secret_file'],
+            scopes=[
+              'https://www.googleapis.com/auth/userinfo.email',
+              'https://www.googleapis.com/auth/userinfo.profile',
+              'openid'
+            ]
+          )
+          flow.redirect_uri = config['auth']['google']['redirect_uri']
+          self._oauth_flow = flow
+    return self._oauth_flow
+
+  def warm(self):
+    begin = time.perf_counter()
+
+    # check out several connections at once so the pool really opens that many
+    connections = []
+    try:
+      for _ in range(min(WARM_CONNECTIONS, POOL_SIZE)):
+        connection = engine.connect()
+        connection.execute(text('SELECT 1'))
+        connections.append(connection)
+    finally:
+      for connection in connections:
+        connection.close()
+
+    for client in self.redis.values():
+      client.ping()
+
+    if WARM_GOOGLE:
+      try:
+        self.recaptcha()
+        self.oauth_flow()
+      except Exception as e:
+        # google sign in and recaptcha degrade on their own, the worker can still serve
+        log.warning('Failed to build google clients on start. error=\"{}\"'.format(e))
+
+    self.ready = True
+    log.info('Resources warmed. sql_connections=\"{}\", elapsed_ms=\"{:.0f}\"'.format(
+      len(connections), (time.perf_counter() - begin) * 1000))
+
+  def health(self) -> tuple[bool, dict]:
+    checks = {}
+
+    # a probe must not queue behind requests for a connection. a saturated pool means a busy worker, not a
+    # broken one: taking every busy worker out of rotation at once would hand their load to the rest
+    if engine.pool.checkedout() >= POOL_SIZE + MAX_OVERFLOW:
+      checks['postgres'] = {'ok': True, 'saturated': True, 'pool': engine.pool.status()}
+    else:
+      checks['postgres'] = self._check_postgres()
+
+    for name, client in self.redis.items():
+      try:
+        client.ping()
+        checks[name] = {'ok': True}
+      except RedisError as e:
+        checks[name] = {'ok': False, 'error': type(e).__name__}
+
+    checks['google'] = {'recaptcha': len(self._recaptcha), 'oauth': self._oauth_flow is not None}
+
+    healthy = self.ready and all(check.get('ok', True) for check in checks.values())
+    return healthy, checks
+
+  @staticmethod
+  def _check_postgres() -> dict:
+    try:
+      with engine.connect() as connection:
+        connection.execute(text('SET LOCAL statement_timeout = {}'.format(int(HEALTH_TIMEOUT * 1000))))
+        connection.execute(text('SELECT 1'))
+    except SQLAlchemyError as e:
+      return {'ok': False, 'error': type(e).__name__, 'pool': engine.pool.status()}
+    return {'ok': True, 'pool': engine.pool.status()}
+
+  def close(self):
+    self.ready = False
+
+    for client in self._recaptcha:
+      client.transport.close()
+    self._recaptcha = []
+
+    for name, client in self.redis.items():
+      try:
+        client.close()
+        client.connection_pool.disconnect()
+      except RedisError as e:
+        log.warning('Failed to close redis client. name=\"{}\", error=\"{}\"'.format(name, e))
+
+    engine.dispose()
+    log.info('Resources closed')
+
+  async def aclose(self):
+    if self._recaptcha_async is not None:
+      await self._recaptcha_async.transport.close()
+      self._recaptcha_async = None
+
+    for name, client in self.async_redis.items():
+      try:
+        await client.aclose()
+      except RedisError as e:
+        log.warning('Failed to close async redis client. name=\"{}\", error=\"{}\"'.format(name, e))
+    self.close()
+
+
+resources = Resources()
+
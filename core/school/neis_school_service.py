@@ -4,12 +4,14 @@ from datetime import datetime, time, timedelta
 from typing import Type
 from uuid import UUID
 
-import requests
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
 
+from core import metrics
 from core.config import config
-from core.user.user_info_service import get_identity_by_userid, role_to_school
+from core.tracing import TracedSession
+from core.user.identity_cache import get_snapshot
+from core.user.user_info_service import role_to_school
 from database.database import meal_cache_db
 from models.database_models.relational.schools import School, SchoolType
 
@@ -21,20 +23,24 @@ HS_TIMETABLE_URL = config['api']['neis']['high_school_timetable_info']
 MS_TIMETABLE_URL = config['api']['neis']['middle_school_timetable_info']
 API_KEY = config['api']['neis']['key']
 
+# one pooled keep-alive session for every NEIS call
+session = TracedSession()
+
 today = datetime.today()
 FIRST_DATE_OF_WEEK = today - timedelta(days=today.weekday())
 LAST_DATE_OF_WEEK = FIRST_DATE_OF_WEEK + timedelta(days=4)  # TODO: CHANGE CACHED DATE EVERYDAY
 
 
 def query_school_info(school_name: str) -> list[dict]:
-  response = requests.get(
-    url=SCHOOL_INFO_URL,
-    params={
-      'KEY': API_KEY,
-      'Type': 'json',
-      'SCHUL_NM': school_name
-    }
-  )
+  with metrics.NEIS_LATENCY.labels('school_info').time():
+    response = session.get(
+      url=SCHOOL_INFO_URL,
+      params={
+        'KEY': API_KEY,
+        'Type': 'json',
+        'SCHUL_NM': school_name
+      }
+    )
 
   if response.status_code != 200:
     log.debug("NEIS API error. status_code={}".format(response.status_code))
@@ -79,22 +85,25 @@ def get_meal_data(neis_code: str) -> dict:
   log.debug('requesting NEIS meal API. neis_code={}'.format(neis_code))
   today = datetime.today().strftime('%Y%m%d')
 
-  cnt = meal_cache_db.exists(neis_code + today)
-  if cnt > 0:
+  cached = meal_cache_db.get(neis_code + today)
+  if cached is not None:
     log.debug('meal cache hit. neis_code={}, day={}'.format(neis_code, today))
-    return json.loads(meal_cache_db.get(neis_code + today))
+    metrics.cache_hit('meal')
+    return json.loads(cached)
   log.debug('meal cache miss. neis_code={}, day={}'.format(neis_code, today))
-
-  response = requests.get(
-    url=MEAL_INFO_URL,
-    params={
-      'KEY': API_KEY,
-      'Type': 'json',
-      'ATPT_OFCDC_SC_CODE': neis_code[:3],
-      'SD_SCHUL_CODE': neis_code[3:],
-      'MLSV_YMD': today
-    }
-  )
+  metrics.cache_miss('meal')
+
+  with metrics.NEIS_LATENCY.labels('meal').time():
+    response = session.get(
+      url=MEAL_INFO_URL,
+      params={
+        'KEY': API_KEY,
+        'Type': 'json',
+        'ATPT_OFCDC_SC_CODE': neis_code[:3],
+        'SD_SCHUL_CODE': neis_code[3:],
+        'MLSV_YMD': today
+      }
+    )
 
   if response.status_code != 200:
     log.debug("NEIS meal API error. status_code={}".format(response.status_code))
@@ -143,7 +152,7 @@ def get_timetable_data(
 ) -> dict:
   log.debug('requesting timetable API. uid={}'.format(uid))
 
-  identity = get_identity_by_userid(uid, db)
+  identity = get_snapshot(uid, db)
   if identity is None:
     raise HTTPException(status_code=404, detail='User not found')
 
@@ -169,19 +178,20 @@ def get_timetable_data(
     raise HTTPException(status_code=400, detail='Classroom not set')
 
   log.debug("requesting NEIS timetable API. neis_code={}, grade={}, classroom={}".format(neis_code, grade, classroom))
-  response = requests.get(
-    url=req_url,
-    params={
-      'KEY': API_KEY,
-      'Type': 'json',
-      'ATPT_OFCDC_SC_CODE': neis_code[:3],
-      'SD_SCHUL_CODE': neis_code[3:],
-      'GRADE': grade,
-      'CLASS_NM': classroom,
-      'TI_FROM_YMD': FIRST_DATE_OF_WEEK.strftime('%Y%m%d'),
-      'TI_TO_YMD': LAST_DATE_OF_WEEK.strftime('%Y%m%d'),
-    }
-  )
+  with metrics.NEIS_LATENCY.labels('timetable').time():
+    response = session.get(
+      url=req_url,
+      params={
+        'KEY': API_KEY,
+        'Type': 'json',
+        'ATPT_OFCDC_SC_CODE': neis_code[:3],
+        'SD_SCHUL_CODE': neis_code[3:],
+        'GRADE': grade,
+        'CLASS_NM': classroom,
+        'TI_FROM_YMD': FIRST_DATE_OF_WEEK.strftime('%Y%m%d'),
+        'TI_TO_YMD': LAST_DATE_OF_WEEK.strftime('%Y%m%d'),
+      }
+    )
 
   if response.status_code != 200:
     log.debug("NEIS timetable API error. status_code={}".format(response.status_code))
@@ -6,11 +6,12 @@ from sqlalchemy.orm import Session
 
 from models.database_models.relational.schools import School, SchoolType, Sex
 from models.request_models.school_requests import AddSchoolRequest
+from models.response_models.school_responses import SchoolItem
 
 log = logging.getLogger(__name__)
 
 
-def get_school_list(school_name: str, db: Session) -> list[dict]:
+def get_school_list(school_name: str, db: Session) -> list[SchoolItem]:
   schools = (
     db.query(School)
     .filter(
@@ -24,7 +25,7 @@ def get_school_list(school_name: str, db: Session) -> list[dict]:
     .all()
   )
 
-  ret = []
+  ret: list[SchoolItem] = []
 
   for school in schools:
     if school.school_type is SchoolType.GENERAL_HIGH_SCHOOL:
@@ -54,7 +55,7 @@ def get_school_list(school_name: str, db: Session) -> list[dict]:
       raise HTTPException(status_code=500, detail='Database integrity')
 
     ret.append({
-      "schoolId": str(school.school_id),
+      "schoolId": school.school_id,
       "schoolName": school.school_name,
       "schoolType": stype,
       "neisCode": school.neis_code,
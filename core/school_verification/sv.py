@@ -6,7 +6,7 @@ from uuid import UUID
 
 from fastapi import HTTPException
 from sqlalchemy import desc
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, undefer_group
 
 from core.user.user_info_service import get_identity_by_userid, role_to_school
 from models.database_models.relational.identity import Identity
@@ -96,6 +96,7 @@ def get_evidence(vid_str: str, db: Session):
 
   request = (
     db.query(SvRequest)
+    .options(undefer_group('evidence'))
     .filter_by(verification_id=vid)
     .first()
   )
@@ -134,6 +135,8 @@ def evaluate_sv(judge: SvEvaluation, db: Session):
 
     school.user_count = school.user_count + 1
 
+  return sv.user_id
+
 
 def withdraw_verification(sub: UUID, db: Session):
   identity: Type[Identity] = get_identity_by_userid(sub, db)
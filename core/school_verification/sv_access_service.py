@@ -1,13 +1,53 @@
 import logging
+from typing import Optional
 
 from fastapi import HTTPException
-from sqlalchemy import asc
+from sqlalchemy import asc, tuple_
 from sqlalchemy.orm import Session
 
+from core.pagination import estimate_count, encode_cursor, decode_cursor
 from models.database_models.relational.verification import SvRequest, SvState
 
 log = logging.getLogger(__name__)
 
+QUEUE_DEFAULT_STATES = [SvState.REQUESTED, SvState.HOLDING]
+
+
+def sv_state_label(sv: SvRequest) -> str:
+  if sv.state is SvState.DRAFT:
+    return 'DRAFT'
+  elif sv.state is SvState.REQUESTED:
+    return 'REQUESTED'
+  elif sv.state is SvState.HOLDING:
+    return 'HOLDING'
+  elif sv.state is SvState.ACCEPTED:
+    return 'ACCEPTED'
+  elif sv.state is SvState.INVALID_EVIDENCE:
+    return 'INVALID DOCUMENT'
+  elif sv.state is SvState.IDENTITY_MISMATCH:
+    return 'IDENTITY_MISMATCH'
+  elif sv.state is SvState.INVALID_DOCUMENT:
+    return 'INVALID DOCUMENT'
+  elif sv.state is SvState.DENIED:
+    return 'DENIED'
+  else:
+    log.debug('Unknown sv state stored in db. state=\"{}\", verification_uid=\"{}\"'.format(sv.state,
+                                                                                            sv.verification_id))
+    raise HTTPException(status_code=500, detail='Database integrity')
+
+
+def sv_summary(sv: SvRequest) -> dict:
+  return {
+    'verificationId': str(sv.verification_id),
+    'userId': str(sv.user_id),
+    'requestTime': sv.request_time.isoformat(),
+    'evidence': sv.evidence_type is not None,
+    'grade': sv.grade,
+    'schoolName': sv.school,
+    'name': sv.name,
+    'state': sv_state_label(sv)
+  }
+
 
 def access_get_sv(db: Session, **kwargs):
   data = (
@@ -34,36 +74,53 @@ def access_get_sv(db: Session, **kwargs):
   res = []
 
   for sv in data:
-    if sv.state is SvState.DRAFT:
-      state = 'DRAFT'
-    elif sv.state is SvState.REQUESTED:
-      state = 'REQUESTED'
-    elif sv.state is SvState.HOLDING:
-      state = 'HOLDING'
-    elif sv.state is SvState.ACCEPTED:
-      state = 'ACCEPTED'
-    elif sv.state is SvState.INVALID_EVIDENCE:
-      state = 'INVALID DOCUMENT'
-    elif sv.state is SvState.IDENTITY_MISMATCH:
-      state = 'IDENTITY_MISMATCH'
-    elif sv.state is SvState.INVALID_DOCUMENT:
-      state = 'INVALID DOCUMENT'
-    elif sv.state is SvState.DENIED:
-      state = 'DENIED'
-    else:
-      log.debug('Unknown sv state stored in db. state=\"{}\", verification_uid=\"{}\"'.format(sv.state,
-                                                                                              sv.verification_id))
-      raise HTTPException(status_code=500, detail='Database integrity')
-
-    res.append({
-      'verificationId': str(sv.verification_id),
-      'userId': str(sv.user_id),
-      'requestTime': sv.request_time.isoformat(),
-      'evidence': sv.evidence is not None,
-      'grade': sv.grade,
-      'schoolName': sv.school,
-      'name': sv.name,
-      'state': state
-    })
+    res.append(sv_summary(sv))
 
   return res
+
+
+def access_get_sv_queue(
+  db: Session,
+  states: list[SvState],
+  name: Optional[str],
+  school_name: Optional[str],
+  cursor: Optional[str],
+  limit: int
+) -> dict:
+  query = (
+    db.query(SvRequest)
+    .filter(SvRequest._state.in_([state.value for state in states]))
+  )
+
+  # ILIKE '%...%' is served by the trigram indexes on name and school
+  if name is not None:
+    query = query.filter(SvRequest.name.icontains(name, autoescape=True))
+  if school_name is not None:
+    query = query.filter(SvRequest.school.icontains(school_name, autoescape=True))
+
+  total = estimate_count(query.statement, db)
+
+  after = decode_cursor(cursor)
+  if after is not None:
+    query = query.filter(tuple_(SvRequest.request_time, SvRequest.verification_id) > tuple_(*after))
+
+  data = (
+    query
+    .order_by(asc(SvRequest.request_time), asc(SvRequest.verification_id))
+    .limit(limit + 1)
+    .all()
+  )
+
+  next_cursor = None
+  if len(data) > limit:
+    data = data[:limit]
+    next_cursor = encode_cursor(data[-1].request_time, data[-1].verification_id)
+
+  log.debug('SV queue was queried. states=\"{}\", returned=\"{}\", estimated_total=\"{}\"'.format(
+    [state.name for state in states], len(data), total))
+
+  return {
+    'requests': [sv_summary(sv) for sv in data],
+    'next': next_cursor,
+    'estimatedTotal': total
+  }
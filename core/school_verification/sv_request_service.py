@@ -1,3 +1,4 @@
+import hashlib
 import logging
 
 from fastapi import HTTPException, UploadFile
@@ -11,6 +12,15 @@ from models.request_models.school_verification_requests import NewVerificationRe
 
 log = logging.getLogger(__name__)
 
+EVIDENCE_MAX_SIZE = 1048576
+EVIDENCE_CHUNK_SIZE = 65536
+
+EVIDENCE_SIGNATURES = [
+  (b'%PDF-', SvEvidenceType.PDF),
+  (b'\x89PNG\r\n\x1a\n', SvEvidenceType.PNG),
+  (b'\xff\xd8\xff', SvEvidenceType.JPEG),
+]
+
 
 def add_request(sub: int, req: NewVerificationRequest, db: Session):
   identity: Identity = user_info_service.get_identity_by_userid(sub, db)
@@ -60,28 +70,58 @@ def add_request(sub: int, req: NewVerificationRequest, db: Session):
   db.commit()
 
 
+def sniff_evidence_type(head: bytes) -> SvEvidenceType | None:
+  for signature, evidence_type in EVIDENCE_SIGNATURES:
+    if head.startswith(signature):
+      return evidence_type
+  return None
+
+
+async def read_evidence(file: UploadFile, user_id) -> (bytes, str, SvEvidenceType):
+  # the declared size is only a hint. reject early if it is already too large,
+  # but enforce the limit on the bytes that are actually read.
+  if file.size is not None and file.size > EVIDENCE_MAX_SIZE:
+    log.debug('File size is too large. user_uid=\"{}\" size=\"{}\"'.format(user_id, file.size))
+    raise HTTPException(status_code=400, detail='File too large')
+
+  content = bytearray()
+  digest = hashlib.sha256()
+  file_type = None
+
+  while True:
+    chunk = await file.read(EVIDENCE_CHUNK_SIZE)
+    if not chunk:
+      break
+
+    if len(content) + len(chunk) > EVIDENCE_MAX_SIZE:
+      log.debug('File size is too large. user_uid=\"{}\" read=\"{}\"'.format(user_id, len(content) + len(chunk)))
+      raise HTTPException(status_code=400, detail='File too large')
+
+    content += chunk
+    digest.update(chunk)
+
+    if file_type is None and len(content) >= 8:
+      file_type = sniff_evidence_type(bytes(content[:8]))
+      if file_type is None:
+        break
+
+  if file_type is None:
+    file_type = sniff_evidence_type(bytes(content[:8]))
+
+  if file_type is None:
+    log.debug(
+      'Invalid file type was uploaded. user_uid=\"{}\" content_type=\"{}\"'.format(user_id, file.content_type))
+    raise HTTPException(status_code=400, detail='Invalid file type')
+
+  return bytes(content), digest.hexdigest(), file_type
+
+
 async def add_evidence(file: UploadFile, identity: Identity, db: Session):
   log.debug(
     "Evidence was uploaded. user_uid=\"{}\" size=\"{}\" content_type\"{}\" filename=\"{}\""
     .format(identity.user_id, file.size, file.content_type, file.filename)
   )
 
-  content_type = file.content_type
-  if content_type == 'application/pdf':
-    file_type = SvEvidenceType.PDF
-  elif content_type == 'image/png':
-    file_type = SvEvidenceType.PNG
-  elif content_type == 'image/jpeg':
-    file_type = SvEvidenceType.JPEG
-  else:
-    log.debug(
-      'Invalid file type was uploaded. user_uid=\"{}\" content_type=\"{}\"'.format(identity.user_id, file.content_type))
-    raise HTTPException(status_code=400, detail='Invalid file type')
-
-  if file.size > 1048576:
-    log.debug('File size is too large. user_uid=\"{}\" size=\"{}\"'.format(identity.user_id, file.size))
-    raise HTTPException(status_code=400, detail='File too large')
-
   evidence = (
     db.query(SvRequest)
     .filter_by(user_id=identity.user_id)
@@ -94,12 +134,27 @@ async def add_evidence(file: UploadFile, identity: Identity, db: Session):
     log.debug('Draft to upload was not found. user_uid=\"{}\"'.format(identity.user_id))
     raise HTTPException(status_code=400, detail='No draft found')
 
-  content = await file.read()
+  content, content_hash, file_type = await read_evidence(file, identity.user_id)
+
+  # the same document from another account is a reused evidence. the owner may send it again after a denial
+  duplicated = (
+    db.query(SvRequest.verification_id)
+    .filter(
+      SvRequest.evidence_hash == content_hash,
+      SvRequest.user_id != identity.user_id
+    )
+    .first()
+  )
+  if duplicated is not None:
+    log.warning('Same evidence was already submitted. user_uid=\"{}\" sha256=\"{}\" verification_id=\"{}\"'.format(
+      identity.user_id, content_hash, duplicated.verification_id))
+    raise HTTPException(status_code=409, detail='Evidence already submitted')
 
   evidence.evidence = content
+  evidence.evidence_hash = content_hash
   evidence.state = SvState.REQUESTED
   evidence.evidence_type = file_type
 
   db.commit()
 
-  log.debug('Evidence was saved. user_uid=\"{}\"'.format(identity.user_id))
+  log.debug('Evidence was saved. user_uid=\"{}\" sha256=\"{}\"'.format(identity.user_id, content_hash))
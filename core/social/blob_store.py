@@ -0,0 +1,108 @@
+import logging
+import os
+import tempfile
+from typing import Optional
+
+from core.config import config
+
+log = logging.getLogger(__name__)
+
+STORAGE_CONFIG = config.get('storage', {}).get('image', {})
+
+
+class LocalBlobStore:
+  def __init__(self, root: str):
+    self.root = os.path.abspath(root)
+    os.makedirs(self.root, exist_ok=True)
+
+  def path(self, key: str) -> str:
+    path = os.path.abspath(os.path.join(self.root, key))
+    if not path.startswith(self.root + os.sep):
+      raise ValueError('Invalid blob key')
+    return path
+
+  def exists(self, key: str) -> bool:
+    return os.path.isfile(self.path(key))
+
+  def put(self, key: str, data: bytes, content_type: str):
+    path = self.path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # write then rename so a reader never sees a partial blob
+    fd, temp = tempfile.mkstemp(dir=os.path.dirname(path))
+    try:
+      with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+      os.replace(temp, path)
+    except BaseException:
+      os.unlink(temp)
+      raise
+
+  def url(self, key: str) -> Optional[str]:
+    # served by the application, see routers.social.image_api
+    return None
+
+
+class S3BlobStore:
+  def __init__(self, bucket: str, endpoint: Optional[str], public_url: Optional[str], region: Optional[str]):
+    try:
+      import boto3
+    except ImportError:
+      raise RuntimeError('storage.image.backend is s3 but boto3 is not installed')
+
+    self.bucket = bucket
+    self.public_url = public_url.rstrip('/') if public_url else None
+    self.client = boto3.client('s3', endpoint_url=endpoint, region_name=region)
+
+  def path(self, key: str) -> Optional[str]:
+    return None
+
+  def exists(self, key: str) -> bool:
+    from botocore.exceptions import ClientError
+
+    try:
+      self.client.head_object(Bucket=self.bucket, Key=key)
+      return True
+    except ClientError:
+      return False
+
+  def put(self, key: str, data: bytes, content_type: str):
+    self.client.put_object(
+      Bucket=self.bucket,
+      Key=key,
+      Body=data,
+      ContentType=content_type,
+      CacheControl='public, max-age=31536000, immutable'
+    )
+
+  def url(self, key: str) -> Optional[str]:
+    if self.public_url is not None:
+      return '{}/{}'.format(self.public_url, key)
+    return self.client.generate_presigned_url('get_object', Params={'Bucket': self.bucket, 'Key': key},
+                                              ExpiresIn=3600)
+
+
+def _create_store():
+  backend = STORAGE_CONFIG.get('backend', 'local')
+
+  if backend == 'local':
+    return LocalBlobStore(STORAGE_CONFIG.get('root', 'storage/images'))
+  if backend == 's3':
+    return S3BlobStore(
+      STORAGE_CONFIG['bucket'],
+      STORAGE_CONFIG.get('endpoint'),
+      STORAGE_CONFIG.get('public_url'),
+      STORAGE_CONFIG.get('region')
+    )
+  raise RuntimeError('Unknown image storage backend. backend=\"{}\"'.format(backend))
+
+
+_store = None
+
+
+def get_store():
+  global _store
+  if _store is None:
+    _store = _create_store()
+    log.info('Image blob store ready. backend=\"{}\"'.format(type(_store).__name__))
+  return _store
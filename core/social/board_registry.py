@@ -0,0 +1,146 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+from uuid import UUID as PyUUID
+
+from redis import RedisError
+from sqlalchemy import asc
+from sqlalchemy.orm import Session
+
+from core import metrics
+from core.config import config
+from database.database import redis_db
+from models.database_models.relational.social.board import Board, BoardState
+from models.database_models.relational.social.board_acl import BoardACL, BoardACLAction
+
+log = logging.getLogger(__name__)
+
+BOARD_VERSION_KEY = 'social:board:version'
+VERSION_CHECK_INTERVAL = config.get('cache', {}).get('board_registry_check', 5)
+
+
+@dataclass(frozen=True, slots=True)
+class BoardEntry:
+  board_id: PyUUID
+  name: str
+  tag: tuple[str, ...]
+  state: BoardState
+  # action code -> qualifications ordered by priority
+  acls: dict[int, tuple[str, ...]]
+
+
+@dataclass(frozen=True, slots=True)
+class _Registry:
+  version: int
+  by_id: dict[PyUUID, BoardEntry]
+  by_name: dict[str, BoardEntry]
+
+
+# boards and their ACLs are tiny and rarely change, so every worker keeps all of them in memory.
+# writers bump BOARD_VERSION_KEY in redis; readers compare it at most every VERSION_CHECK_INTERVAL seconds.
+_registry: Optional[_Registry] = None
+_last_check = 0.0
+_lock = threading.Lock()
+
+
+def _remote_version() -> Optional[int]:
+  try:
+    version = redis_db.get(BOARD_VERSION_KEY)
+  except RedisError as e:
+    log.warning('Failed to read board registry version. keep serving current boards. error=\"{}\"'.format(e))
+    return None
+  return int(version) if version is not None else 0
+
+
+def load_board_registry(db: Session, version: Optional[int] = None):
+  global _registry, _last_check
+
+  if version is None:
+    version = _remote_version() or 0
+
+  boards = db.query(Board).order_by(asc(Board.created_at)).all()
+  acls = db.query(BoardACL).order_by(asc(BoardACL.priority)).all()
+
+  acl_map: dict[PyUUID, dict[int, list[str]]] = {}
+  for acl in acls:
+    acl_map.setdefault(acl.board_id, {}).setdefault(acl._action_code, []).append(acl.qualification)
+
+  by_id = {}
+  by_name = {}
+  for board in boards:
+    entry = BoardEntry(
+      board_id=board.board_id,
+      name=board.name,
+      tag=tuple(board.tag),
+      state=board.state,
+      acls={action: tuple(qualifications) for action, qualifications in acl_map.get(board.board_id, {}).items()}
+    )
+    by_id[board.board_id] = entry
+    by_name.setdefault(board.name, entry)
+
+  with _lock:
+    _registry = _Registry(version=version, by_id=by_id, by_name=by_name)
+    _last_check = time.monotonic()
+
+  log.info('Board registry loaded. version=\"{}\", boards=\"{}\"'.format(version, len(by_id)))
+
+
+def _get_registry(db: Session, force_check: bool = False) -> _Registry:
+  global _last_check
+
+  registry = _registry
+  if registry is None:
+    load_board_registry(db)
+    return _registry
+
+  if not force_check and time.monotonic() - _last_check < VERSION_CHECK_INTERVAL:
+    return registry
+
+  _last_check = time.monotonic()
+  version = _remote_version()
+  if version is not None and version != registry.version:
+    log.debug('Board registry is stale. local=\"{}\", remote=\"{}\"'.format(registry.version, version))
+    load_board_registry(db, version)
+
+  return _registry
+
+
+def get_board_entry(board_id: PyUUID, db: Session) -> Optional[BoardEntry]:
+  board = _get_registry(db).by_id.get(board_id)
+  if board is not None:
+    metrics.cache_hit('acl')
+    return board
+
+  # may have been created on another worker since the last version check
+  metrics.cache_miss('acl')
+  return _get_registry(db, force_check=True).by_id.get(board_id)
+
+
+def get_board_entry_by_name(name: str, db: Session) -> Optional[BoardEntry]:
+  board = _get_registry(db).by_name.get(name)
+  if board is None:
+    board = _get_registry(db, force_check=True).by_name.get(name)
+  return board
+
+
+def get_board_entries(db: Session) -> list[BoardEntry]:
+  return list(_get_registry(db).by_id.values())
+
+
+def get_acl(board_id: PyUUID, action: BoardACLAction, db: Session) -> tuple[str, ...]:
+  board = get_board_entry(board_id, db)
+  if board is None:
+    return ()
+  return board.acls.get(action.value, ())
+
+
+def notify_board_changed(db: Session):
+  try:
+    version = redis_db.incr(BOARD_VERSION_KEY)
+  except RedisError as e:
+    log.warning('Failed to bump board registry version. error=\"{}\"'.format(e))
+    version = None
+
+  load_board_registry(db, version)
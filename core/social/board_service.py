@@ -3,9 +3,9 @@ from typing import Type
 from uuid import UUID as PyUUID
 
 from fastapi import HTTPException
-from sqlalchemy import asc, and_
 from sqlalchemy.orm import Session
 
+from core.social import board_registry
 from models.database_models.relational.identity import Identity
 from models.database_models.relational.social.board import Board
 from models.database_models.relational.social.board_acl import BoardACL, BoardACLAction
@@ -22,23 +22,11 @@ def check_acl(
   if 'root:superuser' in identity.role:
     return True
 
-  acls: list[Type[BoardACL]] = (
-    db.query(BoardACL)
-    .filter(
-      and_(
-        BoardACL.board_id == board_id,
-        BoardACL._action_code == action.value
-      )
-    )
-    .order_by(asc(BoardACL.priority))
-    .all()
-  )
-
-  for acl in acls:
-    if acl.qualification in identity.role:
+  for qualification in board_registry.get_acl(board_id, action, db):
+    if qualification in identity.role:
       return True
 
-  log.debug('ACL has been declined. board_id=\"{}\", action=\"{}\" aud=\"{}\"'.format(board_id, action, aud))
+  log.debug('ACL has been declined. board_id=\"{}\", action=\"{}\" aud=\"{}\"'.format(board_id, action, identity.role))
   return False
 
 
@@ -51,20 +39,8 @@ def check_acl_by_aud(
   if 'root:superuser' in aud:
     return True
 
-  acls: list[Type[BoardACL]] = (
-    db.query(BoardACL)
-    .filter(
-      and_(
-        BoardACL.board_id == board_id,
-        BoardACL._action_code == action.value
-      )
-    )
-    .order_by(asc(BoardACL.priority))
-    .all()
-  )
-
-  for acl in acls:
-    if acl.qualification in aud:
+  for qualification in board_registry.get_acl(board_id, action, db):
+    if qualification in aud:
       return True
 
   log.debug('ACL has been declined. board_id=\"{}\", action=\"{}\" aud=\"{}\"'.format(board_id, action, aud))
@@ -116,6 +92,7 @@ def create_board(
   db.add_all(board_acls)
 
   db.commit()
+  board_registry.notify_board_changed(db)
   return new_board.board_id
 
 
@@ -123,7 +100,7 @@ def get_board(
   board_id: PyUUID,
   db: Session
 ):
-  board: Type[Board] = db.query(Board).filter(Board.board_id == board_id).first()
+  board = board_registry.get_board_entry(board_id, db)
 
   if board is None:
     return None
@@ -139,7 +116,7 @@ def get_board_by_name(
   aud: list[str],
   db: Session
 ):
-  board: Type[Board] = db.query(Board).filter(Board.name == name).first()
+  board = board_registry.get_board_entry_by_name(name, db)
 
   if board is None:
     return None
@@ -2,14 +2,18 @@ import logging
 from uuid import UUID
 
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select, tuple_, update
+from sqlalchemy.orm import Session, joinedload
 
 from core.school.school_service import get_school_from_neis_code
+from core.social import ranking_service, search_service
 from core.social.board_service import check_acl_by_aud
 from core.user.user_info_service import role_to_school
 from models.database_models.relational.social.board_acl import BoardACLAction
 from models.database_models.relational.social.comment import Comment
+from models.database_models.relational.social.post import Post
 from models.request_models.social.comment_request import CommentAdditionRequest
+from models.response_models.social.comment_response import CommentItem
 
 log = logging.getLogger(__name__)
 
@@ -17,14 +21,15 @@ log = logging.getLogger(__name__)
 def get_organized_comments(
   post_id: UUID,
   db: Session
-):
+) -> list[CommentItem]:
   comments = (
     db.query(Comment)
+    .options(joinedload(Comment.school))
     .filter(Comment.post_id == post_id)
     .all()
   )
 
-  ret = []
+  ret: list[CommentItem] = []
   peoples = []
   for comment in comments:
     user_id = comment.author_id
@@ -34,7 +39,7 @@ def get_organized_comments(
     ret.append({
       'author': peoples.index(user_id),
       'content': comment.content,
-      'writeTime': comment.write_time.isoformat(),
+      'writeTime': comment.write_time,
       'edited': comment.edited,
       'upvote': comment.upvote,
       'downvote': comment.downvote,
@@ -63,11 +68,27 @@ def leave_comment(
     content=content,
     author_id=sub,
     school_id=school.school_id,
+    search_vector=search_service.search_vector_of(None, content)
   )
 
   db.add(comment)
+  # counters are kept in the same transaction as the comment itself
+  counters = db.execute(
+    update(Post)
+    .where(Post.post_id == post_id)
+    .values(
+      comment_count=Post.comment_count + 1,
+      last_activity=func.now()
+    )
+    .returning(Post.board_id, Post.upvote, Post.downvote, Post.views, Post.comment_count, Post.write_time)
+    .execution_options(synchronize_session=False)
+  ).first()
   db.commit()
 
+  if counters is not None:
+    ranking_service.update_post_rank(counters.board_id, post_id, counters.upvote, counters.downvote, counters.views,
+                                     counters.comment_count, counters.write_time)
+
 
 def delete_comment(
   sub: UUID,
@@ -97,9 +118,21 @@ def delete_comment(
     raise HTTPException(status_code=403, detail='Forbidden')
 
   log.debug('Deleting comment. user_id=\"{}\" comment_id=\"{}\"'.format(sub, comment_id))
+  post_id = comment.post_id
   db.delete(comment)
+  counters = db.execute(
+    update(Post)
+    .where(Post.post_id == post_id)
+    .values(comment_count=func.greatest(Post.comment_count - 1, 0))
+    .returning(Post.board_id, Post.upvote, Post.downvote, Post.views, Post.comment_count, Post.write_time)
+    .execution_options(synchronize_session=False)
+  ).first()
   db.commit()
 
+  if counters is not None:
+    ranking_service.update_post_rank(counters.board_id, post_id, counters.upvote, counters.downvote, counters.views,
+                                     counters.comment_count, counters.write_time)
+
 
 def edit_comment(
   sub: UUID,
@@ -133,5 +166,44 @@ def edit_comment(
 
   log.debug('Editing comment. user_id=\"{}\" comment_id=\"{}\"'.format(sub, comment_id))
   comment.content = content
+  comment.search_vector = search_service.search_vector_of(None, content)
   comment.edited = True
   db.commit()
+
+
+def backfill_post_counters(db: Session, batch: int = 1000) -> int:
+  # fills comment_count and last_activity of posts written before the columns existed, or repairs them.
+  # a post without comments was last active when it was written
+  comments = (
+    select(func.count(Comment.comment_id))
+    .where(Comment.post_id == Post.post_id)
+    .scalar_subquery()
+  )
+  last_comment = (
+    select(func.max(Comment.write_time))
+    .where(Comment.post_id == Post.post_id)
+    .scalar_subquery()
+  )
+
+  count = 0
+  last = None
+  while True:
+    query = db.query(Post.post_id, Post.write_time)
+    if last is not None:
+      query = query.filter(tuple_(Post.write_time, Post.post_id) > tuple_(*last))
+    rows = query.order_by(Post.write_time, Post.post_id).limit(batch).all()
+
+    if len(rows) == 0:
+      return count
+
+    db.execute(
+      update(Post)
+      .where(Post.post_id.in_([row.post_id for row in rows]))
+      .values(comment_count=comments, last_activity=func.coalesce(last_comment, Post.write_time))
+      .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    last = (rows[-1].write_time, rows[-1].post_id)
+
+    count += len(rows)
+    log.info('Post counters backfilled. rows=\"{}\"'.format(count))
@@ -0,0 +1,238 @@
+import hashlib
+import io
+import logging
+from typing import Optional
+from uuid import UUID as PyUUID
+
+from PIL import Image, ImageOps
+from fastapi import HTTPException, UploadFile
+from sqlalchemy import func, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, undefer_group
+from starlette.concurrency import run_in_threadpool
+
+from core.social.blob_store import get_store
+from core.user.user_info_service import role_to_school
+from models.database_models.relational.social.image import PostImage
+from models.database_models.relational.social.post import Post
+
+log = logging.getLogger(__name__)
+
+IMAGE_MAX_SIZE = 10485760
+IMAGE_CHUNK_SIZE = 65536
+IMAGE_MAX_PIXELS = 40000000
+
+# longest edge of each pre-generated variant. every variant is re-encoded, which also strips EXIF (GPS etc.)
+IMAGE_VARIANTS = {
+  'small': 320,
+  'medium': 1024,
+  'large': 2048,
+}
+VARIANT_FORMAT = 'WEBP'
+VARIANT_CONTENT_TYPE = 'image/webp'
+VARIANT_QUALITY = 80
+
+IMAGE_SIGNATURES = [
+  (0, b'\x89PNG\r\n\x1a\n', 'image/png'),
+  (0, b'\xff\xd8\xff', 'image/jpeg'),
+  (8, b'WEBP', 'image/webp'),
+]
+
+Image.MAX_IMAGE_PIXELS = IMAGE_MAX_PIXELS
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+  for offset, signature, content_type in IMAGE_SIGNATURES:
+    if head[offset:offset + len(signature)] == signature:
+      if content_type == 'image/webp' and not head.startswith(b'RIFF'):
+        continue
+      return content_type
+  return None
+
+
+def blob_key(sha256: str, variant: str) -> str:
+  # content addressed, so a key never changes meaning and can be cached forever
+  return '{}/{}/{}.webp'.format(sha256[:2], sha256, variant)
+
+
+async def read_image(file: UploadFile, user_id) -> (bytes, str, str):
+  if file.size is not None and file.size > IMAGE_MAX_SIZE:
+    log.debug('Image is too large. user_uid=\"{}\" size=\"{}\"'.format(user_id, file.size))
+    raise HTTPException(status_code=400, detail='File too large')
+
+  content = bytearray()
+  digest = hashlib.sha256()
+
+  while True:
+    chunk = await file.read(IMAGE_CHUNK_SIZE)
+    if not chunk:
+      break
+
+    if len(content) + len(chunk) > IMAGE_MAX_SIZE:
+      log.debug('Image is too large. user_uid=\"{}\" read=\"{}\"'.format(user_id, len(content) + len(chunk)))
+      raise HTTPException(status_code=400, detail='File too large')
+
+    content += chunk
+    digest.update(chunk)
+
+    if len(content) >= 12 and sniff_image_type(bytes(content[:12])) is None:
+      break
+
+  content_type = sniff_image_type(bytes(content[:12]))
+  if content_type is None:
+    log.debug('Invalid image type was uploaded. user_uid=\"{}\" content_type=\"{}\"'.format(user_id, file.content_type))
+    raise HTTPException(status_code=400, detail='Invalid file type')
+
+  return bytes(content), digest.hexdigest(), content_type
+
+
+def render_variants(content: bytes) -> (int, int, dict[str, bytes]):
+  try:
+    with Image.open(io.BytesIO(content)) as image:
+      image = ImageOps.exif_transpose(image)
+      if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+      width, height = image.size
+
+      variants = {}
+      for variant, edge in IMAGE_VARIANTS.items():
+        resized = image.copy()
+        resized.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+
+        buffer = io.BytesIO()
+        resized.save(buffer, VARIANT_FORMAT, quality=VARIANT_QUALITY, method=4)
+        variants[variant] = buffer.getvalue()
+  except (OSError, Image.DecompressionBombError) as e:
+    log.debug('Image could not be decoded. error=\"{}\"'.format(e))
+    raise HTTPException(status_code=400, detail='Invalid image')
+
+  return width, height, variants
+
+
+async def upload_image(
+  sub: PyUUID,
+  aud: list[str],
+  file: UploadFile,
+  db: Session
+) -> PostImage:
+  student_verified, _ = role_to_school(aud)
+  if not student_verified:
+    raise HTTPException(403, "User is not a student")
+
+  content, sha256, content_type = await read_image(file, sub)
+
+  existing = db.query(PostImage).filter(PostImage.sha256 == sha256).first()
+  if existing is not None:
+    log.debug('Image already stored. user_uid=\"{}\", image_id=\"{}\"'.format(sub, existing.image_id))
+    return existing
+
+  # decoding and resizing are cpu bound. keep them off the event loop
+  width, height, variants = await run_in_threadpool(render_variants, content)
+
+  store = get_store()
+  for variant, data in variants.items():
+    await run_in_threadpool(store.put, blob_key(sha256, variant), data, VARIANT_CONTENT_TYPE)
+
+  image = PostImage(
+    upload_by=sub,
+    sha256=sha256,
+    content_type=content_type,
+    size=len(content),
+    width=width,
+    height=height
+  )
+  db.add(image)
+  try:
+    db.commit()
+  except IntegrityError:
+    # same bytes uploaded concurrently. blobs are identical, so use the row that won
+    db.rollback()
+    return db.query(PostImage).filter(PostImage.sha256 == sha256).one()
+
+  log.debug('Image stored. user_uid=\"{}\", image_id=\"{}\", sha256=\"{}\"'.format(sub, image.image_id, sha256))
+  return image
+
+
+def image_urls(image: PostImage) -> dict[str, str]:
+  store = get_store()
+  urls = {}
+  for variant in IMAGE_VARIANTS:
+    key = blob_key(image.sha256, variant)
+    urls[variant] = store.url(key) or '/api/social/image/{}/{}'.format(image.sha256, variant)
+  return urls
+
+
+def get_image(image_id: PyUUID, db: Session) -> PostImage:
+  image = db.query(PostImage).filter(PostImage.image_id == image_id).first()
+  if image is None:
+    raise HTTPException(404, "Image not found")
+  return image
+
+
+def get_images(image_ids: list[PyUUID], db: Session) -> list[PostImage]:
+  if not image_ids:
+    return []
+  images = db.query(PostImage).filter(PostImage.image_id.in_(image_ids)).all()
+  by_id = {image.image_id: image for image in images}
+  return [by_id[image_id] for image_id in image_ids if image_id in by_id]
+
+
+def migrate_legacy_images(db: Session, batch: int = 50) -> (int, int):
+  # moves images uploaded before the blob store out of the inline BYTEA column: renders their variants, fills
+  # the metadata columns and drops the bytes. a legacy image whose bytes are already stored under another row
+  # is merged into that row. images that cannot be decoded are left as they are and counted as skipped
+  store = get_store()
+  migrated = 0
+  skipped = 0
+  last = None
+  while True:
+    query = (
+      db.query(PostImage)
+      .options(undefer_group('image'))
+      .filter(PostImage.sha256.is_(None), PostImage.image.is_not(None))
+    )
+    if last is not None:
+      query = query.filter(tuple_(PostImage.upload_at, PostImage.image_id) > tuple_(*last))
+    images = query.order_by(PostImage.upload_at, PostImage.image_id).limit(batch).all()
+
+    if len(images) == 0:
+      return migrated, skipped
+    last = (images[-1].upload_at, images[-1].image_id)
+
+    for image in images:
+      content = bytes(image.image)
+      content_type = sniff_image_type(content[:12])
+      try:
+        if content_type is None:
+          raise HTTPException(status_code=400, detail='Invalid file type')
+        width, height, variants = render_variants(content)
+      except HTTPException:
+        log.warning('Legacy image could not be migrated. image_id=\"{}\"'.format(image.image_id))
+        skipped += 1
+        continue
+
+      sha256 = hashlib.sha256(content).hexdigest()
+      existing = db.query(PostImage).filter(PostImage.sha256 == sha256).first()
+      if existing is not None:
+        db.execute(
+          update(Post)
+          .where(Post.images.any(image.image_id))
+          .values(images=func.array_replace(Post.images, image.image_id, existing.image_id))
+          .execution_options(synchronize_session=False)
+        )
+        db.delete(image)
+        log.info('Legacy image merged. image_id=\"{}\", into=\"{}\"'.format(image.image_id, existing.image_id))
+      else:
+        for variant, data in variants.items():
+          store.put(blob_key(sha256, variant), data, VARIANT_CONTENT_TYPE)
+        image.sha256 = sha256
+        image.content_type = content_type
+        image.size = len(content)
+        image.width = width
+        image.height = height
+        image.image = None
+      # every image is committed on its own, its blobs are already stored
+      db.commit()
+      migrated += 1
+
+    log.info('Legacy images migrated. migrated=\"{}\", skipped=\"{}\"'.format(migrated, skipped))
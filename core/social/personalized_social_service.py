@@ -1,18 +1,34 @@
 import logging
+import threading
 from uuid import UUID
 
+from cachetools import TTLCache
 from fastapi import HTTPException
-from sqlalchemy import cast
-from sqlalchemy.dialects.postgresql import TEXT
+from sqlalchemy import and_
 from sqlalchemy.orm import Session
 from sqlalchemy.sql.operators import or_
 
-from core.user.user_info_service import get_identity_by_userid, role_to_school
+from core import cache_version
+from core.config import config
+from core.user.identity_cache import get_snapshot
+from core.user.user_info_service import role_to_school
 from models.database_models.relational.social.board import Board
 from models.database_models.relational.social.stared_boards import StaredBoards
 
 log = logging.getLogger(__name__)
 
+FEATURED_BOARD_TTL = config.get('cache', {}).get('featured_board_ttl', 30)
+FEATURED_VERSION_KEY = 'social:featured:version:{}'
+
+# the home screen asks for this on every app open. short ttl, keyed by a per user version in redis that
+# star/unstar bumps, so every worker drops the list at once.
+_featured_boards = TTLCache(maxsize=10000, ttl=FEATURED_BOARD_TTL)
+_featured_boards_lock = threading.Lock()
+
+
+def invalidate_personalized_board(sub: UUID):
+  cache_version.bump(FEATURED_VERSION_KEY.format(sub), FEATURED_BOARD_TTL)
+
 
 def star_board(
   sub: UUID,
@@ -44,42 +60,53 @@ def get_user_personalized_board(
   sub: UUID,
   db: Session
 ):
-  ret_body = []
-
-  identity = get_identity_by_userid(sub, db)
+  # the role is checked before the cache, so a withdrawn verification takes effect at once.
+  # the school is part of the key for the same reason
+  identity = get_snapshot(sub, db)
   student_verified, neis_code = role_to_school(identity.role)
 
   if not student_verified:
     raise HTTPException(status_code=403, detail='Forbidden')
 
+  version = cache_version.current(FEATURED_VERSION_KEY.format(sub))
+  key = (sub, neis_code, version)
+  if version is not None:
+    with _featured_boards_lock:
+      cached = _featured_boards.get(key)
+    if cached is not None:
+      log.debug("User personalized boards cache hit: sub=\"{}\"".format(sub))
+      return cached
+
+  # the outer join below finds the starred boards
+  stared_by_user = StaredBoards.user_id.isnot(None)
+  # tag @> ARRAY[neis_code] is an exact element match and uses the GIN index on tag
+  criteria = or_(stared_by_user, Board.tag.contains([neis_code])) if neis_code is not None else stared_by_user
+
   boards = (
-    db.query(Board)
-    .filter(
-      or_(
-        Board.board_id.in_(
-          db.query(StaredBoards.board_id)
-          .filter(StaredBoards.user_id == sub)
-        ),
-        cast(Board.tag, TEXT).contains(neis_code)
+    db.query(Board.board_id, Board.name, StaredBoards.user_id.isnot(None).label('stared'))
+    .outerjoin(
+      StaredBoards,
+      and_(
+        StaredBoards.board_id == Board.board_id,
+        StaredBoards.user_id == sub
       )
     )
+    .filter(criteria)
     .all()
   )
 
+  ret_body = []
   for board in boards:
-    exists_query = (
-      db.query(StaredBoards)
-      .filter_by(user_id=sub, board_id=board.board_id)
-      .exists()
-    )
-    exists = db.query(exists_query).scalar()
-
     ret_body.append({
       'boardName': board.name,
       'boardUUID': str(board.board_id),
-      'stared': exists
+      'stared': board.stared
     })
 
   log.debug("User personalized boards are: sub=\"{}\", count:\"{}\"".format(sub, len(ret_body)))
 
+  if version is not None:
+    with _featured_boards_lock:
+      _featured_boards[key] = ret_body
+
   return ret_body
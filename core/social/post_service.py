@@ -1,24 +1,40 @@
 import logging
+import threading
 import uuid
-from typing import Type
+from datetime import datetime
+from typing import Type, Optional
 from uuid import UUID as PyUUID
 
+from cachetools import TTLCache
 from fastapi import HTTPException
-from sqlalchemy import exists
-from sqlalchemy.orm import Session, InstrumentedAttribute
+from sqlalchemy import exists, or_, select, tuple_
+from sqlalchemy.orm import Session, InstrumentedAttribute, undefer_group
 
+from core import cache_version
+from core.config import config
 from core.school import neis_school_service
+from core.social import ranking_service, search_service
 from core.social.board_service import check_acl, check_acl_by_aud
 from core.user.user_info_service import role_to_school
 from models.database_models.relational.identity import Identity
 from models.database_models.relational.social.board import Board
 from models.database_models.relational.social.board_acl import BoardACLAction
 from models.database_models.relational.social.post import Post
+from models.database_models.relational.social.stared_boards import StaredBoards
 from models.database_models.relational.social.votes import Votes
 from models.request_models.social.post_request import UploadPostRequest, UpdatePostRequest
 
 log = logging.getLogger(__name__)
 
+VOTE_CACHE_TTL = config.get('cache', {}).get('vote_ttl', 10)
+VOTE_VERSION_KEY = 'social:votes:version:{}'
+
+# caller's own votes on a page of posts, keyed by (sub, vote version, post ids of the page). an entry is
+# written once and expires with the ttl. vote_post() bumps the caller's version in redis, so no worker serves
+# votes cached before it
+_votes = TTLCache(maxsize=10000, ttl=VOTE_CACHE_TTL)
+_votes_lock = threading.Lock()
+
 
 def upload_post(
   sub: PyUUID,
@@ -51,11 +67,13 @@ def upload_post(
 
     title=body.title,
     content=body.content,
-    images=body.image
+    images=body.image,
+    search_vector=search_service.search_vector_of(body.title, body.content)
   )
 
   db.add(new_post)
   db.commit()
+  ranking_service.update_rank_of(new_post)
 
   return new_post.post_id
 
@@ -72,7 +90,7 @@ def delete_post(sub, aud, post_id, db):
     return
 
   # then check if user is a moderator
-  if check_acl(sub, post.board_id, BoardACLAction.DELETE, db):
+  if check_acl_by_aud(aud, post.board_id, BoardACLAction.DELETE, db):
     log.debug("Deleted post as moderator. post_id=\"{post_id}\", deleted_by=\"{sub}\"".format(post_id=post_id, sub=sub))
     complete_delete(post, db)
     return
@@ -81,8 +99,10 @@ def delete_post(sub, aud, post_id, db):
 
 
 def complete_delete(post, db):
+  board_id, post_id = post.board_id, post.post_id
   db.delete(post)
   db.commit()
+  ranking_service.remove_post_rank(board_id, post_id)
 
 
 def edit_post(sub, aud, post_id, body, db):
@@ -94,7 +114,7 @@ def edit_post(sub, aud, post_id, body, db):
     log.debug("Edited post as author. post_id=\"{post_id}\", edited_by=\"{sub}\"".format(post_id=post_id, sub=sub))
     complete_edit(post, body, db)
     return
-  if check_acl(sub, post.board_id, BoardACLAction.UPDATE, db):
+  if check_acl_by_aud(aud, post.board_id, BoardACLAction.UPDATE, db):
     log.debug("Edited post as moderator. post_id=\"{post_id}\", edited_by=\"{sub}\"".format(post_id=post_id, sub=sub))
     complete_edit(post, body, db)
     return
@@ -110,6 +130,7 @@ def complete_edit(
   post.title = body.title
   post.content = body.content
   post.images = body.image
+  post.search_vector = search_service.search_vector_of(body.title, body.content)
   post.edited = True
   db.commit()
 
@@ -124,6 +145,7 @@ def get_posts(
     if head is None:
       return (
         db.query(Post)
+        .options(undefer_group('body'))
         .filter(Post.board_id == board_id)
         .order_by(Post.write_time.desc())
         .limit(10)
@@ -155,6 +177,7 @@ def get_posts(
 
       return (
         db.query(Post)
+        .options(undefer_group('body'))
         .filter(
           Post.board_id == board_id,
           Post.write_time < write_time
@@ -167,13 +190,79 @@ def get_posts(
   raise HTTPException(403, "User does not have permission to list this board")
 
 
+def get_hot_posts(
+  aud: list[str],
+  board_id: PyUUID,
+  start: int,
+  size: int,
+  db: Session
+) -> list[Post]:
+  if not check_acl_by_aud(aud, board_id, BoardACLAction.READ, db):
+    raise HTTPException(403, "User does not have permission to list this board")
+
+  post_ids = ranking_service.get_hot_post_ids(board_id, start, size, db)
+  if len(post_ids) == 0:
+    return []
+
+  posts = (
+    db.query(Post)
+    .options(undefer_group('body'))
+    .filter(Post.post_id.in_(post_ids), Post.board_id == board_id)
+    .all()
+  )
+
+  # keep the ranking order. posts deleted since they were ranked are simply skipped
+  by_id = {post.post_id: post for post in posts}
+  return [by_id[post_id] for post_id in post_ids if post_id in by_id]
+
+
+def get_feed(
+  sub: PyUUID,
+  aud: list[str],
+  cursor: Optional[tuple[datetime, PyUUID]],
+  size: int,
+  db: Session
+) -> list[Post]:
+  # one indexed query over every followed board instead of one listing per board on the client.
+  # followed boards are the starred ones and the boards of the caller's school. READ is checked once per
+  # board rather than per post, which also drops boards the caller lost access to since starring them
+  _, neis_code = role_to_school(aud)
+  followed = Board.board_id.in_(select(StaredBoards.board_id).where(StaredBoards.user_id == sub))
+  if neis_code is not None:
+    followed = or_(followed, Board.tag.contains([neis_code]))
+
+  boards = [
+    board_id
+    for (board_id,) in db.query(Board.board_id).filter(followed).all()
+    if check_acl_by_aud(aud, board_id, BoardACLAction.READ, db)
+  ]
+
+  if len(boards) == 0:
+    return []
+
+  query = (
+    db.query(Post)
+    .options(undefer_group('body'))
+    .filter(Post.board_id.in_(boards))
+  )
+  if cursor is not None:
+    query = query.filter(tuple_(Post.write_time, Post.post_id) < tuple_(*cursor))
+
+  return (
+    query
+    .order_by(Post.write_time.desc(), Post.post_id.desc())
+    .limit(size)
+    .all()
+  )
+
+
 def get_post(
   sub: PyUUID,
   aud: list[str],
   post_id: PyUUID,
   db: Session
 ):
-  post = db.query(Post).filter(Post.post_id == post_id).first()
+  post = db.query(Post).options(undefer_group('body')).filter(Post.post_id == post_id).first()
   vote = db.query(Votes).filter(Votes.post_id == post_id, Votes.user_id == sub).first()
 
   if check_acl_by_aud(aud, post.board_id, BoardACLAction.READ, db):
@@ -256,6 +345,8 @@ def vote_post(
       end_vote = vote
 
     db.commit()
+    invalidate_votes(sub)
+    ranking_service.update_rank_of(post)
 
     return post.upvote, post.downvote, end_vote
 
@@ -264,6 +355,40 @@ def vote_post(
     raise HTTPException(403, "User does not have permission to vote on this post")
 
 
+def invalidate_votes(sub: PyUUID):
+  cache_version.bump(VOTE_VERSION_KEY.format(sub), VOTE_CACHE_TTL)
+
+
+def get_votes_for_posts(
+  sub: PyUUID,
+  post_ids: list[PyUUID],
+  db: Session
+) -> dict[PyUUID, Optional[bool]]:
+  if len(post_ids) == 0:
+    return {}
+
+  version = cache_version.current(VOTE_VERSION_KEY.format(sub))
+  key = (sub, version, tuple(post_ids))
+  if version is not None:
+    with _votes_lock:
+      cached = _votes.get(key)
+    if cached is not None:
+      return cached
+
+  rows = (
+    db.query(Votes.post_id, Votes.vote)
+    .filter(Votes.user_id == sub, Votes.post_id.in_(post_ids))
+    .all()
+  )
+  votes = {post_id: None for post_id in post_ids}
+  votes.update({row.post_id: row.vote for row in rows})
+
+  if version is not None:
+    with _votes_lock:
+      _votes[key] = votes
+  return votes
+
+
 def get_board_by_post(
   post_id: PyUUID,
   db: Session
@@ -0,0 +1,118 @@
+import logging
+import math
+from datetime import datetime
+from uuid import UUID as PyUUID
+
+from redis import RedisError
+from sqlalchemy.orm import Session
+
+from core.config import config
+from database.database import redis_db
+from models.database_models.relational.social.post import Post
+
+log = logging.getLogger(__name__)
+
+HOT_KEY = 'social:hot:{}'
+# set by rebuild_board_rank. a board whose set was never seeded from postgres (existing boards after a deploy,
+# a flushed redis) may already hold the few posts touched since, so the set size cannot tell
+SEEDED_KEY = 'social:hot:seeded:{}'
+HOT_TOP_K = config.get('ranking', {}).get('top_k', 500)
+
+COMMENT_WEIGHT = 2.0
+VIEW_WEIGHT = 0.05
+# a post needs 10x the engagement to outrank one written DECAY_SECONDS later
+DECAY_SECONDS = 45000
+EPOCH = datetime(2024, 1, 1)
+
+
+def hot_score(upvote: int, downvote: int, views: int, comment_count: int, write_time: datetime) -> float:
+  # log-scaled engagement plus a term that grows with write time. newer posts win unless older ones
+  # have an order of magnitude more engagement, so scores never need to be recomputed as time passes.
+  engagement = upvote - downvote + COMMENT_WEIGHT * comment_count + VIEW_WEIGHT * views
+  order = math.log10(max(abs(engagement), 1))
+  sign = 1 if engagement > 0 else -1 if engagement < 0 else 0
+  return round(sign * order + (write_time - EPOCH).total_seconds() / DECAY_SECONDS, 7)
+
+
+def update_post_rank(
+  board_id: PyUUID,
+  post_id: PyUUID,
+  upvote: int,
+  downvote: int,
+  views: int,
+  comment_count: int,
+  write_time: datetime
+):
+  key = HOT_KEY.format(board_id)
+  score = hot_score(upvote, downvote, views, comment_count, write_time)
+
+  try:
+    pipe = redis_db.pipeline(transaction=False)
+    pipe.zadd(key, {str(post_id): score})
+    pipe.zremrangebyrank(key, 0, -(HOT_TOP_K + 1))
+    pipe.execute()
+  except RedisError as e:
+    log.warning('Failed to update post rank. post_id=\"{}\", error=\"{}\"'.format(post_id, e))
+    return
+
+  log.debug('Post rank updated. board_id=\"{}\", post_id=\"{}\", score=\"{}\"'.format(board_id, post_id, score))
+
+
+def update_rank_of(post: Post):
+  update_post_rank(post.board_id, post.post_id, post.upvote, post.downvote, post.views, post.comment_count,
+                   post.write_time)
+
+
+def remove_post_rank(board_id: PyUUID, post_id: PyUUID):
+  try:
+    redis_db.zrem(HOT_KEY.format(board_id), str(post_id))
+  except RedisError as e:
+    log.warning('Failed to remove post rank. post_id=\"{}\", error=\"{}\"'.format(post_id, e))
+
+
+def rebuild_board_rank(board_id: PyUUID, db: Session):
+  # seed the set from the most recent posts, merged with whatever was ranked since
+  posts = (
+    db.query(Post)
+    .filter(Post.board_id == board_id)
+    .order_by(Post.write_time.desc())
+    .limit(HOT_TOP_K)
+    .all()
+  )
+
+  key = HOT_KEY.format(board_id)
+  pipe = redis_db.pipeline(transaction=False)
+  if len(posts) > 0:
+    pipe.zadd(key, {
+      str(post.post_id): hot_score(post.upvote, post.downvote, post.views, post.comment_count, post.write_time)
+      for post in posts
+    })
+    pipe.zremrangebyrank(key, 0, -(HOT_TOP_K + 1))
+  pipe.set(SEEDED_KEY.format(board_id), 1)
+  pipe.execute()
+  log.debug('Board rank rebuilt. board_id=\"{}\", posts=\"{}\"'.format(board_id, len(posts)))
+
+
+def get_hot_post_ids(board_id: PyUUID, start: int, size: int, db: Session) -> list[PyUUID]:
+  key = HOT_KEY.format(board_id)
+
+  try:
+    # both keys must be there, either may have been evicted on its own. boards without posts have no set
+    # and are re-read each time, which is one empty indexed query
+    if start == 0 and redis_db.exists(SEEDED_KEY.format(board_id), key) < 2:
+      rebuild_board_rank(board_id, db)
+    post_ids = redis_db.zrevrange(key, start, start + size - 1)
+  except RedisError as e:
+    # fall back to recency so the listing keeps working without redis
+    log.warning('Failed to read hot ranking. board_id=\"{}\", error=\"{}\"'.format(board_id, e))
+    rows = (
+      db.query(Post.post_id)
+      .filter(Post.board_id == board_id)
+      .order_by(Post.write_time.desc())
+      .offset(start)
+      .limit(size)
+      .all()
+    )
+    return [row.post_id for row in rows]
+
+  return [PyUUID(post_id) for post_id in post_ids]
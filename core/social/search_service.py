@@ -0,0 +1,237 @@
+import logging
+import re
+import unicodedata
+from typing import Optional
+from uuid import UUID as PyUUID
+
+from fastapi import HTTPException
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import Session, undefer_group
+
+from core.social import board_registry
+from core.social.board_service import check_acl_by_aud
+from models.database_models.relational.social.board_acl import BoardACLAction
+from models.database_models.relational.social.comment import Comment
+from models.database_models.relational.social.post import Post
+
+log = logging.getLogger(__name__)
+
+SEARCH_CONFIG = 'simple'
+MAX_QUERY_TERMS = 16
+MIN_QUERY_LENGTH = 1
+MAX_QUERY_LENGTH = 100
+SNIPPET_LENGTH = 120
+
+_HANGUL = '가-힣ㄱ-ㆎ'
+_WORD = re.compile(r'[{h}]+|[^\W_{h}]+'.format(h=_HANGUL))
+_HANGUL_RUN = re.compile(r'^[{h}]+$'.format(h=_HANGUL))
+
+
+def _normalize(text: str) -> str:
+  return unicodedata.normalize('NFKC', text).lower()
+
+
+def _words(text: str) -> list[str]:
+  return _WORD.findall(_normalize(text))
+
+
+def tokenize(text: Optional[str]) -> list[str]:
+  # korean has no reliable word boundaries (particles are glued to nouns), so hangul runs are indexed as
+  # overlapping bigrams: "학교에서" -> 학교 교에 에서. other scripts are indexed as whole lowercase words.
+  if not text:
+    return []
+
+  tokens = []
+  for word in _words(text):
+    if _HANGUL_RUN.match(word) and len(word) > 1:
+      tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    else:
+      tokens.append(word)
+  return tokens
+
+
+def search_vector_of(title: Optional[str], content: Optional[str]):
+  # tokens are produced here and stored with the 'simple' config, which only lowercases.
+  # title matches are weighted above body matches.
+  title_vector = func.setweight(func.to_tsvector(SEARCH_CONFIG, ' '.join(tokenize(title))), 'A')
+  content_vector = func.setweight(func.to_tsvector(SEARCH_CONFIG, ' '.join(tokenize(content))), 'B')
+  return title_vector.op('||')(content_vector)
+
+
+def _query_of(q: str):
+  terms = []
+  for word in _words(q):
+    if _HANGUL_RUN.match(word) and len(word) == 1:
+      # a single syllable can only match as the head of a bigram
+      terms.append(word + ':*')
+    elif _HANGUL_RUN.match(word):
+      terms.extend(word[i:i + 2] for i in range(len(word) - 1))
+    else:
+      terms.append(word)
+
+  # terms only contain word characters, so they are safe to join into tsquery syntax
+  terms = list(dict.fromkeys(terms))[:MAX_QUERY_TERMS]
+  if len(terms) == 0:
+    return None
+  return func.to_tsquery(SEARCH_CONFIG, ' & '.join(terms))
+
+
+def _normalize_with_offsets(text: str) -> tuple[str, list[int]]:
+  # _normalize one character at a time, keeping for every normalized character the index of the original one.
+  # NFKC and lower() can change the length ("ﬁ" -> "fi", "①" -> "1", "İ" -> "i̇"), so positions found in the
+  # normalized text are mapped back before they are applied to the original
+  chars = []
+  origin = []
+  for index, char in enumerate(text):
+    normalized = unicodedata.normalize('NFKC', char).lower()
+    chars.append(normalized)
+    origin.extend([index] * len(normalized))
+  return ''.join(chars), origin
+
+
+def snippet(text: str, q: str) -> dict:
+  normalized, origin = _normalize_with_offsets(text)
+  words = sorted(set(_words(q)), key=len, reverse=True)
+
+  # matches as [start, stop) in the original text
+  matches = []
+  for word in words:
+    pos = normalized.find(word)
+    while pos != -1:
+      matches.append((origin[pos], origin[pos + len(word) - 1] + 1))
+      pos = normalized.find(word, pos + len(word))
+
+  first = min((start for start, _ in matches), default=None)
+  begin = 0 if first is None else max(0, first - SNIPPET_LENGTH // 3)
+  end = min(len(text), begin + SNIPPET_LENGTH)
+
+  merged = []
+  for start, stop in sorted(matches):
+    if stop <= begin or start >= end:
+      continue
+    start, stop = max(start, begin) - begin, min(stop, end) - begin
+    if merged and start <= merged[-1][1]:
+      merged[-1][1] = max(merged[-1][1], stop)
+    else:
+      merged.append([start, stop])
+
+  return {
+    'text': text[begin:end],
+    'prefixed': begin > 0,
+    'suffixed': end < len(text),
+    'highlights': merged
+  }
+
+
+def readable_boards(aud: list[str], db: Session) -> list[PyUUID]:
+  return [
+    board.board_id
+    for board in board_registry.get_board_entries(db)
+    if check_acl_by_aud(aud, board.board_id, BoardACLAction.READ, db)
+  ]
+
+
+def _prepare(aud: list[str], q: str, db: Session):
+  q = q.strip() if q is not None else ''
+  if len(q) < MIN_QUERY_LENGTH or len(q) > MAX_QUERY_LENGTH:
+    raise ValueError('Query length out of range')
+
+  query = _query_of(q)
+  if query is None:
+    raise ValueError('Query has no searchable word')
+
+  boards = readable_boards(aud, db)
+  if len(boards) == 0:
+    raise HTTPException(403, "User does not have permission to read any board")
+
+  return q, query, boards
+
+
+def search_posts(
+  aud: list[str],
+  q: str,
+  start: int,
+  size: int,
+  db: Session
+) -> list[tuple[Post, dict]]:
+  q, query, boards = _prepare(aud, q, db)
+  rank = func.ts_rank_cd(Post.search_vector, query)
+
+  posts = (
+    db.query(Post)
+    .options(undefer_group('body'))
+    .filter(
+      Post.search_vector.op('@@')(query),
+      Post.board_id.in_(boards)
+    )
+    .order_by(rank.desc(), Post.write_time.desc())
+    .offset(start)
+    .limit(size)
+    .all()
+  )
+
+  log.debug('Posts searched. q=\"{}\", start=\"{}\", found=\"{}\"'.format(q, start, len(posts)))
+  return [(post, snippet(post.content, q)) for post in posts]
+
+
+def search_comments(
+  aud: list[str],
+  q: str,
+  start: int,
+  size: int,
+  db: Session
+) -> list[tuple[Comment, str, dict]]:
+  q, query, boards = _prepare(aud, q, db)
+  rank = func.ts_rank_cd(Comment.search_vector, query)
+
+  rows = (
+    db.query(Comment, Post.title)
+    .join(Post, Post.post_id == Comment.post_id)
+    .filter(
+      Comment.search_vector.op('@@')(query),
+      Post.board_id.in_(boards)
+    )
+    .order_by(rank.desc(), Comment.write_time.desc())
+    .offset(start)
+    .limit(size)
+    .all()
+  )
+
+  log.debug('Comments searched. q=\"{}\", start=\"{}\", found=\"{}\"'.format(q, start, len(rows)))
+  return [(comment, title, snippet(comment.content, q)) for comment, title in rows]
+
+
+def _reindex_table(model, key, document, db: Session, batch: int, rebuild: bool) -> int:
+  count = 0
+  last = None
+
+  while True:
+    query = db.query(model)
+    if model is Post:
+      query = query.options(undefer_group('body'))
+    if not rebuild:
+      query = query.filter(model.search_vector.is_(None))
+    if last is not None:
+      query = query.filter(tuple_(model.write_time, key) > tuple_(*last))
+    rows = query.order_by(model.write_time, key).limit(batch).all()
+
+    if len(rows) == 0:
+      return count
+
+    for row in rows:
+      row.search_vector = document(row)
+    last = (rows[-1].write_time, getattr(rows[-1], key.key))
+    db.commit()
+
+    count += len(rows)
+    log.info('Search index rebuilt. table=\"{}\", rows=\"{}\"'.format(model.__tablename__, count))
+
+
+def reindex(db: Session, batch: int = 1000, rebuild: bool = False) -> int:
+  # backfills rows written before the search columns existed.
+  # with rebuild every row is indexed again, which is needed after the tokenizer changes.
+  return (
+    _reindex_table(Post, Post.post_id, lambda post: search_vector_of(post.title, post.content), db, batch, rebuild) +
+    _reindex_table(Comment, Comment.comment_id, lambda comment: search_vector_of(None, comment.content), db, batch,
+                   rebuild)
+  )
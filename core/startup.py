@@ -0,0 +1,20 @@
+import logging
+import sys
+import time
+
+from core.config import config
+
+log = logging.getLogger(__name__)
+
+IMPORT_BUDGET = config.get('startup', {}).get('import_budget_ms', 2000) / 1000
+
+
+def report(import_seconds: float, lifespan_begin: float):
+  # logged once per worker when it becomes ready. python -m benchmarks.import_time breaks the import time down
+  lifespan_seconds = time.perf_counter() - lifespan_begin
+  log.info('Startup timings. import_ms=\"{:.0f}\", lifespan_ms=\"{:.0f}\", modules=\"{}\"'.format(
+    import_seconds * 1000, lifespan_seconds * 1000, len(sys.modules)))
+
+  if import_seconds > IMPORT_BUDGET:
+    log.warning('Import time is over budget. import_ms=\"{:.0f}\", budget_ms=\"{:.0f}\"'.format(
+      import_seconds * 1000, IMPORT_BUDGET * 1000))
@@ -0,0 +1,159 @@
+import importlib
+import logging
+from contextlib import nullcontext
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+
+from core.config import config
+
+log = logging.getLogger(__name__)
+
+# opentelemetry is optional. without it, or with tracing.enabled off, every helper here is a no-op
+TRACING_CONFIG = config.get('tracing', {})
+
+_tracer = None
+_trace = None
+_NOOP = nullcontext()
+
+
+def setup_tracing():
+  global _tracer, _trace
+
+  if not TRACING_CONFIG.get('enabled', False):
+    return
+
+  try:
+    from opentelemetry import trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+  except ImportError:
+    log.warning('Tracing is enabled but opentelemetry-sdk is not installed. tracing disabled')
+    return
+
+  ratio = float(TRACING_CONFIG.get('sample_ratio', 1.0))
+  provider = TracerProvider(
+    resource=Resource.create({'service.name': TRACING_CONFIG.get('service_name', 'blink-backstage')}),
+    sampler=ParentBased(TraceIdRatioBased(ratio))
+  )
+  provider.add_span_processor(BatchSpanProcessor(_exporter()))
+  trace.set_tracer_provider(provider)
+
+  _trace = trace
+  _tracer = trace.get_tracer(__name__)
+  log.info('Tracing enabled. exporter=\"{}\", sample_ratio=\"{}\"'.format(TRACING_CONFIG.get('exporter', 'console'), ratio))
+
+
+def _exporter():
+  name = TRACING_CONFIG.get('exporter', 'console')
+
+  if name == 'console':
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+    return ConsoleSpanExporter()
+
+  if name == 'file':
+    # one span per line, so the file can be grepped or loaded with jq
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+    out = open(TRACING_CONFIG.get('file', 'logs/trace.jsonl'), 'a', encoding='utf-8')
+    return ConsoleSpanExporter(out=out, formatter=lambda span: span.to_json(indent=None) + '\n')
+
+  if name == 'otlp':
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    return OTLPSpanExporter(endpoint=TRACING_CONFIG.get('endpoint'))
+
+  # anything else is a "module:Class" path to a SpanExporter taking no arguments
+  module, _, cls = name.partition(':')
+  return getattr(importlib.import_module(module), cls)()
+
+
+def enabled() -> bool:
+  return _tracer is not None
+
+
+def span(name: str, attributes: dict = None, client: bool = False):
+  if _tracer is None:
+    return _NOOP
+
+  kind = _trace.SpanKind.CLIENT if client else _trace.SpanKind.INTERNAL
+  return _tracer.start_as_current_span(name, kind=kind, attributes=attributes)
+
+
+def start_span(name: str, attributes: dict = None):
+  # for callers that cannot wrap the work in a with block, like the SQLAlchemy cursor events.
+  # the span is not made current, so it must not have children
+  if _tracer is None:
+    return None
+  return _tracer.start_span(name, kind=_trace.SpanKind.CLIENT, attributes=attributes)
+
+
+def end_span(started, error: BaseException = None):
+  if started is None:
+    return
+  if error is not None:
+    started.record_exception(error)
+    started.set_status(_trace.Status(_trace.StatusCode.ERROR, type(error).__name__))
+  started.end()
+
+
+class TracedSession(requests.Session):
+  # outbound calls to NEIS and Google. query strings are left out of the span because they carry
+  # api keys and access tokens
+  def request(self, method, url, *args, **kwargs):
+    if _tracer is None:
+      return super().request(method, url, *args, **kwargs)
+
+    parts = urlsplit(url)
+    attributes = {
+      'http.request.method': method.upper(),
+      'server.address': parts.hostname or '',
+      'url.full': urlunsplit((parts.scheme, parts.netloc, parts.path, '', '')),
+    }
+    with span('{} {}'.format(method.upper(), parts.hostname), attributes, client=True) as current:
+      response = super().request(method, url, *args, **kwargs)
+      current.set_attribute('http.response.status_code', response.status_code)
+      if response.status_code >= 500:
+        current.set_status(_trace.Status(_trace.StatusCode.ERROR))
+      return response
+
+
+class TracingMiddleware:
+  # root span of a request. picks up a W3C traceparent header from the caller when there is one
+  def __init__(self, app):
+    self.app = app
+
+  async def __call__(self, scope, receive, send):
+    if _tracer is None or scope['type'] != 'http':
+      await self.app(scope, receive, send)
+      return
+
+    from opentelemetry import propagate
+
+    carrier = {key.decode('latin-1'): value.decode('latin-1') for key, value in scope['headers']}
+    method = scope['method']
+    status = 500
+
+    async def send_wrapper(message):
+      nonlocal status
+      if message['type'] == 'http.response.start':
+        status = message['status']
+      await send(message)
+
+    with _tracer.start_as_current_span(
+      method,
+      context=propagate.extract(carrier),
+      kind=_trace.SpanKind.SERVER,
+      attributes={'http.request.method': method, 'url.path': scope['path']}
+    ) as current:
+      try:
+        await self.app(scope, receive, send_wrapper)
+      finally:
+        # the route is only known once routing has run
+        route = scope.get('route')
+        if route is not None:
+          current.update_name('{} {}'.format(method, route.path))
+          current.set_attribute('http.route', route.path)
+        current.set_attribute('http.response.status_code', status)
+        if status >= 500:
+          current.set_status(_trace.Status(_trace.StatusCode.ERROR))
@@ -0,0 +1,113 @@
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Optional
+from uuid import UUID
+
+from cachetools import TTLCache
+from redis import RedisError
+from sqlalchemy.orm import Session
+
+from core.config import config
+from database.database import redis_db
+from models.database_models.relational.identity import Identity
+from models.database_models.relational.user_preference import UserPreference
+
+log = logging.getLogger(__name__)
+
+IDENTITY_CACHE_TTL = config.get('cache', {}).get('identity_ttl', 0)
+IDENTITY_CACHE_SIZE = config.get('cache', {}).get('identity_size', 10000)
+# bumped by invalidate() so the other workers drop their copy too. it outlives every snapshot cached before the bump
+VERSION_KEY = 'identity:version:{}'
+
+
+@dataclass(frozen=True, slots=True)
+class IdentitySnapshot:
+  user_id: UUID
+  role: tuple[str, ...]
+  grade: Optional[int]
+  classroom: Optional[int]
+  student_number: Optional[int]
+  allergy: Optional[int]
+
+
+# cross-request cache of the fields read on most authenticated calls, as (version, snapshot).
+# disabled unless cache.identity_ttl is set. invalidate() bumps the user's version in redis on every write and
+# a read only serves a snapshot cached under the current version, so every worker sees the write at once.
+# when redis cannot be read the cache is bypassed
+_snapshots: Optional[TTLCache] = TTLCache(maxsize=IDENTITY_CACHE_SIZE, ttl=IDENTITY_CACHE_TTL) \
+  if IDENTITY_CACHE_TTL > 0 else None
+_lock = threading.Lock()
+
+
+def _as_uuid(user_id) -> UUID:
+  return user_id if isinstance(user_id, UUID) else UUID(str(user_id))
+
+
+def load_identity(user_id, db: Session) -> Optional[Identity]:
+  # Session.get() answers from the identity map when the row was already loaded by this request's session
+  return db.get(Identity, _as_uuid(user_id))
+
+
+def _version(uid: UUID) -> Optional[str]:
+  try:
+    return redis_db.get(VERSION_KEY.format(uid)) or '0'
+  except RedisError as e:
+    log.warning('Failed to read identity version. bypass the cache. error=\"{}\"'.format(e))
+    return None
+
+
+def get_snapshot(user_id, db: Session) -> Optional[IdentitySnapshot]:
+  uid = _as_uuid(user_id)
+
+  version = _version(uid) if _snapshots is not None else None
+  if version is not None:
+    with _lock:
+      cached = _snapshots.get(uid)
+    if cached is not None and cached[0] == version:
+      return cached[1]
+
+  row = (
+    db.query(Identity, UserPreference.allergy)
+    .outerjoin(UserPreference, UserPreference.user_id == Identity.user_id)
+    .filter(Identity.user_id == uid)
+    .first()
+  )
+
+  if row is None:
+    return None
+
+  identity, allergy = row
+  snapshot = IdentitySnapshot(
+    user_id=identity.user_id,
+    role=tuple(identity.role),
+    grade=identity.grade,
+    classroom=identity.classroom,
+    student_number=identity.student_number,
+    allergy=allergy
+  )
+
+  if version is not None:
+    with _lock:
+      _snapshots[uid] = (version, snapshot)
+
+  return snapshot
+
+
+def invalidate(user_id):
+  if _snapshots is None:
+    return
+
+  uid = _as_uuid(user_id)
+  with _lock:
+    _snapshots.pop(uid, None)
+
+  try:
+    pipe = redis_db.pipeline(transaction=True)
+    pipe.incr(VERSION_KEY.format(uid))
+    pipe.expire(VERSION_KEY.format(uid), int(IDENTITY_CACHE_TTL * 2) + 1)
+    pipe.execute()
+  except RedisError as e:
+    # the other workers serve their copy until the ttl runs out
+    log.warning('Failed to bump identity version. user_uid=\"{}\", error=\"{}\"'.format(uid, e))
+  log.debug('Identity snapshot invalidated. user_uid=\"{}\"'.format(user_id))
@@ -1,15 +1,33 @@
 import logging
+from typing import Optional
+from uuid import UUID
 
-from sqlalchemy import asc
+from sqlalchemy import asc, tuple_
 from sqlalchemy.orm import Session
 
+from core.pagination import encode_cursor, decode_cursor
 from models.database_models.relational.identity import Identity
 
 log = logging.getLogger(__name__)
 
 
+def identity_summary(identity: Identity) -> dict:
+  return {
+    "userId": str(identity.user_id),
+    "username": identity.username,
+    "email": identity.email,
+    "emailVerified": identity.email_verified,
+    "joinDate": identity.join_date.isoformat(),
+    "lastLogin": identity.last_login.isoformat() if identity.last_login is not None else None,
+    "grade": identity.grade,
+    "classroom": identity.classroom,
+    "studentNumber": identity.student_number,
+    "role": identity.role,
+  }
+
+
 def access_get_user(db: Session, **kwargs):
-  data = (
+  query = (
     db.query(Identity)
     .filter(
       Identity.username.like(
@@ -18,9 +36,13 @@ def access_get_user(db: Session, **kwargs):
         or '%'
       )
     )
-    .filter(
-      kwargs.get('id') is not None and Identity.user_id.is_(kwargs.get('id')) or True
-    )
+  )
+
+  if kwargs.get('id') is not None:
+    query = query.filter(Identity.user_id == UUID(kwargs.get('id')))
+
+  data = (
+    query
     .order_by(asc(Identity.join_date))
     .limit(50)
     .all()
@@ -29,17 +51,60 @@ def access_get_user(db: Session, **kwargs):
   res = []
 
   for identity in data:
-    res.append({
-      "userId": str(identity.user_id),
-      "username": identity.username,
-      "email": identity.email,
-      "emailVerified": identity.email_verified,
-      "joinDate": identity.join_date.isoformat(),
-      "lastLogin": identity.last_login.isoformat(),
-      "grade": identity.grade,
-      "classroom": identity.classroom,
-      "studentNumber": identity.student_number,
-      "role": identity.role,
-    })
+    res.append(identity_summary(identity))
 
   return res
+
+
+def search_users(
+  db: Session,
+  user_id: Optional[UUID],
+  email: Optional[str],
+  name: Optional[str],
+  roles: Optional[list[str]],
+  cursor: Optional[str],
+  limit: int
+) -> dict:
+  # exact lookups go through the primary key / unique email index and never need paging
+  if user_id is not None or email is not None:
+    query = db.query(Identity)
+    if user_id is not None:
+      query = query.filter(Identity.user_id == user_id)
+    if email is not None:
+      query = query.filter(Identity.email == email)
+
+    identity = query.first()
+    log.debug('Exact user lookup. user_uid=\"{}\", email=\"{}\", found=\"{}\"'.format(user_id, email,
+                                                                                    identity is not None))
+    return {
+      'users': [identity_summary(identity)] if identity is not None else [],
+      'next': None
+    }
+
+  query = db.query(Identity)
+
+  if name is not None:
+    query = query.filter(Identity.username.icontains(name, autoescape=True))
+  if roles:
+    query = query.filter(Identity.role.contains(roles))
+
+  after = decode_cursor(cursor)
+  if after is not None:
+    query = query.filter(tuple_(Identity.join_date, Identity.user_id) > tuple_(*after))
+
+  data = (
+    query
+    .order_by(asc(Identity.join_date), asc(Identity.user_id))
+    .limit(limit + 1)
+    .all()
+  )
+
+  next_cursor = None
+  if len(data) > limit:
+    data = data[:limit]
+    next_cursor = encode_cursor(data[-1].join_date, data[-1].user_id)
+
+  return {
+    'users': [identity_summary(identity) for identity in data],
+    'next': next_cursor
+  }
@@ -5,6 +5,7 @@ from uuid import UUID
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
 
+from core.user import identity_cache
 from models.database_models.relational.identity import Identity
 from models.request_models.user_requests import UpdateUserProfileRequest, UpdateClassroomSNumberRequest
 
@@ -12,7 +13,7 @@ log = logging.getLogger(__name__)
 
 
 def get_identity_by_userid(user_id: UUID, db: Session) -> Type[Identity] | None:
-  identity = db.query(Identity).filter(Identity.user_id == user_id).first()
+  identity = identity_cache.load_identity(user_id, db)
 
   if identity is None:
     return None
@@ -27,21 +28,16 @@ def update_user_profile(uid: UUID, request: UpdateUserProfileRequest, db: Sessio
     log.debug("Identity specified by JWT was not found. user_uid=\"{}\"".format(uid))
     raise HTTPException(status_code=400, detail="Identity not found")
 
-  current_identity = (
-    db.query(Identity)
-    .filter_by(user_id=uid)
-    .first()
-  )
-
-  if current_identity.email != request.email:
+  if identity.email != request.email:
     log.debug(
       'Email was changed. email verification set to false. user_uid="{}", email="{}"'.format(uid, request.email))
-    current_identity.email_verified = False
-    current_identity.email = request.email
+    identity.email_verified = False
+    identity.email = request.email
 
-  current_identity.username = request.username
+  identity.username = request.username
 
   db.commit()
+  identity_cache.invalidate(uid)
 
 
 def update_classroom_and_snumber(uid: UUID, request: UpdateClassroomSNumberRequest, db: Session):
@@ -51,16 +47,11 @@ def update_classroom_and_snumber(uid: UUID, request: UpdateClassroomSNumberReque
     log.debug("Identity specified by JWT was not found. user_uid=\"{}\"".format(uid))
     raise HTTPException(status_code=400, detail="Identity not found")
 
-  current_identity = (
-    db.query(Identity)
-    .filter_by(user_id=uid)
-    .first()
-  )
-
-  current_identity.classroom = request.classroom
-  current_identity.student_number = request.student_number
+  identity.classroom = request.classroom
+  identity.student_number = request.student_number
 
   db.commit()
+  identity_cache.invalidate(uid)
 
 
 def role_to_school(roles: list[str]) -> (bool, Optional[str]):
@@ -1,9 +1,16 @@
+import time
+from contextlib import nullcontext
+
+import redis
 import redis.asyncio
-from sqlalchemy import create_engine
+from redis.client import Pipeline
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
+from core import metrics, tracing
 from core.config import config
+from core.query_stats import record_statement
 
 SQL_DATABASE_URL = "postgresql://{user}:{password}@{host}:{port}/{name}".format(
   host=config["database"]['relational']["host"],
@@ -13,7 +20,53 @@ SQL_DATABASE_URL = "postgresql://{user}:{password}@{host}:{port}/{name}".format(
   password=config["database"]['relational']["password"]
 )
 
-engine = create_engine(SQL_DATABASE_URL)
+POOL_SIZE = config['database']['relational'].get('pool_size', 10)
+MAX_OVERFLOW = config['database']['relational'].get('max_overflow', 10)
+
+# pre_ping replaces connections the server or a proxy closed while idle, recycle keeps them from getting that old
+engine = create_engine(
+  SQL_DATABASE_URL,
+  pool_size=POOL_SIZE,
+  max_overflow=MAX_OVERFLOW,
+  pool_timeout=config['database']['relational'].get('pool_timeout', 10),
+  pool_recycle=config['database']['relational'].get('pool_recycle', 1800),
+  pool_pre_ping=True
+)
+
+
+@event.listens_for(engine, 'checkout')
+def _checkout(dbapi_connection, connection_record, connection_proxy):
+  metrics.DB_POOL_CHECKED_OUT.inc()
+
+
+@event.listens_for(engine, 'checkin')
+def _checkin(dbapi_connection, connection_record):
+  metrics.DB_POOL_CHECKED_OUT.dec()
+
+
+@event.listens_for(engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+  context._query_start = time.perf_counter()
+  context._span = None
+  if tracing.enabled():
+    context._span = tracing.start_span(
+      statement.split(None, 1)[0].upper(),
+      {'db.system': 'postgresql', 'db.statement': statement}
+    )
+
+
+@event.listens_for(engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+  record_statement(statement, time.perf_counter() - context._query_start)
+  tracing.end_span(context._span)
+
+
+@event.listens_for(engine, 'handle_error')
+def _handle_error(exception_context):
+  context = exception_context.execution_context
+  if context is not None:
+    tracing.end_span(getattr(context, '_span', None), exception_context.original_exception)
+
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=True, bind=engine)
 TableBase = declarative_base()
@@ -27,26 +80,74 @@ def create_connection():
     db.close()
 
 
-redis_db = redis.Redis(
-  host=config['database']["redis"]["host"],
-  port=config['database']["redis"]["port"],
-  password=config['database']["redis"]["password"],
-  db=0,
-  decode_responses=True
-)
+def _redis_span(db_label: str, command: str):
+  if not tracing.enabled():
+    return nullcontext()
 
-redis_aaguid_db = redis.Redis(
-  host=config['database']["redis"]["host"],
-  port=config['database']["redis"]["port"],
-  password=config['database']["redis"]["password"],
-  db=1,
-  decode_responses=True
-)
+  # keys are left out. some of them are challenges and tokens
+  return tracing.span(
+    'redis {}'.format(command),
+    {'db.system': 'redis', 'db.redis.database_index': int(db_label), 'db.operation': command},
+    client=True
+  )
 
-meal_cache_db = redis.Redis(
-  host=config['database']["redis"]["host"],
-  port=config['database']["redis"]["port"],
-  password=config['database']["redis"]["password"],
-  db=2,
-  decode_responses=True
-)
+
+class InstrumentedPipeline(Pipeline):
+  def execute(self, raise_on_error=True):
+    with metrics.REDIS_LATENCY.labels(self.db_label, 'PIPELINE').time(), _redis_span(self.db_label, 'PIPELINE'):
+      return super().execute(raise_on_error)
+
+
+class InstrumentedRedis(redis.Redis):
+  def __init__(self, *args, **kwargs):
+    super().__init__(*args, **kwargs)
+    self.db_label = str(kwargs.get('db', 0))
+
+  def execute_command(self, *args, **options):
+    command = str(args[0]).upper()
+    with metrics.REDIS_LATENCY.labels(self.db_label, command).time(), _redis_span(self.db_label, command):
+      return super().execute_command(*args, **options)
+
+  def pipeline(self, transaction=True, shard_hint=None):
+    pipe = InstrumentedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+    pipe.db_label = self.db_label
+    return pipe
+
+
+class InstrumentedAsyncRedis(redis.asyncio.Redis):
+  def __init__(self, *args, **kwargs):
+    super().__init__(*args, **kwargs)
+    self.db_label = str(kwargs.get('db', 0))
+
+  async def execute_command(self, *args, **options):
+    command = str(args[0]).upper()
+    with metrics.REDIS_LATENCY.labels(self.db_label, command).time(), _redis_span(self.db_label, command):
+      return await super().execute_command(*args, **options)
+
+
+REDIS_CONFIG = config['database']['redis']
+
+
+def _redis_options(db: int) -> dict:
+  # every client gets a bounded pool. without timeouts a stalled redis holds threadpool workers forever
+  return dict(
+    host=REDIS_CONFIG['host'],
+    port=REDIS_CONFIG['port'],
+    password=REDIS_CONFIG['password'],
+    db=db,
+    decode_responses=True,
+    max_connections=REDIS_CONFIG.get('max_connections', 50),
+    socket_timeout=REDIS_CONFIG.get('socket_timeout', 2),
+    socket_connect_timeout=REDIS_CONFIG.get('connect_timeout', 2),
+    health_check_interval=REDIS_CONFIG.get('health_check_interval', 30),
+  )
+
+
+# sync clients for the endpoints running in the threadpool
+redis_db = InstrumentedRedis(**_redis_options(0))
+redis_aaguid_db = InstrumentedRedis(**_redis_options(1))
+meal_cache_db = InstrumentedRedis(**_redis_options(2))
+
+# asyncio clients for async endpoints, awaited on the event loop. they connect on first use
+async_redis_db = InstrumentedAsyncRedis(**_redis_options(0))
+async_redis_aaguid_db = InstrumentedAsyncRedis(**_redis_options(1))
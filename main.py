@@ -1,27 +1,69 @@
+import time
+
+# taken before the imports below, for the startup report
+_import_begin = time.perf_counter()
+
 import logging
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
+from core import startup
 from core.authentication.aaguid import load_aaguid
+from core.metrics import MetricsMiddleware
+from core.profiling import ProfilingMiddleware, instrument_routes
+from core.resources import resources
+from core.social.board_registry import load_board_registry
+from core.tracing import TracingMiddleware, setup_tracing
+from database.database import SessionLocal
+from routers import health_api, metrics_api, profiling_api
 from routers.authentication import google_auth_api, authorization_api, password_auth_api, passkey_auth_api
 from routers.error_handler import add_error_handler
+from routers.response import JSONResponse
 from routers.school import school_access_api, neis_school_api, neis_cache_api, common_school_api
 from routers.school_verification import sv_request_api, sv_access_api, sv_evaluation_api, \
   sv_user_request_api
-from routers.social import post_request_api, board_request_api, comment_request_api
+from routers.social import post_request_api, board_request_api, comment_request_api, search_api, image_api
 from routers.user import user_info_api, user_preference_api, personal_social_api, user_access_api
 
+log = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+  begin = time.perf_counter()
+  log.info("Starting server")
+
+  # the pools are filled before the worker takes traffic, /api/health/ready answers 503 until then
+  resources.warm()
+  app.state.resources = resources
+
+  load_aaguid()
+
+  with SessionLocal() as db:
+    load_board_registry(db)
+
+  startup.report(_import_seconds, begin)
+  log.info("Server ready to go")
+  yield
+
+  log.info("Stopping server")
+  await resources.aclose()
+
+
 app = FastAPI(
+  lifespan=lifespan,
+  default_response_class=JSONResponse,
   docs_url="/api/docs",
   openapi_url="/api/openapi.json",
   redoc_url="/api/redoc",
 )
 
-log = logging.getLogger(__name__)
-
-log.info("Starting server")
+setup_tracing()
 
-load_aaguid()
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
 
 ####################################################
 app.include_router(authorization_api.router)
@@ -47,7 +89,14 @@ app.include_router(common_school_api.router)
 app.include_router(post_request_api.router)
 app.include_router(board_request_api.router)
 app.include_router(comment_request_api.router)
+app.include_router(search_api.router)
+app.include_router(image_api.router)
+####################################################
+app.include_router(health_api.router)
+app.include_router(metrics_api.router)
+app.include_router(profiling_api.router)
 ####################################################
 add_error_handler(app)
+instrument_routes(app)
 
-log.info("Server ready to go")
+_import_seconds = time.perf_counter() - _import_begin
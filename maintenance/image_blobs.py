@@ -0,0 +1,23 @@
+# Moves post images uploaded before the blob store out of social.image.image: renders their variants into the
+# store, fills sha256, content_type, size, width and height, and nulls the inline bytes. The metadata columns
+# are added nullable, this is run from the repository root, then they are made NOT NULL:
+#   python -m maintenance.image_blobs
+# It can be run again, only rows that still have no sha256 are picked up.
+import argparse
+
+from core.social import image_service
+from database.database import SessionLocal
+
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--batch', type=int, default=50, help='legacy images loaded at once, each up to 10 MiB')
+  args = parser.parse_args()
+
+  with SessionLocal() as db:
+    migrated, skipped = image_service.migrate_legacy_images(db, args.batch)
+    print('images migrated {}, skipped {}'.format(migrated, skipped))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,27 @@
+# Backfills social.post.comment_count and last_activity from social.comment, then reseeds the hot rankings
+# so they score the real comment counts. Run once after deploying the counter columns, from the repository root:
+#   python -m maintenance.post_counters
+import argparse
+
+from core.social import comment_service, ranking_service
+from database.database import SessionLocal
+from models.database_models.relational.social.board import Board
+
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--batch', type=int, default=1000)
+  args = parser.parse_args()
+
+  with SessionLocal() as db:
+    count = comment_service.backfill_post_counters(db, args.batch)
+    print('posts backfilled {}'.format(count))
+
+    boards = [board_id for (board_id,) in db.query(Board.board_id).all()]
+    for board_id in boards:
+      ranking_service.rebuild_board_rank(board_id, db)
+    print('boards reranked {}'.format(len(boards)))
+
+
+if __name__ == '__main__':
+  main()
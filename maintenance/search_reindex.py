@@ -0,0 +1,22 @@
+# Fills social.post and social.comment search_vector of rows written before the search columns existed, so
+# they show up in search. Run once after deploying the columns, and with --rebuild after the tokenizer changes:
+#   python -m maintenance.search_reindex
+import argparse
+
+from core.social import search_service
+from database.database import SessionLocal
+
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--batch', type=int, default=1000)
+  parser.add_argument('--rebuild', action='store_true', help='index every row again, not only unindexed ones')
+  args = parser.parse_args()
+
+  with SessionLocal() as db:
+    count = search_service.reindex(db, args.batch, args.rebuild)
+    print('rows indexed {}'.format(count))
+
+
+if __name__ == '__main__':
+  main()
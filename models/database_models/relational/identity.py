@@ -3,7 +3,7 @@ from typing import Optional
 from uuid import UUID as PyUUID
 
 from pydantic import EmailStr
-from sqlalchemy import Column, UUID
+from sqlalchemy import Column, UUID, Index
 from sqlalchemy.dialects.postgresql import VARCHAR, BOOLEAN, SMALLINT, TIMESTAMP, ARRAY
 from sqlalchemy.ext.mutable import MutableList
 from sqlalchemy.orm import Mapped
@@ -13,7 +13,13 @@ from database.database import TableBase
 
 class Identity(TableBase):
   __tablename__ = "identity"
-  __table_args__ = {"schema": "users"}
+  __table_args__ = (
+    Index('ix_identity_join_date', 'join_date', 'user_id'),
+    Index('ix_identity_username_trgm', 'username', postgresql_using='gin',
+          postgresql_ops={'username': 'gin_trgm_ops'}),
+    Index('ix_identity_roles', 'roles', postgresql_using='gin'),
+    {"schema": "users"}
+  )
 
   user_id: Mapped[PyUUID] = Column(UUID(as_uuid=True), primary_key=True, index=True, unique=True, nullable=False,
                                    server_default="gen_random_uuid()")
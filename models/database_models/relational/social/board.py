@@ -2,7 +2,7 @@ import uuid
 from datetime import datetime
 from enum import Enum
 
-from sqlalchemy import Column
+from sqlalchemy import Column, Index
 from sqlalchemy.dialects.postgresql import VARCHAR, TIMESTAMP, UUID, SMALLINT, ARRAY
 from sqlalchemy.ext.mutable import MutableList
 from sqlalchemy.orm import Mapped
@@ -19,11 +19,14 @@ class BoardState(Enum):
 
 class Board(TableBase):
   __tablename__ = "board"
-  __table_args__ = {"schema": "social"}
+  __table_args__ = (
+    Index('ix_board_tag', 'tag', postgresql_using='gin'),
+    {"schema": "social"}
+  )
 
   board_id: Mapped[uuid.UUID] = Column(UUID(as_uuid=True), primary_key=True, unique=True, index=True, nullable=False,
                                        server_default="gen_random_uuid()")
-  name: Mapped[str] = Column(VARCHAR(128), nullable=False)
+  name: Mapped[str] = Column(VARCHAR(128), nullable=False, index=True)
   created_at: Mapped[datetime] = Column(TIMESTAMP, nullable=False, server_default="now()")
   tag: Mapped[list[str]] = Column(MutableList.as_mutable(ARRAY(VARCHAR(25))), nullable=False, default=[])
 
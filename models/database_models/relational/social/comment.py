@@ -1,10 +1,10 @@
 from datetime import datetime
 from uuid import UUID as PyUUID
 
-from sqlalchemy import Column, ForeignKey, FetchedValue
-from sqlalchemy.dialects.postgresql import UUID, INTEGER, TIMESTAMP, VARCHAR, TEXT, ARRAY
+from sqlalchemy import Column, ForeignKey, FetchedValue, Index
+from sqlalchemy.dialects.postgresql import UUID, INTEGER, TIMESTAMP, VARCHAR, TEXT, ARRAY, TSVECTOR
 from sqlalchemy.ext.mutable import MutableList
-from sqlalchemy.orm import relationship, backref, Mapped
+from sqlalchemy.orm import relationship, backref, Mapped, deferred
 
 from database.database import TableBase
 from models.database_models.relational.identity import Identity
@@ -15,7 +15,10 @@ from models.database_models.relational.social.post import Post
 
 class Comment(TableBase):
   __tablename__ = "comment"
-  __table_args__ = {"schema": "social"}
+  __table_args__ = (
+    Index('ix_comment_search_vector', 'search_vector', postgresql_using='gin'),
+    {"schema": "social"}
+  )
 
   comment_id: Mapped[PyUUID] = Column(UUID(as_uuid=True), primary_key=True, unique=True, index=True, nullable=False,
                                       server_default="gen_random_uuid()")
@@ -33,6 +36,9 @@ class Comment(TableBase):
 
   edited: Mapped[bool] = Column(INTEGER, nullable=False, server_default=FetchedValue())
 
+  # maintained by core.social.search_service on every write
+  search_vector = deferred(Column(TSVECTOR, nullable=True), group='search')
+
   author: Mapped[Identity] = relationship("Identity", uselist=False, backref=backref("comments",
                                                                                      uselist=True))  # TODO: decide the destiny of this post when the author is deleted
   school: Mapped[School] = relationship("School", uselist=False, backref=backref("comments",
@@ -2,8 +2,8 @@ from datetime import datetime
 from uuid import UUID as PyUUID
 
 from sqlalchemy import Column, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID, TIMESTAMP
-from sqlalchemy.orm import relationship, backref, Mapped
+from sqlalchemy.dialects.postgresql import UUID, TIMESTAMP, BYTEA, CHAR, INTEGER, VARCHAR
+from sqlalchemy.orm import relationship, backref, Mapped, deferred
 
 from database.database import TableBase
 from models.database_models.relational.identity import Identity
@@ -18,6 +18,15 @@ class PostImage(TableBase):
 
   upload_by: Mapped[PyUUID] = Column(UUID(as_uuid=True), ForeignKey("users.identity.user_id"), nullable=False)
   upload_at: Mapped[datetime] = Column(TIMESTAMP, nullable=False, server_default="now()")
-  image: Mapped[bytes] = Column("image", nullable=False)
+
+  # bytes live in the blob store under this hash. see core.social.image_service
+  sha256: Mapped[str] = Column(CHAR(64), unique=True, index=True, nullable=False)
+  content_type: Mapped[str] = Column(VARCHAR(32), nullable=False)
+  size: Mapped[int] = Column(INTEGER, nullable=False)
+  width: Mapped[int] = Column(INTEGER, nullable=False)
+  height: Mapped[int] = Column(INTEGER, nullable=False)
+
+  # legacy inline bytes. no longer written, moved to the blob store by maintenance.image_blobs
+  image: Mapped[bytes] = deferred(Column("image", BYTEA, nullable=True), group='image')
 
   uploader: Mapped[Identity] = relationship("Identity", uselist=False, backref=backref("uploaded", uselist=True))
@@ -1,10 +1,10 @@
 from datetime import datetime
 from uuid import UUID as PyUUID
 
-from sqlalchemy import Column, ForeignKey, FetchedValue
-from sqlalchemy.dialects.postgresql import UUID, INTEGER, TIMESTAMP, VARCHAR, TEXT, ARRAY
+from sqlalchemy import Column, ForeignKey, FetchedValue, Index
+from sqlalchemy.dialects.postgresql import UUID, INTEGER, TIMESTAMP, VARCHAR, TEXT, ARRAY, TSVECTOR
 from sqlalchemy.ext.mutable import MutableList
-from sqlalchemy.orm import relationship, backref, Mapped
+from sqlalchemy.orm import relationship, backref, Mapped, deferred
 
 from database.database import TableBase
 from models.database_models.relational.identity import Identity
@@ -14,7 +14,11 @@ from models.database_models.relational.social.board import Board
 
 class Post(TableBase):
   __tablename__ = "post"
-  __table_args__ = {"schema": "social"}
+  __table_args__ = (
+    Index('ix_post_board_write_time', 'board_id', 'write_time', 'post_id'),
+    Index('ix_post_search_vector', 'search_vector', postgresql_using='gin'),
+    {"schema": "social"}
+  )
 
   post_id: Mapped[PyUUID] = Column(UUID(as_uuid=True), primary_key=True, unique=True, index=True, nullable=False,
                                    server_default="gen_random_uuid()")
@@ -26,15 +30,21 @@ class Post(TableBase):
   write_time: Mapped[datetime] = Column(TIMESTAMP, nullable=False, server_default="now()")
 
   title: Mapped[str] = Column(VARCHAR(512), nullable=False)
-  content: Mapped[str] = Column(TEXT, nullable=False)
+  content: Mapped[str] = deferred(Column(TEXT, nullable=False), group='body')
   images: Mapped[list[PyUUID]] = Column(MutableList.as_mutable(ARRAY(UUID(as_uuid=True))), nullable=True)
 
   upvote: Mapped[int] = Column(INTEGER, nullable=False, server_default="0")
   downvote: Mapped[int] = Column(INTEGER, nullable=False, server_default="0")
   views: Mapped[int] = Column(INTEGER, nullable=False, server_default="0")
 
+  comment_count: Mapped[int] = Column(INTEGER, nullable=False, server_default="0")
+  last_activity: Mapped[datetime] = Column(TIMESTAMP, nullable=False, server_default="now()")
+
   edited: Mapped[bool] = Column(INTEGER, nullable=False, server_default=FetchedValue())
 
+  # maintained by core.social.search_service on every write
+  search_vector = deferred(Column(TSVECTOR, nullable=True), group='search')
+
   author: Mapped[Identity] = relationship("Identity", uselist=False, backref=backref("posts",
                                                                                      uselist=True))  # TODO: decide the destiny of this post when the author is deleted
   school: Mapped[School] = relationship("School", uselist=False, backref=backref("posts",
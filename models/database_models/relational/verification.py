@@ -3,9 +3,9 @@ from enum import Enum
 from typing import Optional
 from uuid import UUID as PyUUID
 
-from sqlalchemy import Column, ForeignKey, UUID
-from sqlalchemy.dialects.postgresql import TIMESTAMP, SMALLINT, BYTEA, VARCHAR
-from sqlalchemy.orm import relationship, backref, Mapped
+from sqlalchemy import Column, ForeignKey, UUID, Index
+from sqlalchemy.dialects.postgresql import TIMESTAMP, SMALLINT, BYTEA, VARCHAR, CHAR
+from sqlalchemy.orm import relationship, backref, Mapped, deferred
 
 from database.database import TableBase
 from models.database_models.relational.identity import Identity
@@ -34,7 +34,12 @@ class SvState(Enum):
 
 class SvRequest(TableBase):
   __tablename__ = 'verification'
-  __table_args__ = {'schema': "users"}
+  __table_args__ = (
+    Index('ix_verification_queue', 'state', 'request_time', 'verification_id'),
+    Index('ix_verification_name_trgm', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+    Index('ix_verification_school_trgm', 'school', postgresql_using='gin', postgresql_ops={'school': 'gin_trgm_ops'}),
+    {'schema': "users"}
+  )
 
   verification_id: Mapped[PyUUID] = Column(UUID(as_uuid=True), primary_key=True, index=True, unique=True,
                                            nullable=False, server_default='gen_random_uuid()')
@@ -45,8 +50,9 @@ class SvRequest(TableBase):
   examine_time: Mapped[datetime] = Column(TIMESTAMP)
 
   _request_type: Mapped[int] = Column('request_type', SMALLINT, nullable=False)
-  evidence: Mapped[bytes] = Column(BYTEA)
+  evidence: Mapped[bytes] = deferred(Column(BYTEA), group='evidence')
   _evidence_type: Mapped[int] = Column('evidence_type', SMALLINT)
+  evidence_hash: Mapped[Optional[str]] = Column(CHAR(64), index=True)
   grade: Mapped[int] = Column(SMALLINT, nullable=False)
   name: Mapped[str] = Column(VARCHAR(20), nullable=False)
   school: Mapped[str] = Column(VARCHAR(50), nullable=False)
@@ -0,0 +1,12 @@
+from typing import TypedDict
+from uuid import UUID
+
+
+class SchoolItem(TypedDict):
+  schoolId: UUID
+  schoolName: str
+  schoolType: str
+  neisCode: str
+  address: str
+  sex: str
+  userCount: int
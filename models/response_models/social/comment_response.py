@@ -0,0 +1,18 @@
+from datetime import datetime
+from typing import TypedDict
+
+
+class CommentItem(TypedDict):
+  author: int
+  content: str
+  writeTime: datetime
+  edited: bool
+  upvote: int
+  downvote: int
+  school: str
+
+
+class CommentListResponse(TypedDict):
+  code: int
+  state: str
+  comments: list[CommentItem]
@@ -0,0 +1,39 @@
+from datetime import datetime
+from typing import TypedDict, Optional
+from uuid import UUID
+
+
+class PostSummary(TypedDict):
+  postId: UUID
+  title: str
+  content: str
+  edited: bool
+  writeTime: datetime
+  schoolName: str
+  views: int
+  upvote: int
+  downvote: int
+  commentCount: int
+  lastActivity: datetime
+  vote: Optional[bool]
+
+
+class FeedPost(PostSummary):
+  boardId: UUID
+
+
+class PostListResponse(TypedDict):
+  code: int
+  state: str
+  posts: list[PostSummary]
+
+
+class PagedPostListResponse(PostListResponse):
+  next: Optional[int]
+
+
+class FeedResponse(TypedDict):
+  code: int
+  state: str
+  posts: list[FeedPost]
+  next: Optional[str]
@@ -1,9 +1,9 @@
 import logging
 
-from fastapi import APIRouter, Security
-from starlette.responses import JSONResponse
+from fastapi import APIRouter, Depends
 
-from core.authentication.authorization_service import authorization_header, authorize_jwt
+from core.authentication.authorization_service import Principal, get_principal
+from routers.response import JSONResponse
 
 log = logging.getLogger(__name__)
 
@@ -18,10 +18,9 @@ router = APIRouter(
   summary='Authorize user with JWT token',
 )
 def authorize_api(
-  auth: str = Security(authorization_header)
+  principal: Principal = Depends(get_principal)
 ):
   log.debug("Authorizing user with JWT token")
-  authorize_jwt(auth)
 
   return JSONResponse(
     status_code=200,
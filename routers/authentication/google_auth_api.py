@@ -2,7 +2,7 @@ import logging
 
 from fastapi import Request, APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from starlette.responses import RedirectResponse, JSONResponse
+from starlette.responses import RedirectResponse
 
 from core.authentication.auth_lookup_service import OAuthMethods, find_identity_from_auth_id
 from core.config import config
@@ -13,6 +13,7 @@ from core.google.recaptcha_service import verify_recaptcha
 from core.user.add_user_service import add_google_user
 from database.database import create_connection
 from models.request_models.register_requests import GoogleRegisterRequest
+from routers.response import JSONResponse
 
 log = logging.getLogger(__name__)
 
@@ -1,19 +1,19 @@
 import logging
 from typing import Annotated
 
-from fastapi import APIRouter, Security, Request, HTTPException
+from fastapi import APIRouter, Request, HTTPException
 from fastapi.params import Depends, Cookie
 from sqlalchemy.orm import Session
-from starlette.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 
-from core.authentication import passkey
-from core.authentication.authorization_service import authorization_header, authorize_jwt
+from core.authentication import aaguid as aaguid_service, passkey
+from core.authentication.authorization_service import Principal, get_principal
 from core.config import config
-from core.google.recaptcha_service import verify_recaptcha
-from core.jwt.jwt_service import get_sub
+from core.google.recaptcha_service import verify_recaptcha, verify_recaptcha_async
 from core.user import user_info_service
 from database.database import create_connection
 from models.request_models.passkey_request import RegisterPasskeyRequest, SignInPasskeyRequest
+from routers.response import JSONResponse
 
 log = logging.getLogger(__name__)
 
@@ -27,10 +27,10 @@ router = APIRouter(
   path='/auth-option',
   summary="Get webauthn authentication options",
 )
-def get_auth_option_api():
+async def get_auth_option_api():
   log.debug("User requested authentication option")
 
-  (session_id, option) = passkey.begin_authentication()
+  (session_id, option) = await passkey.begin_authentication()
 
   response = JSONResponse(
     content={
@@ -87,11 +87,10 @@ def login_passkey_api(
   summary="Get webauthn registration options",
 )
 def get_register_option_api(
-  jwt: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   db: Session = Depends(create_connection),
 ):
-  token = authorize_jwt(jwt)
-  sub = token.get("sub")
+  sub = principal.sub
 
   identity = user_info_service.get_identity_by_userid(sub, db)
 
@@ -127,11 +126,10 @@ def register_passkey_api(
   body: RegisterPasskeyRequest,
   PSK_REG_SEK: Annotated[str | None, Cookie()],
   request: Request,
-  jwt: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   db: Session = Depends(create_connection)
 ):
-  token = authorize_jwt(jwt)
-  sub = token.get("sub")
+  sub = principal.sub
 
   log.debug("User requested passkey registration. user_uid=\"{}\"".format(sub))
 
@@ -157,10 +155,10 @@ def register_passkey_api(
   path='/aaguid/{theme}/{aaguid}',
   summary="Get authenticator icon by aaguid",
 )
-def get_authenticator(
+async def get_authenticator(
   aaguid: str
 ):
-  authenticator = passkey.get_authenticator(aaguid)
+  authenticator = await aaguid_service.get_authenticator_async(aaguid)
   if authenticator is None:
     log.debug("Authenticator not found. aaguid=\"{}\"".format(aaguid))
     raise HTTPException(status_code=404, detail="Authenticator not found")
@@ -181,10 +179,10 @@ def get_authenticator(
   path='/{passkey_uuid}',
   description="Delete passkey",
 )
-def delete_passkey(
+async def delete_passkey(
   passkey_uuid: str,
   request: Request,
-  jwt: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   db: Session = Depends(create_connection)
 ):
   log.debug("User requested passkey deletion. passkey_uuid=\"{}\"".format(passkey_uuid))
@@ -194,14 +192,14 @@ def delete_passkey(
     log.debug("Recaptcha not found. passkey_uuid=\"{}\"".format(passkey_uuid))
     raise HTTPException(status_code=400, detail="Recaptcha not found")
 
-  if verify_recaptcha(recaptcha, request.client.host, 'delete/passkey') is False:
+  # the assessment is awaited on the event loop, only the SQL part needs a threadpool worker
+  if await verify_recaptcha_async(recaptcha, request.client.host, 'delete/passkey') is False:
     log.debug("Recaptcha verification failed. passkey_uuid=\"{}\"".format(passkey_uuid))
     raise HTTPException(status_code=400, detail="Recaptcha verification failed")
 
-  token = authorize_jwt(jwt)
-  sub = get_sub(token)
+  sub = principal.sub
 
-  passkey.delete_passkey(passkey_uuid, sub, db)
+  await run_in_threadpool(passkey.delete_passkey, passkey_uuid, sub, db)
 
   return JSONResponse(
     content={
@@ -218,13 +216,12 @@ def delete_passkey(
 def rename_passkey(
   passkey_uuid: str,
   body: dict,
-  jwt: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   db: Session = Depends(create_connection)
 ):
   log.debug("User requested passkey renaming. passkey_uuid=\"{}\"".format(passkey_uuid))
 
-  token = authorize_jwt(jwt)
-  sub = get_sub(token)
+  sub = principal.sub
   name = body['name']
 
   if name is None:
@@ -1,12 +1,11 @@
 import logging
 
 from fastapi import APIRouter, Request, HTTPException
-from fastapi.params import Depends, Security
+from fastapi.params import Depends
 from sqlalchemy.orm import Session
-from starlette.responses import JSONResponse
 
 from core.authentication.auth_lookup_service import find_identity_from_auth_id, OAuthMethods
-from core.authentication.authorization_service import authorization_header, authorize_jwt
+from core.authentication.authorization_service import Principal, get_principal
 from core.authentication.password_auth_service import login_with_password, update_password
 from core.google.recaptcha_service import verify_recaptcha
 from core.user import user_info_service
@@ -16,6 +15,7 @@ from models.database_models.relational.identity import Identity
 from models.request_models.password_requests import UpdatePasswordRequest
 from models.request_models.register_requests import PasswordRegisterRequest
 from models.request_models.signin_requests import PasswordSigninRequest
+from routers.response import JSONResponse
 
 log = logging.getLogger(__name__)
 
@@ -101,15 +101,14 @@ def register_password_user_api(
 def update_user_password_api(
   body: UpdatePasswordRequest,
   request: Request,
-  auth: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   db: Session = Depends(create_connection)
 ):
   if verify_recaptcha(body.recaptcha, request.client.host, 'changePassword') is False:
     log.debug("Recaptcha school_verification failed")
     raise HTTPException(status_code=400, detail="Recaptcha failed")
 
-  token = authorize_jwt(auth)
-  sub = token.get("sub")
+  sub = principal.sub
 
   log.debug('Change password. sub=\"{}\"'.format(sub))
 
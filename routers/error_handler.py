@@ -4,9 +4,10 @@ from fastapi import HTTPException
 from fastapi.exceptions import RequestValidationError
 from fastapi.routing import Request
 from pydantic import ValidationError
-from starlette.responses import JSONResponse
 from starlette.status import HTTP_404_NOT_FOUND, HTTP_500_INTERNAL_SERVER_ERROR
 
+from routers.response import JSONResponse
+
 log = logging.getLogger(__name__)
 
 HTTP_CODE_TO_STATE = {
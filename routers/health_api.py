@@ -0,0 +1,29 @@
+from fastapi import APIRouter
+
+from core.resources import resources
+from routers.response import JSONResponse
+
+router = APIRouter(
+  prefix='/api/health',
+  tags=['health'],
+  include_in_schema=False
+)
+
+
+@router.get(
+  path='/live',
+  description='Liveness probe, the worker process is serving'
+)
+async def live():
+  return JSONResponse(content={'code': 200, 'state': 'OK'})
+
+
+@router.get(
+  path='/ready',
+  description='Readiness probe, the worker is warmed and its database, redis pools answer'
+)
+def ready():
+  healthy, checks = resources.health()
+  if not healthy:
+    return JSONResponse(status_code=503, content={'code': 503, 'state': 'Service Unavailable', 'checks': checks})
+  return JSONResponse(content={'code': 200, 'state': 'OK', 'checks': checks})
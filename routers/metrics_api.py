@@ -0,0 +1,55 @@
+import hmac
+import logging
+import os
+
+from fastapi import APIRouter, HTTPException
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest
+from prometheus_client.multiprocess import MultiProcessCollector
+from starlette.requests import Request
+from starlette.responses import Response
+
+from core.config import config
+
+log = logging.getLogger(__name__)
+
+router = APIRouter(
+  prefix='/api/metrics',
+  tags=['metrics']
+)
+
+# traffic and latency by route are not public. without a scrape token the endpoint is off, unless
+# metrics.allow_unauthenticated is set for a deployment where only an internal network reaches it
+SCRAPE_TOKEN = config.get('metrics', {}).get('scrape_token')
+ALLOW_UNAUTHENTICATED = config.get('metrics', {}).get('allow_unauthenticated', False)
+
+
+def _registry():
+  # with several worker processes every worker writes its samples to PROMETHEUS_MULTIPROC_DIR
+  # and the scrape merges them
+  if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+    return REGISTRY
+
+  registry = CollectorRegistry()
+  MultiProcessCollector(registry)
+  return registry
+
+
+@router.get(
+  path='',
+  description='Prometheus metrics exposition',
+  include_in_schema=False
+)
+def get_metrics(request: Request):
+  if SCRAPE_TOKEN is None and not ALLOW_UNAUTHENTICATED:
+    raise HTTPException(status_code=404, detail='Not Found')
+
+  if SCRAPE_TOKEN is not None:
+    token = request.headers.get('Authorization', '')
+    if not hmac.compare_digest(token.encode(), 'Bearer {}'.format(SCRAPE_TOKEN).encode()):
+      log.debug('Metrics scrape rejected. client=\"{}\"'.format(request.client.host if request.client else None))
+      raise HTTPException(status_code=401, detail='Unauthorized')
+
+  return Response(
+    content=generate_latest(_registry()),
+    media_type=CONTENT_TYPE_LATEST
+  )
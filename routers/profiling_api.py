@@ -0,0 +1,112 @@
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
+
+from core import profiling
+from core.authentication.authorization_service import Principal, get_principal
+from core.user.user_info_service import check_role
+from routers.response import JSONResponse
+
+log = logging.getLogger(__name__)
+
+router = APIRouter(
+  prefix='/api/admin/profile',
+  tags=['admin'],
+  include_in_schema=False
+)
+
+SORT_KEYS = ('cumulative', 'tottime', 'ncalls', 'pcalls', 'filename', 'name')
+
+
+def require_profiler(principal: Principal = Depends(get_principal)) -> Principal:
+  if not profiling.ENABLED:
+    raise HTTPException(status_code=404, detail='Not Found')
+  if not check_role(principal.aud, profiling.PROFILER_ROLE):
+    raise HTTPException(status_code=403, detail='Forbidden')
+  return principal
+
+
+@router.get(
+  path='/sample',
+  description='Sample the stacks of every thread in this worker for a while'
+)
+async def sample_worker(
+  request: Request,
+  principal: Principal = Depends(require_profiler)
+):
+  duration = float(request.query_params.get('duration', '10'))
+  interval = float(request.query_params.get('interval', str(profiling.SAMPLE_INTERVAL)))
+  output = request.query_params.get('format', 'collapsed')
+  if output not in ('collapsed', 'speedscope'):
+    raise ValueError('format must be collapsed or speedscope')
+
+  log.info('Sampling worker. sub=\"{}\", duration=\"{}\", interval=\"{}\"'.format(principal.sub, duration, interval))
+  try:
+    # the sampler sleeps between samples, so it runs in the threadpool and the event loop keeps serving
+    result = await run_in_threadpool(profiling.sample, duration, interval)
+  except profiling.ProfilerBusy:
+    raise HTTPException(status_code=409, detail='Another profile is being captured')
+
+  headers = {
+    'X-Profile-Samples': str(result.samples),
+    'X-Profile-Interval': '{:.4f}'.format(result.interval),
+    'X-Profile-Overhead': '{:.4f}'.format(result.overhead),
+  }
+  if output == 'speedscope':
+    return JSONResponse(content=profiling.to_speedscope(result), headers=headers)
+  return PlainTextResponse(profiling.to_collapsed(result), headers=headers)
+
+
+@router.get(
+  path='/request',
+  description='List the request profiles kept by this worker'
+)
+def list_request_profiles(
+  principal: Principal = Depends(require_profiler)
+):
+  return JSONResponse(
+    content={
+      'code': 200,
+      'state': 'OK',
+      'profiles': [
+        {
+          'profileId': profile.profile_id,
+          'method': profile.method,
+          'path': profile.path,
+          'started': profile.started,
+          'elapsedMs': profile.elapsed * 1000,
+        }
+        for profile in reversed(profiling.request_profiles())
+      ]
+    }
+  )
+
+
+@router.get(
+  path='/request/{profile_id}',
+  description='Get the cProfile statistics of a profiled request'
+)
+def get_request_profile(
+  profile_id: str,
+  request: Request,
+  principal: Principal = Depends(require_profiler)
+):
+  profile = profiling.get_request_profile(profile_id)
+  if profile is None:
+    raise HTTPException(status_code=404, detail='Profile not found')
+
+  output = request.query_params.get('format', 'text')
+  if output == 'pstats':
+    # marshalled stats, loadable with pstats.Stats(path) or snakeviz
+    return Response(content=profiling.dump_stats(profile), media_type='application/octet-stream',
+                    headers={'Content-Disposition': 'attachment; filename="{}.prof"'.format(profile_id)})
+
+  sort = request.query_params.get('sort', 'cumulative')
+  if sort not in SORT_KEYS:
+    raise ValueError('sort must be one of {}'.format(', '.join(SORT_KEYS)))
+  limit = int(request.query_params.get('limit', '50'))
+
+  return PlainTextResponse(profiling.render_stats(profile, sort, limit))
@@ -0,0 +1,10 @@
+from typing import Any
+
+import orjson
+from starlette.responses import JSONResponse as StarletteJSONResponse
+
+
+class JSONResponse(StarletteJSONResponse):
+  # orjson serializes UUID, datetime and enums natively, so handlers can return them without converting
+  def render(self, content: Any) -> bytes:
+    return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
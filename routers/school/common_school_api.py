@@ -1,12 +1,12 @@
-from fastapi import APIRouter, Security, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from starlette.responses import JSONResponse
 
-from core.authentication.authorization_service import authorization_header, authorize_jwt
-from core.jwt.jwt_service import get_sub
-from core.user.user_info_service import get_identity_by_userid, role_to_school
+from core.authentication.authorization_service import Principal, get_principal
+from core.user.identity_cache import get_snapshot
+from core.user.user_info_service import role_to_school
 from database.database import create_connection
 from models.database_models.relational.schools import School
+from routers.response import JSONResponse
 
 router = APIRouter(
   prefix='/api/school',
@@ -19,13 +19,12 @@ router = APIRouter(
   summary="Get one's verified school information",
 )
 def get_school_api(
-  jwt: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   db: Session = Depends(create_connection)
 ):
-  token = authorize_jwt(jwt)
-  sub = get_sub(token)
+  sub = principal.sub
 
-  identity = get_identity_by_userid(sub, db)
+  identity = get_snapshot(sub, db)
   if identity is None:
     raise HTTPException(status_code=400, detail="Identity not found")
 
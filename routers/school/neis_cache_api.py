@@ -1,16 +1,14 @@
 import logging
 
-from fastapi import APIRouter, Request, Security, HTTPException, Depends
+from fastapi import APIRouter, Request, HTTPException, Depends
 from sqlalchemy.orm import Session
-from starlette.responses import JSONResponse
 
-from core.authentication.authorization_service import authorization_header, authorize_jwt
-from core.jwt.jwt_service import get_sub, get_aud
+from core.authentication.authorization_service import Principal, get_principal
 from core.school import neis_school_service
-from core.user import user_info_service
+from core.user import identity_cache
 from core.user.user_info_service import check_role
 from database.database import create_connection
-from models.database_models.relational.user_preference import UserPreference
+from routers.response import JSONResponse
 
 log = logging.getLogger(__name__)
 
@@ -26,11 +24,10 @@ router = APIRouter(
 )
 def get_cached_meal_data(
   request: Request,
-  jwt: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   db: Session = Depends(create_connection)
 ):
-  token = authorize_jwt(jwt)
-  aud = get_aud(token)
+  aud = principal.aud
 
   if not check_role(aud, 'core:user'):
     raise HTTPException(status_code=403, detail='Forbidden')
@@ -44,10 +41,9 @@ def get_cached_meal_data(
 
   meal_info = neis_school_service.get_meal_data(neis_code)
 
-  sub = get_sub(token)
-  identity = user_info_service.get_identity_by_userid(sub, db)
-  preference: UserPreference = identity.preference
-  allergy_pref = preference.allergy
+  sub = principal.sub
+  snapshot = identity_cache.get_snapshot(sub, db)
+  allergy_pref = snapshot.allergy
 
   return JSONResponse(
     content={
@@ -64,12 +60,11 @@ def get_cached_meal_data(
   description='Get cached timetable data from NEIS API'
 )
 def get_cached_timetable_data(
-  jwt: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   db: Session = Depends(create_connection)
 ):
-  token = authorize_jwt(jwt)
-  sub = get_sub(token)
-  aud = get_aud(token)
+  sub = principal.sub
+  aud = principal.aud
 
   if not check_role(aud, 'core:user'):
     raise HTTPException(status_code=403, detail='Forbidden')
@@ -1,12 +1,11 @@
 import logging
 
-from fastapi import APIRouter, Security, HTTPException, Request
-from starlette.responses import JSONResponse
+from fastapi import APIRouter, HTTPException, Request, Depends
 
-from core.authentication.authorization_service import authorization_header, authorize_jwt
-from core.jwt.jwt_service import get_sub, get_aud
+from core.authentication.authorization_service import Principal, get_principal
 from core.school.neis_school_service import query_school_info
 from core.user.user_info_service import check_role
+from routers.response import JSONResponse
 
 log = logging.getLogger(__name__)
 
@@ -21,18 +20,17 @@ router = APIRouter(
 )
 def query_neis_school(
   request: Request,
-  jwt: str = Security(authorization_header)
+  principal: Principal = Depends(get_principal)
 ):
-  token = authorize_jwt(jwt)
-  sub = get_sub(token)
-  aud = get_aud(token)
+  sub = principal.sub
+  aud = principal.aud
 
   log.debug("Querying NEIS school data. sub=\"{}\"".format(sub))
 
   school_name = request.query_params.get('schoolName')
 
   if not check_role(aud, 'root:neis_api'):
-    log.debug("User is not an admin. user_uid=\"{}\"".format(token.get('sub')))
+    log.debug("User is not an admin. user_uid=\"{}\"".format(sub))
     raise HTTPException(status_code=403, detail="Forbidden")
 
   if school_name is None:
@@ -1,16 +1,14 @@
 import logging
 
 from fastapi import APIRouter, Depends, Request, HTTPException
-from fastapi.params import Security
 from sqlalchemy.orm import Session
-from starlette.responses import JSONResponse
 
-from core.authentication.authorization_service import authorization_header, authorize_jwt
-from core.jwt.jwt_service import get_aud
+from core.authentication.authorization_service import Principal, get_principal
 from core.school.school_access_service import get_school_list, delete_school, add_school
 from core.user.user_info_service import check_role
 from database.database import create_connection
 from models.request_models.school_requests import AddSchoolRequest
+from routers.response import JSONResponse
 
 log = logging.getLogger(__name__)
 
@@ -26,12 +24,11 @@ router = APIRouter(
 )
 def add_school_api(
   body: AddSchoolRequest,
-  jwt: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   db: Session = Depends(create_connection)
 ):
-  token = authorize_jwt(jwt)
-  sub = token.get("sub")
-  aud = get_aud(token)
+  sub = principal.sub
+  aud = principal.aud
 
   log.debug("Adding school. sub=\"{}\"".format(sub))
 
@@ -56,12 +53,11 @@ def add_school_api(
 )
 def get_school_list_api(
   request: Request,
-  jwt: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   db: Session = Depends(create_connection)
 ):
-  token = authorize_jwt(jwt)
-  aud = token.get('aud')
-  sub = token.get("sub")
+  aud = principal.aud
+  sub = principal.sub
 
   log.debug("Getting school list. sub=\"{}\"".format(sub))
 
@@ -101,12 +97,11 @@ def get_school_list_api(
 )
 def deletes_school_api(
   request: Request,
-  jwt: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   db: Session = Depends(create_connection)
 ):
-  token = authorize_jwt(jwt)
-  sub = token.get("sub")
-  aud = token.get("aud")
+  sub = principal.sub
+  aud = principal.aud
 
   log.debug("Deleting school. sub=\"{}\"".format(sub))
 
@@ -1,14 +1,15 @@
 import logging
 
 from fastapi import APIRouter, Request, Depends, HTTPException
-from fastapi.params import Security
 from sqlalchemy.orm import Session
-from starlette.responses import JSONResponse
 
-from core.authentication.authorization_service import authorization_header, authorize_jwt
-from core.school_verification.sv_access_service import access_get_sv
+from core.authentication.authorization_service import Principal, get_principal
+from core.pagination import page_size
+from core.school_verification.sv_access_service import access_get_sv, access_get_sv_queue, QUEUE_DEFAULT_STATES
 from core.user.user_info_service import check_role
 from database.database import create_connection
+from models.database_models.relational.verification import SvState
+from routers.response import JSONResponse
 
 log = logging.getLogger(__name__)
 
@@ -24,12 +25,11 @@ router = APIRouter(
 )
 def get_sv_list(
   request: Request,
-  jwt: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   db: Session = Depends(create_connection)
 ):
-  token = authorize_jwt(jwt)
-  sub = token.get('sub')
-  aud = token.get('aud')
+  sub = principal.sub
+  aud = principal.aud
 
   log.debug("Getting sv list. sub=\"{}\"".format(sub))
 
@@ -58,3 +58,57 @@ def get_sv_list(
       'data': data
     }
   )
+
+
+@router.get(
+  path='/queue',
+  summary='Page through school verification requests by state',
+)
+def get_sv_queue(
+  request: Request,
+  principal: Principal = Depends(get_principal),
+  db: Session = Depends(create_connection)
+):
+  sub = principal.sub
+  aud = principal.aud
+
+  log.debug("Getting sv queue. sub=\"{}\"".format(sub))
+
+  if not check_role(aud, 'root:read_sv_reqs'):
+    log.debug("User is not an admin. user_uid=\"{}\"".format(sub))
+    raise HTTPException(status_code=403, detail='Forbidden')
+
+  state_param = request.query_params.get('state')
+  name = request.query_params.get('name')
+  school_name = request.query_params.get('schoolName')
+
+  if state_param is None or state_param == '':
+    states = QUEUE_DEFAULT_STATES
+  else:
+    try:
+      states = [SvState[state] for state in state_param.upper().split(',')]
+    except KeyError:
+      log.debug("Unknown sv state was given. state=\"{}\"".format(state_param))
+      raise HTTPException(status_code=400, detail='Invalid state')
+
+  if name == '':
+    name = None
+  if school_name == '':
+    school_name = None
+
+  data = access_get_sv_queue(
+    db,
+    states=states,
+    name=name,
+    school_name=school_name,
+    cursor=request.query_params.get('cursor'),
+    limit=page_size(request.query_params.get('limit'))
+  )
+
+  return JSONResponse(
+    content={
+      'code': 200,
+      'state': 'OK',
+      'data': data
+    }
+  )
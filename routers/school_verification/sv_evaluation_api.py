@@ -2,17 +2,16 @@ import logging
 import re
 
 from fastapi import APIRouter, Depends, Request, HTTPException, Response
-from fastapi.params import Security
 from sqlalchemy.orm import Session
-from starlette.responses import JSONResponse
 
-from core.authentication.authorization_service import authorization_header, authorize_jwt
-from core.jwt.jwt_service import get_sub, get_aud
+from core.authentication.authorization_service import authorize_jwt, Principal, get_principal, principal_of
 from core.school_verification.sv import get_sv_request_detail, get_evidence, evaluate_sv
+from core.user import identity_cache
 from core.user.user_info_service import check_role
 from database.database import create_connection
 from models.database_models.relational.verification import SvEvidenceType
 from models.request_models.school_verification_requests import SvEvaluation
+from routers.response import JSONResponse
 
 log = logging.getLogger(__name__)
 
@@ -28,12 +27,11 @@ router = APIRouter(
 )
 def get_sv_request_api(
   request: Request,
-  jwt: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   db: Session = Depends(create_connection)
 ):
-  token = authorize_jwt(jwt)
-  sub = token.get("sub")
-  aud = token.get("aud")
+  sub = principal.sub
+  aud = principal.aud
 
   log.debug('Getting SV request info. sub=\"{}\"'.format(sub))
 
@@ -76,9 +74,10 @@ def get_evidence_api(
     log.debug('JWT was not given')
     raise HTTPException(status_code=403, detail='Forbidden')
 
-  token = authorize_jwt(jwt)
-  sub = token.get("sub")
-  aud = token.get("aud")
+  # evidence is opened directly by the browser, so the token comes in the query instead of the header
+  principal = principal_of(authorize_jwt(jwt))
+  sub = principal.sub
+  aud = principal.aud
 
   log.debug('Get SV request evidence. sub=\"{}\"'.format(sub))
 
@@ -121,12 +120,11 @@ def get_evidence_api(
 )
 def evaluate_sv_api(
   body: SvEvaluation,
-  jwt: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   db: Session = Depends(create_connection)
 ):
-  token = authorize_jwt(jwt)
-  sub = get_sub(token)
-  aud = get_aud(token)
+  sub = principal.sub
+  aud = principal.aud
 
   log.debug('Evaluate SV request. sub=\"{}\"'.format(sub))
 
@@ -134,8 +132,9 @@ def evaluate_sv_api(
     log.debug('User is not an admin. user_id=\"{}\"'.format(sub))
     raise HTTPException(status_code=403, detail='Forbidden')
 
-  evaluate_sv(body, db)
+  user_id = evaluate_sv(body, db)
   db.commit()
+  identity_cache.invalidate(user_id)
 
   log.debug(
     'Evaluation of SV was made. verification_id=\"{}\", judge_uid=\"{}\", state=\"{}\"'.format(body.verification_id,
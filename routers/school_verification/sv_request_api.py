@@ -1,17 +1,17 @@
 import logging
 
 from fastapi import APIRouter, Request, HTTPException, UploadFile
-from fastapi.params import Depends, Security
+from fastapi.params import Depends
 from sqlalchemy.orm import Session
-from starlette.responses import JSONResponse
 
-from core.authentication.authorization_service import authorization_header, authorize_jwt
+from core.authentication.authorization_service import Principal, get_principal
 from core.google.recaptcha_service import verify_recaptcha
 from core.school_verification.sv_request_service import add_request, add_evidence
 from core.user import user_info_service
 from database.database import create_connection
 from models.database_models.relational.identity import Identity
 from models.request_models.school_verification_requests import NewVerificationRequest
+from routers.response import JSONResponse
 
 log = logging.getLogger(__name__)
 
@@ -28,15 +28,14 @@ router = APIRouter(
 def submit_sv_draft_api(
   body: NewVerificationRequest,
   request: Request,
-  jwt: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   db: Session = Depends(create_connection)
 ):
   if verify_recaptcha(body.recaptcha, request.client.host, 'sv/new') is False:
     log.debug("Recaptcha school_verification failed")
     raise HTTPException(status_code=400, detail="Recaptcha failed")
 
-  token = authorize_jwt(jwt)
-  sub = token.get("sub")
+  sub = principal.sub
 
   log.debug("Added new verification request. sub=\"{}\"".format(sub))
 
@@ -58,11 +57,10 @@ def submit_sv_draft_api(
 )
 async def upload_sv_evidence_api(
   evidence: UploadFile,
-  jwt: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   db: Session = Depends(create_connection)
 ):
-  token = authorize_jwt(jwt)
-  sub = token.get("sub")
+  sub = principal.sub
 
   log.debug("Upload evidence. sub=\"{}\"".format(sub))
 
@@ -2,18 +2,18 @@ import logging
 import re
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Security, Request, HTTPException
+from fastapi import APIRouter, Depends, Request, HTTPException
 from sqlalchemy import delete
 from sqlalchemy.orm import Session
-from starlette.responses import JSONResponse
 
-from core.authentication.authorization_service import authorization_header, authorize_jwt
+from core.authentication.authorization_service import Principal, get_principal
 from core.google.recaptcha_service import verify_recaptcha
-from core.jwt.jwt_service import get_sub
 from core.school_verification.sv import get_request_list, withdraw_verification
+from core.user import identity_cache
 from database.database import create_connection
 from models.database_models.relational.verification import SvRequest
 from models.request_models.school_verification_requests import WithdrawVerificationRequest
+from routers.response import JSONResponse
 
 log = logging.getLogger(__name__)
 
@@ -28,11 +28,10 @@ router = APIRouter(
   summary="Get school verification requests of user"
 )
 def get_sv_requests_api(
-  jwt: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   db: Session = Depends(create_connection)
 ):
-  token = authorize_jwt(jwt)
-  sub = token.get("sub")
+  sub = principal.sub
 
   log.debug("Getting school school verification data. sub=\"{}\"".format(sub))
 
@@ -53,7 +52,7 @@ def get_sv_requests_api(
 )
 def delete_sv_request_api(
   request: Request,
-  jwt: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   db: Session = Depends(create_connection)
 ):
   vid = request.headers.get('Resource-Id')
@@ -72,8 +71,7 @@ def delete_sv_request_api(
     log.debug("Recaptcha delete school verification failed")
     raise HTTPException(status_code=400, detail="Recaptcha failed")
 
-  token = authorize_jwt(jwt)
-  sub = token.get("sub")
+  sub = principal.sub
 
   log.debug("Deleting school verification request. sub=\"{}\". request_id=\"{}\"".format(sub, vid))
 
@@ -110,20 +108,20 @@ def delete_sv_request_api(
 def withdraw_verification_api(
   body: WithdrawVerificationRequest,
   request: Request,
-  jwt: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   db: Session = Depends(create_connection)
 ):
   if verify_recaptcha(body.recaptcha, request.client.host, 'sv/withdraw') is False:
     log.debug("Recaptcha school_verification failed")
     raise HTTPException(status_code=400, detail="Recaptcha failed")
 
-  token = authorize_jwt(jwt)
-  sub = get_sub(token)
+  sub = principal.sub
 
   log.debug('Withdraw verification. sub=\"{}\"'.format(sub))
 
   withdraw_verification(sub, db)
   db.commit()
+  identity_cache.invalidate(sub)
 
   log.debug('Verification was withdrawn. user_uid=\"{}\"'.format(sub))
 
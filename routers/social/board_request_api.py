@@ -3,12 +3,9 @@ import re
 from uuid import UUID
 
 from fastapi import Depends, HTTPException, APIRouter
-from fastapi.params import Security
 from sqlalchemy.orm import Session
-from starlette.responses import JSONResponse
 
-from core.authentication.authorization_service import authorization_header, authorize_jwt
-from core.jwt.jwt_service import get_aud
+from core.authentication.authorization_service import Principal, get_principal
 from core.social import board_service
 from core.social.board_service import check_acl_by_aud
 from core.user.user_info_service import check_role
@@ -16,6 +13,7 @@ from core.validation import validate_all, length_check
 from database.database import create_connection
 from models.database_models.relational.social.board_acl import BoardACLAction
 from models.request_models.social.board_request import CreateBoardRequest
+from routers.response import JSONResponse
 
 log = logging.getLogger(__name__)
 
@@ -31,13 +29,12 @@ router = APIRouter(
 )
 async def create_board(
   body: CreateBoardRequest,
-  jwt: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   db: Session = Depends(create_connection)
 ):
   log.debug(f"Creating board. board_name=\"{body.name}\"")
 
-  token = authorize_jwt(jwt)
-  aud = token.get("aud")
+  aud = principal.aud
 
   if check_role(aud, "social:add_board"):
     board_id = board_service.create_board(body.name, db)
@@ -60,13 +57,12 @@ async def create_board(
 )
 async def get_board(
   board_id: str,
-  jwt: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   db: Session = Depends(create_connection)
 ):
   log.debug(f"Getting board. board_id=\"{board_id}\"")
 
-  token = authorize_jwt(jwt)
-  aud = get_aud(token)
+  aud = principal.aud
 
   if board_id is None:
     raise HTTPException(400, "board_id is required")
@@ -97,13 +93,12 @@ async def get_board(
 )
 def get_board_by_name(
   name: str,
-  jwt: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   db: Session = Depends(create_connection)
 ):
   log.debug(f"Getting board. board_name=\"{name}\"")
 
-  token = authorize_jwt(jwt)
-  aud = token.get("aud")
+  aud = principal.aud
 
   if name is None:
     raise HTTPException(400, "name is required")
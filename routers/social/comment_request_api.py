@@ -2,12 +2,10 @@ import logging
 from uuid import UUID
 
 from fastapi import APIRouter, HTTPException
-from fastapi.params import Security, Depends
+from fastapi.params import Depends
 from sqlalchemy.orm import Session
-from starlette.responses import JSONResponse
 
-from core.authentication.authorization_service import authorization_header, authorize_jwt
-from core.jwt.jwt_service import get_sub, get_aud
+from core.authentication.authorization_service import Principal, get_principal
 from core.social import check_acl
 from core.social.board_service import check_acl_by_aud
 from core.social.comment_service import get_organized_comments, leave_comment, delete_comment, edit_comment
@@ -15,6 +13,8 @@ from core.social.post_service import get_post, get_board_by_post
 from database.database import create_connection
 from models.database_models.relational.social.board_acl import BoardACLAction
 from models.request_models.social.comment_request import CommentAdditionRequest, CommentEditRequest
+from models.response_models.social.comment_response import CommentListResponse
+from routers.response import JSONResponse
 
 log = logging.getLogger(__name__)
 
@@ -29,15 +29,14 @@ router = APIRouter(
   summary="Get comments for post"
 )
 def get_comments(
-  jwt: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   post_id: UUID = None,
   db: Session = Depends(create_connection)
 ):
   log.debug("Get comments of post. post_id=\"{}\"".format(post_id))
 
-  token = authorize_jwt(jwt)
-  sub = get_sub(token)
-  aud = get_aud(token)
+  sub = principal.sub
+  aud = principal.aud
 
   board = get_board_by_post(post_id, db)
 
@@ -48,16 +47,12 @@ def get_comments(
                                                                                                              board.board_id))
     raise HTTPException(status_code=403, detail='Forbidden')
 
-  comments = get_organized_comments(post_id, db)
-
-  return JSONResponse(
-    status_code=200,
-    content={
-      'code': 200,
-      'state': 'OK',
-      'comments': comments
-    }
-  )
+  response: CommentListResponse = {
+    'code': 200,
+    'state': 'OK',
+    'comments': get_organized_comments(post_id, db)
+  }
+  return JSONResponse(status_code=200, content=response)
 
 
 @router.post(
@@ -66,14 +61,13 @@ def get_comments(
 )
 def post_comment(
   body: CommentAdditionRequest,
-  jwt: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   db: Session = Depends(create_connection),
 ):
   log.debug("Post comment for post. post_id=\"{}\"".format(body.post_id))
 
-  token = authorize_jwt(jwt)
-  sub = get_sub(token)
-  aud = get_aud(token)
+  sub = principal.sub
+  aud = principal.aud
 
   post_id = UUID(body.post_id)
 
@@ -102,15 +96,14 @@ def post_comment(
   summary="Delete comment for post"
 )
 def delete_comment_api(
-  jwt: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   comment_id: UUID = None,
   db: Session = Depends(create_connection)
 ):
   log.debug("Delete comment. comment_id=\"{}\"".format(comment_id))
 
-  token = authorize_jwt(jwt)
-  sub = get_sub(token)
-  aud = get_aud(token)
+  sub = principal.sub
+  aud = principal.aud
 
   # This function includes ACL check
   delete_comment(sub, aud, comment_id, db)
@@ -130,14 +123,13 @@ def delete_comment_api(
 )
 def edit_comment_api(
   body: CommentEditRequest,
-  jwt: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   db: Session = Depends(create_connection),
 ):
   log.debug("Edit comment. comment_id=\"{}\"".format(body.comment_id))
 
-  token = authorize_jwt(jwt)
-  sub = get_sub(token)
-  aud = get_aud(token)
+  sub = principal.sub
+  aud = principal.aud
 
   comment_id = UUID(body.comment_id)
 
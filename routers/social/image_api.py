@@ -0,0 +1,112 @@
+import logging
+from uuid import UUID
+
+from fastapi import APIRouter, HTTPException, UploadFile
+from fastapi.params import Depends
+from sqlalchemy.orm import Session
+from starlette.requests import Request
+from starlette.responses import FileResponse, RedirectResponse, Response
+
+from core.authentication.authorization_service import Principal, get_principal
+from core.social import image_service
+from core.social.blob_store import get_store
+from core.validation import regex_check
+from database.database import create_connection
+from models.database_models.relational.social.image import PostImage
+from routers.response import JSONResponse
+
+log = logging.getLogger(__name__)
+
+router = APIRouter(
+  prefix='/api/social/image',
+  tags=['social']
+)
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def image_summary(image: PostImage) -> dict:
+  return {
+    'imageId': image.image_id,
+    'width': image.width,
+    'height': image.height,
+    'urls': image_service.image_urls(image)
+  }
+
+
+@router.post(
+  path='',
+  description='Upload an image to attach to posts',
+)
+async def upload(
+  image: UploadFile,
+  principal: Principal = Depends(get_principal),
+  db: Session = Depends(create_connection)
+):
+  sub = principal.sub
+  aud = principal.aud
+
+  log.debug("Uploading image. sub=\"{}\"".format(sub))
+  stored = await image_service.upload_image(sub, aud, image, db)
+
+  return JSONResponse(
+    status_code=201,
+    content={
+      'code': 201,
+      'state': 'CREATED',
+      'image': image_summary(stored)
+    }
+  )
+
+
+@router.get(
+  path='/{image_id}',
+  description='Get image metadata and variant urls',
+)
+def get_image(
+  image_id: UUID,
+  principal: Principal = Depends(get_principal),
+  db: Session = Depends(create_connection)
+):
+  return JSONResponse(
+    content={
+      'code': 200,
+      'state': 'OK',
+      'image': image_summary(image_service.get_image(image_id, db))
+    }
+  )
+
+
+@router.get(
+  path='/{sha256}/{variant}',
+  description='Serve an image variant. urls are content addressed and never change',
+)
+def serve_image(
+  sha256: str,
+  variant: str,
+  request: Request
+):
+  # no authorization. <img> tags cannot send it, and urls can only be learned from an authorized post
+  if not regex_check(sha256, r'^[0-9a-f]{64}$') or variant not in image_service.IMAGE_VARIANTS:
+    raise HTTPException(404, "Image not found")
+
+  key = image_service.blob_key(sha256, variant)
+  store = get_store()
+
+  path = store.path(key)
+  if path is None:
+    return RedirectResponse(store.url(key), status_code=302)
+
+  etag = '"{}-{}"'.format(sha256, variant)
+  if request.headers.get('if-none-match') == etag:
+    return Response(status_code=304, headers={'ETag': etag, 'Cache-Control': IMMUTABLE_CACHE_CONTROL})
+
+  if not store.exists(key):
+    raise HTTPException(404, "Image not found")
+
+  # FileResponse streams from disk and uses zero-copy sendfile where the server supports it
+  return FileResponse(
+    path,
+    media_type=image_service.VARIANT_CONTENT_TYPE,
+    headers={'ETag': etag, 'Cache-Control': IMMUTABLE_CACHE_CONTROL}
+  )
@@ -1,17 +1,22 @@
 import logging
+from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter
-from fastapi.params import Security, Depends
+from fastapi import APIRouter, HTTPException
+from fastapi.params import Depends
 from sqlalchemy.orm import Session
-from starlette.responses import JSONResponse
+from starlette.requests import Request
 
-from core.authentication.authorization_service import authorization_header, authorize_jwt
-from core.jwt.jwt_service import get_sub, get_aud
-from core.social import post_service
+from core.authentication.authorization_service import Principal, get_principal
+from core.social import post_service, ranking_service, image_service
+from core.pagination import page_size, decode_cursor, encode_cursor
 from core.validation import regex_check
 from database.database import create_connection
+from models.database_models.relational.social.post import Post
 from models.request_models.social.post_request import UploadPostRequest, UpdatePostRequest, VoteRequest
+from models.response_models.social.post_response import PostSummary, FeedPost, PostListResponse, \
+  PagedPostListResponse, FeedResponse
+from routers.response import JSONResponse
 
 log = logging.getLogger(__name__)
 
@@ -21,20 +26,37 @@ router = APIRouter(
 )
 
 
+def post_summary(post: Post, vote: Optional[bool]) -> PostSummary:
+  return {
+    "postId": post.post_id,
+    "title": post.title,
+    "content": post.content,
+    "edited": post.edited,
+    "writeTime": post.write_time,
+    "schoolName": post.school.school_name,
+    "views": post.views,
+    "upvote": post.upvote,
+    "downvote": post.downvote,
+    "commentCount": post.comment_count,
+    "lastActivity": post.last_activity,
+    "vote": vote,
+  }
+
+
 @router.post(
   path='',
   description='Upload a new post',
 )
 async def post(
   body: UploadPostRequest,
-  jwt: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   db: Session = Depends(create_connection),
 ):
-  log.info("Posting new post. title=\"{title}\", content=\"{content}\"".format(title=body.title, content=body.content))
+  log.info("Posting new post. board_id=\"{board_id}\", length=\"{length}\"".format(board_id=body.board_id,
+                                                                                   length=len(body.content)))
 
-  token = authorize_jwt(jwt)
-  sub = get_sub(token)
-  aud = get_aud(token)
+  sub = principal.sub
+  aud = principal.aud
 
   post_uuid = post_service.upload_post(sub, aud, body, db)
 
@@ -42,7 +64,7 @@ async def post(
     content={
       "code": 201,
       "state": "CREATED",
-      "postId": str(post_uuid)
+      "postId": post_uuid
     }
   )
 
@@ -53,14 +75,13 @@ async def post(
 )
 async def delete(
   post_id: str,
-  jwt: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   db: Session = Depends(create_connection),
 ):
   log.info("Deleting post. post_id=\"{post_id}\"".format(post_id=post_id))
 
-  token = authorize_jwt(jwt)
-  sub = get_sub(token)
-  aud = get_aud(token)
+  sub = principal.sub
+  aud = principal.aud
 
   post_service.delete_post(sub, aud, post_id, db)
 
@@ -79,16 +100,13 @@ async def delete(
 async def edit(
   post_id: str,
   body: UpdatePostRequest,
-  jwt: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   db: Session = Depends(create_connection),
 ):
-  log.info("Editing post. post_id=\"{post_id}\", title=\"{title}\", content=\"{content}\"".format(post_id=post_id,
-                                                                                                  title=body.title,
-                                                                                                  content=body.content))
+  log.info("Editing post. post_id=\"{post_id}\", length=\"{length}\"".format(post_id=post_id, length=len(body.content)))
 
-  token = authorize_jwt(jwt)
-  sub = get_sub(token)
-  aud = get_aud(token)
+  sub = principal.sub
+  aud = principal.aud
 
   post_service.edit_post(sub, aud, post_id, body, db)
 
@@ -107,13 +125,13 @@ async def edit(
 async def get(
   board_id: str,
   head: str | None = '',
-  jwt: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   db: Session = Depends(create_connection)
 ):
   log.info("Listing posts. board_id=\"{board_id}\"".format(board_id=board_id))
 
-  token = authorize_jwt(jwt)
-  aud = get_aud(token)
+  sub = principal.sub
+  aud = principal.aud
 
   if regex_check(board_id, r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$'):
     board_uuid = UUID(board_id)
@@ -126,27 +144,76 @@ async def get(
     begin_uuid = UUID(head)
 
   posts = post_service.get_posts(aud, board_uuid, begin_uuid, db)
-  response = []
-  for post in posts:
-    response.append({
-      "postId": str(post.post_id),
-      "title": post.title,
-      "content": post.content,
-      "edited": post.edited,
-      "writeTime": post.write_time.isoformat(),
-      "schoolName": post.school.school_name,
-      "views": post.views,
-      "upvote": post.upvote,
-      "downvote": post.downvote,
-    })
+  votes = post_service.get_votes_for_posts(sub, [post.post_id for post in posts], db)
+  response: PostListResponse = {
+    "code": 200,
+    "state": "OK",
+    "posts": [post_summary(post, votes[post.post_id]) for post in posts]
+  }
+  return JSONResponse(content=response)
 
-  return JSONResponse(
-    content={
-      "code": 200,
-      "state": "OK",
-      "posts": response
-    }
-  )
+
+@router.get(
+  path='/hot/{board_id}',
+  description='List posts of a board by hot ranking',
+)
+async def get_hot(
+  board_id: str,
+  start: int = 0,
+  limit: str | None = None,
+  principal: Principal = Depends(get_principal),
+  db: Session = Depends(create_connection)
+):
+  log.debug("Listing hot posts. board_id=\"{board_id}\", start=\"{start}\"".format(board_id=board_id, start=start))
+
+  sub = principal.sub
+  aud = principal.aud
+
+  if not regex_check(board_id, r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$'):
+    raise ValueError("Invalid board_id")
+  if start < 0 or start >= ranking_service.HOT_TOP_K:
+    raise HTTPException(400, "start out of range")
+
+  size = page_size(limit, 10)
+  posts = post_service.get_hot_posts(aud, UUID(board_id), start, size, db)
+  votes = post_service.get_votes_for_posts(sub, [post.post_id for post in posts], db)
+
+  response: PagedPostListResponse = {
+    "code": 200,
+    "state": "OK",
+    "posts": [post_summary(post, votes[post.post_id]) for post in posts],
+    # a short page is the end of the ranking, and it never goes past HOT_TOP_K
+    "next": start + size if len(posts) == size and start + size < ranking_service.HOT_TOP_K else None
+  }
+  return JSONResponse(content=response)
+
+
+@router.get(
+  path='/feed',
+  description='List posts of every board the user follows, newest first',
+)
+async def get_feed(
+  request: Request,
+  principal: Principal = Depends(get_principal),
+  db: Session = Depends(create_connection)
+):
+  sub = principal.sub
+  aud = principal.aud
+
+  cursor = decode_cursor(request.query_params.get('cursor'))
+  size = page_size(request.query_params.get('limit'), 20)
+
+  log.debug("Listing feed. sub=\"{}\", cursor=\"{}\"".format(sub, cursor))
+  posts = post_service.get_feed(sub, aud, cursor, size, db)
+  votes = post_service.get_votes_for_posts(sub, [post.post_id for post in posts], db)
+
+  response: FeedResponse = {
+    "code": 200,
+    "state": "OK",
+    "posts": [FeedPost(**post_summary(post, votes[post.post_id]), boardId=post.board_id) for post in posts],
+    "next": encode_cursor(posts[-1].write_time, posts[-1].post_id) if len(posts) == size else None
+  }
+  return JSONResponse(content=response)
 
 
 @router.get(
@@ -155,33 +222,36 @@ async def get(
 )
 async def get_post(
   post_id: str,
-  jwt: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   db: Session = Depends(create_connection),
 ):
   log.info("Getting post. post_id=\"{post_id}\"".format(post_id=post_id))
 
-  token = authorize_jwt(jwt)
-  sub = get_sub(token)
-  aud = get_aud(token)
+  sub = principal.sub
+  aud = principal.aud
 
   (post, vote) = post_service.get_post(sub, aud, UUID(post_id), db)
+  images = image_service.get_images(post.images, db)
 
   return JSONResponse(
     content={
       "code": 200,
       "state": "OK",
       "post": {
-        "postId": str(post.post_id),
+        "postId": post.post_id,
         "title": post.title,
         "content": post.content,
-        "images": post.images,
+        "images": [image.image_id for image in images],
+        "imageUrls": [image_service.image_urls(image) for image in images],
         "author": post.author_id == sub,
         "edited": post.edited,
-        "writeTime": post.write_time.isoformat(),
+        "writeTime": post.write_time,
         "schoolName": post.school.school_name,
         "views": post.views,
         "upvote": post.upvote,
         "downvote": post.downvote,
+        "commentCount": post.comment_count,
+        "lastActivity": post.last_activity,
         "vote": vote.vote if vote else None,
       }
     }
@@ -194,14 +264,13 @@ async def get_post(
 )
 def upvote(
   vote_request: VoteRequest,
-  jwt: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   db: Session = Depends(create_connection)
 ):
   log.info("Upvoting post. post_id=\"{post_id}\"".format(post_id=vote_request.post_id))
 
-  token = authorize_jwt(jwt)
-  sub = get_sub(token)
-  aud = get_aud(token)
+  sub = principal.sub
+  aud = principal.aud
 
   (up, down, vote) = post_service.vote_post(sub, aud, UUID(vote_request.post_id), vote_request.vote, db)
 
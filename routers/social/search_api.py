@@ -0,0 +1,101 @@
+import logging
+
+from fastapi import APIRouter
+from fastapi.params import Depends
+from sqlalchemy.orm import Session
+from starlette.requests import Request
+
+from core.authentication.authorization_service import Principal, get_principal
+from core.pagination import page_size
+from core.social import search_service
+from database.database import create_connection
+from routers.response import JSONResponse
+
+log = logging.getLogger(__name__)
+
+router = APIRouter(
+  prefix='/api/social/search',
+  tags=['social']
+)
+
+
+def page_start(request: Request) -> int:
+  start = int(request.query_params.get('start', '0'))
+  if start < 0:
+    raise ValueError('start out of range')
+  return start
+
+
+@router.get(
+  path='/post',
+  description='Search titles and contents of posts in boards the user can read',
+)
+def search_post(
+  request: Request,
+  principal: Principal = Depends(get_principal),
+  db: Session = Depends(create_connection)
+):
+  aud = principal.aud
+
+  q = request.query_params.get('q')
+  start = page_start(request)
+  size = page_size(request.query_params.get('limit'), 20)
+
+  results = search_service.search_posts(aud, q, start, size, db)
+
+  return JSONResponse(
+    content={
+      'code': 200,
+      'state': 'OK',
+      'posts': [
+        {
+          'postId': post.post_id,
+          'boardId': post.board_id,
+          'title': post.title,
+          'snippet': snippet,
+          'writeTime': post.write_time,
+          'schoolName': post.school.school_name,
+          'upvote': post.upvote,
+          'downvote': post.downvote,
+          'commentCount': post.comment_count,
+        }
+        for post, snippet in results
+      ],
+      'next': start + size if len(results) == size else None
+    }
+  )
+
+
+@router.get(
+  path='/comment',
+  description='Search comments in boards the user can read',
+)
+def search_comment(
+  request: Request,
+  principal: Principal = Depends(get_principal),
+  db: Session = Depends(create_connection)
+):
+  aud = principal.aud
+
+  q = request.query_params.get('q')
+  start = page_start(request)
+  size = page_size(request.query_params.get('limit'), 20)
+
+  results = search_service.search_comments(aud, q, start, size, db)
+
+  return JSONResponse(
+    content={
+      'code': 200,
+      'state': 'OK',
+      'comments': [
+        {
+          'postId': comment.post_id,
+          'postTitle': title,
+          'snippet': snippet,
+          'writeTime': comment.write_time,
+        }
+        for comment, title, snippet in results
+      ],
+      'next': start + size if len(results) == size else None
+    }
+  )
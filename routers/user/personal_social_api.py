@@ -1,16 +1,16 @@
 import logging
 from uuid import UUID
 
-from fastapi import APIRouter, Security, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from starlette.responses import JSONResponse
 
-from core.authentication.authorization_service import authorization_header, authorize_jwt
-from core.jwt.jwt_service import get_sub, get_aud
-from core.social.personalized_social_service import get_user_personalized_board, star_board
+from core.authentication.authorization_service import Principal, get_principal
+from core.social.personalized_social_service import get_user_personalized_board, star_board, \
+  invalidate_personalized_board
 from core.user.user_info_service import check_role
 from database.database import create_connection
 from models.request_models.social.personal_social_request import StarBoardRequest
+from routers.response import JSONResponse
 
 log = logging.getLogger(__name__)
 
@@ -26,12 +26,11 @@ router = APIRouter(
   description='Get user\'s featured board'
 )
 def get_featured_board(
-  token: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   db: Session = Depends(create_connection)
 ):
-  jwt = authorize_jwt(token)
-  sub = get_sub(jwt)
-  aud = get_aud(jwt)
+  sub = principal.sub
+  aud = principal.aud
 
   if not check_role(aud, 'core:user'):
     raise HTTPException(status_code=403, detail='Forbidden')
@@ -53,12 +52,11 @@ def get_featured_board(
 )
 def star_board_api(
   body: StarBoardRequest,
-  token: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   db: Session = Depends(create_connection)
 ):
-  jwt = authorize_jwt(token)
-  sub = get_sub(jwt)
-  aud = get_aud(jwt)
+  sub = principal.sub
+  aud = principal.aud
 
   if not check_role(aud, 'core:user'):
     raise HTTPException(status_code=403, detail='Forbidden')
@@ -67,6 +65,7 @@ def star_board_api(
 
   star_board(sub, UUID(body.board_id), body.star, db)
   db.commit()
+  invalidate_personalized_board(sub)
 
   return JSONResponse(
     content={
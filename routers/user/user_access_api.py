@@ -1,14 +1,15 @@
 import logging
+from uuid import UUID
 
-from fastapi import APIRouter, Security, Depends, Request, HTTPException
+from fastapi import APIRouter, Depends, Request, HTTPException
 from sqlalchemy.orm import Session
-from starlette.responses import JSONResponse
 
-from core.authentication.authorization_service import authorization_header, authorize_jwt
-from core.jwt.jwt_service import get_sub, get_aud
-from core.user.user_access_service import access_get_user
+from core.authentication.authorization_service import Principal, get_principal
+from core.pagination import page_size
+from core.user.user_access_service import access_get_user, search_users
 from core.user.user_info_service import check_role
 from database.database import create_connection
+from routers.response import JSONResponse
 
 log = logging.getLogger(__name__)
 
@@ -24,12 +25,11 @@ router = APIRouter(
 )
 def get_user(
   request: Request,
-  jwt: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   db: Session = Depends(create_connection)
 ):
-  token = authorize_jwt(jwt)
-  sub = get_sub(token)
-  aud = get_aud(token)
+  sub = principal.sub
+  aud = principal.aud
 
   log.debug("Getting sv list. sub=\"{}\"".format(sub))
 
@@ -58,3 +58,45 @@ def get_user(
       'data': data
     }
   )
+
+
+@router.get(
+  path='/search',
+  summary="Search users by id, email, name or role"
+)
+def search_user(
+  request: Request,
+  principal: Principal = Depends(get_principal),
+  db: Session = Depends(create_connection)
+):
+  sub = principal.sub
+  aud = principal.aud
+
+  log.debug("Searching users. sub=\"{}\"".format(sub))
+
+  if not check_role(aud, 'root:manage_user'):
+    log.debug("User is not an admin. user_uid=\"{}\"".format(sub))
+    raise HTTPException(status_code=403, detail='Forbidden')
+
+  user_id = request.query_params.get('id')
+  email = request.query_params.get('email')
+  name = request.query_params.get('name')
+  role = request.query_params.get('role')
+
+  data = search_users(
+    db,
+    user_id=UUID(user_id) if user_id else None,
+    email=email if email else None,
+    name=name if name else None,
+    roles=role.split(',') if role else None,
+    cursor=request.query_params.get('cursor'),
+    limit=page_size(request.query_params.get('limit'))
+  )
+
+  return JSONResponse(
+    content={
+      'code': 200,
+      'state': 'OK',
+      'data': data
+    }
+  )
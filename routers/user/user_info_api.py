@@ -1,11 +1,10 @@
 import logging
 from typing import Type
 
-from fastapi import APIRouter, Security, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
-from starlette.responses import JSONResponse
 
-from core.authentication.authorization_service import authorization_header, authorize_jwt
+from core.authentication.authorization_service import Principal, get_principal
 from core.google.recaptcha_service import verify_recaptcha
 from core.user import user_info_service
 from core.user.user_info_service import update_user_profile, role_to_school, update_classroom_and_snumber
@@ -17,6 +16,7 @@ from models.database_models.relational.passkey_auth import PasskeyAuth
 from models.database_models.relational.password_auth import PasswordAuth
 from models.database_models.relational.schools import School
 from models.request_models.user_requests import UpdateUserProfileRequest, UpdateClassroomSNumberRequest
+from routers.response import JSONResponse
 
 log = logging.getLogger(__name__)
 
@@ -31,11 +31,10 @@ router = APIRouter(
   summary="Get user information",
 )
 def get_user_api(
-  auth: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   db=Depends(create_connection)
 ):
-  token = authorize_jwt(auth)
-  sub = token.get("sub")
+  sub = principal.sub
 
   log.debug("Getting user information. sub=\"{}\"".format(sub))
 
@@ -67,11 +66,10 @@ def get_user_api(
   summary="Get user authentication information",
 )
 def get_auth_lookup_api(
-  auth: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   db=Depends(create_connection)
 ):
-  token = authorize_jwt(auth)
-  sub = token.get("sub")
+  sub = principal.sub
 
   log.debug('Query auth lookup. sub=\"{}\"'.format(sub))
 
@@ -131,11 +129,10 @@ def get_auth_lookup_api(
   summary="Get school verification information",
 )
 def get_verification_info_api(
-  auth: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   db: Session = Depends(create_connection)
 ):
-  token = authorize_jwt(auth)
-  sub = token.get("sub")
+  sub = principal.sub
 
   log.debug("Getting school school_verification data. sub=\"{}\"".format(sub))
 
@@ -188,11 +185,10 @@ def get_verification_info_api(
 def update_user_api(
   body: UpdateUserProfileRequest,
   request: Request,
-  jwt: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   db: Session = Depends(create_connection)
 ):
-  token = authorize_jwt(jwt)
-  sub = token.get("sub")
+  sub = principal.sub
 
   log.debug("Updating user information. user_uid=\"{}\"".format(sub))
 
@@ -217,11 +213,10 @@ def update_user_api(
 )
 def update_classroom_snumber(
   body: UpdateClassroomSNumberRequest,
-  jwt: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   db: Session = Depends(create_connection)
 ):
-  token = authorize_jwt(jwt)
-  sub = token.get("sub")
+  sub = principal.sub
 
   log.debug(
     "Updating classroom and student number information. user_uid=\"{}\", new_classroom=\"{}\", new_snumber=\"{}\"".format(
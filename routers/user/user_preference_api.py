@@ -1,17 +1,15 @@
 import logging
 
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.params import Security
 from sqlalchemy.orm import Session
-from starlette.responses import JSONResponse
 
-from core.authentication.authorization_service import authorization_header, authorize_jwt
-from core.jwt.jwt_service import get_sub, get_aud
-from core.user import user_info_service
+from core.authentication.authorization_service import Principal, get_principal
+from core.user import identity_cache
 from core.user.user_info_service import check_role
 from database.database import create_connection
 from models.database_models.relational.user_preference import UserPreference
 from models.request_models.user_requests import UpdateUserAllergyInformationRequest
+from routers.response import JSONResponse
 
 log = logging.getLogger(__name__)
 
@@ -26,21 +24,19 @@ router = APIRouter(
   summary='Get user allergy preference'
 )
 def get_user_allergy_preference(
-  token: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   db: Session = Depends(create_connection)
 ):
-  jwt = authorize_jwt(token)
-  sub = get_sub(jwt)
-  aud = get_aud(jwt)
+  sub = principal.sub
+  aud = principal.aud
 
   log.debug("Getting user allergy code. sub=\"{}\"".format(sub))
 
   if not check_role(aud, 'core:user'):
     raise HTTPException(status_code=403, detail='Forbidden')
 
-  identity = user_info_service.get_identity_by_userid(sub, db)
-  preference: UserPreference = identity.preference
-  allergy_code = preference.allergy
+  snapshot = identity_cache.get_snapshot(sub, db)
+  allergy_code = snapshot.allergy
 
   return JSONResponse(
     content={
@@ -57,23 +53,22 @@ def get_user_allergy_preference(
 )
 def update_allergy_preference(
   body: UpdateUserAllergyInformationRequest,
-  token: str = Security(authorization_header),
+  principal: Principal = Depends(get_principal),
   db: Session = Depends(create_connection)
 ):
-  jwt = authorize_jwt(token)
-  sub = get_sub(jwt)
-  aud = get_aud(jwt)
+  sub = principal.sub
+  aud = principal.aud
 
   log.debug("Updating user allergy code. sub=\"{}\" new_code=\"{}\"".format(sub, body.allergy))
 
   if not check_role(aud, 'core:user'):
     raise HTTPException(status_code=403, detail='Forbidden')
 
-  identity = user_info_service.get_identity_by_userid(sub, db)
-  preference: UserPreference = identity.preference
+  preference: UserPreference = db.get(UserPreference, sub)
   preference.allergy = body.allergy
 
   db.commit()
+  identity_cache.invalidate(sub)
 
   return JSONResponse(
     content={